@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Async I/O Pipeline
+Overlap the reads, backups and writes of many files, for slow or network filesystems
+
+Every file goes through read -> convert -> back up -> stage. The read, the
+backup copy and the staged write are blocking calls, so they run on a
+bounded thread pool; matching and rendering are CPU-bound and run on a
+process pool of their own. An asyncio loop moves each file from stage to
+stage, so while one file converts, dozens of others can be waiting on the
+filesystem. Files are started from a window of 2 * io_workers and their
+results handed back one at a time as the window drains, so the memory held
+stays the same however large the tree is. The commit (the renames into place) still happens once,
+after every file is staged, so a failure leaves no target touched.
+
+All timers and counters are recorded from the event loop thread; the I/O
+threads only report how long each call took.
+"""
+
+import asyncio
+import collections
+import functools
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from atomic_io import WriteTransaction
+from campus_converter.runner import failed_result
+from instrumentation import STATS
+
+IO_WORKERS = 16
+
+
+class FileSystem:
+    """The blocking calls the pipeline makes; bench_async_io.py swaps in a slower one"""
+
+    def read(self, filepath):
+        """File text, line endings untranslated, and its size on disk"""
+        with open(filepath, 'r', encoding='utf-8', newline='') as f:
+            return f.read(), os.fstat(f.fileno()).st_size
+
+    def backup(self, store, filepath, digest):
+        store.add(filepath, digest)
+
+    def stage(self, filepath, content):
+        """Stage content in a transaction of its own, for the caller to merge"""
+        transaction = WriteTransaction()
+        transaction.stage(filepath, content)
+        return transaction
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+class Pipeline:
+    def __init__(self, convert, store, transaction, jobs=1, io_workers=IO_WORKERS, fs=None):
+        """convert(filepath, content=...) returns a convert_file() result and must be picklable"""
+        self.convert = convert
+        self.store = store
+        self.transaction = transaction
+        self.jobs = max(1, jobs)
+        self.io_workers = max(1, io_workers)
+        self.fs = fs or FileSystem()
+
+    def run(self, paths):
+        """Convert, back up and stage every path, yielding the results in input order.
+
+        Converted files are staged into the transaction (not committed) and
+        their result is marked 'staged', with the text dropped. The loop only
+        runs while the caller waits on the next result, so the counters are
+        never updated from two threads at once.
+        """
+        self.loop = asyncio.new_event_loop()
+        self.backup_locks = {}
+        window = collections.deque()
+        paths = iter(paths)
+        try:
+            with ThreadPoolExecutor(self.io_workers) as self.io_pool, \
+                    ProcessPoolExecutor(self.jobs) as self.cpu_pool:
+                while True:
+                    for path in itertools.islice(paths, 2 * self.io_workers - len(window)):
+                        window.append(self.loop.create_task(self._convert(path)))
+                    if not window:
+                        return
+                    yield self.loop.run_until_complete(window.popleft())
+        finally:
+            for task in window:
+                task.cancel()
+            if window:
+                self.loop.run_until_complete(asyncio.gather(*window, return_exceptions=True))
+            self.loop.close()
+
+    async def _io(self, phase, func, *args):
+        """Run a blocking call on the I/O pool and add its duration to phase (if any)"""
+        result, seconds = await self.loop.run_in_executor(self.io_pool, _timed, func, *args)
+        if phase:
+            STATS.add_time(phase, seconds)
+        return result
+
+    async def _convert(self, filepath):
+        try:
+            content, size = await self._io('read', self.fs.read, filepath)
+        except (OSError, UnicodeDecodeError) as e:
+            return failed_result(filepath, str(e))
+        STATS.add('bytes_read', size)
+        STATS.add('files_read')
+        result = await self.loop.run_in_executor(
+            self.cpu_pool, functools.partial(self.convert, filepath, content=content))
+        del content
+        if result['error'] or result['content'] is None:
+            return result
+        try:
+            # Identical files share one blob; copying it twice at once would race
+            digest = result['original_digest']
+            async with self.backup_locks.setdefault(digest, asyncio.Lock()):
+                await self._io('backup', self.fs.backup, self.store, filepath, digest)
+            # Staging time is counted by the transaction itself
+            staged = await self._io(None, self.fs.stage, filepath, result['content'])
+        except OSError as e:
+            result['error'] = str(e)
+            return result
+        self.transaction.merge(staged)
+        result['content'] = None
+        result['staged'] = True
+        return result
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Atomic Writes
+Write converted files through temp files and renames so a crash or Ctrl-C
+never leaves a truncated .tsx behind
+
+A WriteTransaction stages every output next to its target first (written and
+fsynced), then renames them all into place in one commit step. If anything
+fails before commit, the staged files are discarded and no target is touched.
+If a rename fails during commit, the targets already replaced are put back.
+
+A staged file can be guarded with the hash of the target it was converted
+from. Commit hashes a guarded target again right before renaming over it;
+if someone saved it in the meantime, the guard's resolve callback gets the
+current bytes and returns what to write instead (e.g. the conversion merged
+onto the new text, see three_way_merge.py), or None to leave the file alone.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+
+
+class WriteTransaction:
+    def __init__(self):
+        self.staged = []
+        self.guards = {}
+        # {filepath: what resolve reported} for every guarded file that changed before commit
+        self.resolved = {}
+        self.stage_seconds = 0.0
+        self.commit_seconds = 0.0
+        self.bytes_written = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.rollback()
+        return False
+
+    def stage(self, filepath, content):
+        """Write content to a temp file beside filepath; the target is not touched yet"""
+        self._stage(filepath, lambda f: f.write(content), 'w')
+
+    def stage_chunks(self, filepath, chunks):
+        """Stream bytes chunks into a temp file beside filepath; returns the sha256 of what was written.
+
+        Chunks can be memoryviews of an mmap, so unchanged ranges of a large
+        file go straight to disk without being copied into Python objects.
+        """
+        digest = hashlib.sha256()
+
+        def write(f):
+            for chunk in chunks:
+                digest.update(chunk)
+                f.write(chunk)
+
+        self._stage(filepath, write, 'wb')
+        return digest.hexdigest()
+
+    def guard(self, filepath, digest, resolve):
+        """Check at commit that filepath still hashes to digest (sha256 hex).
+
+        If it does not, resolve(current bytes) returns (content or None, info):
+        the content (str or bytes) is written in place of the staged output,
+        None drops the file from the commit, and info is kept in self.resolved.
+        """
+        self.guards[filepath] = (digest, resolve)
+
+    def merge(self, other):
+        """Take over the files staged by another transaction, e.g. one staged on another thread"""
+        self.staged.extend(other.staged)
+        self.guards.update(other.guards)
+        self.stage_seconds += other.stage_seconds
+        self.bytes_written += other.bytes_written
+        other.staged = []
+
+    def _stage(self, filepath, write, mode):
+        start = time.perf_counter()
+        directory, name = os.path.split(os.path.abspath(filepath))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f'.{name}.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, mode, encoding=None if 'b' in mode else 'utf-8',
+                           newline=None if 'b' in mode else '') as f:
+                write(f)
+                f.flush()
+                os.fsync(f.fileno())
+                self.bytes_written += os.fstat(f.fileno()).st_size
+            if os.path.exists(filepath):
+                os.chmod(tmp_path, os.stat(filepath).st_mode & 0o7777)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self.staged.append((filepath, tmp_path))
+        self.stage_seconds += time.perf_counter() - start
+
+    def _recheck(self, filepath, tmp_path):
+        """Apply filepath's guard; returns False if the file must not be written"""
+        digest, resolve = self.guards[filepath]
+        try:
+            with open(filepath, 'rb') as f:
+                current = f.read()
+        except FileNotFoundError:
+            current = None
+        if current is not None and hashlib.sha256(current).hexdigest() == digest:
+            return True
+        content, self.resolved[filepath] = resolve(current)
+        if content is None:
+            os.unlink(tmp_path)
+            return False
+        binary = isinstance(content, bytes)
+        with open(tmp_path, 'wb' if binary else 'w', encoding=None if binary else 'utf-8',
+                  newline=None if binary else '') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+            self.bytes_written += os.fstat(f.fileno()).st_size
+        return True
+
+    def commit(self):
+        """Rename every staged file over its target, all or nothing; guarded
+        files changed since they were read are resolved first (see guard())"""
+        start = time.perf_counter()
+        replaced = []
+        skipped = 0
+        try:
+            for filepath, tmp_path in self.staged:
+                if filepath in self.guards and not self._recheck(filepath, tmp_path):
+                    skipped += 1
+                    continue
+                # Keep the original reachable by a hard link so a later failure can undo this rename
+                original = None
+                if os.path.exists(filepath):
+                    original = f'{tmp_path}.orig'
+                    _link_or_copy(filepath, original)
+                try:
+                    os.replace(tmp_path, filepath)
+                except BaseException:
+                    if original:
+                        os.unlink(original)
+                    raise
+                replaced.append((filepath, original))
+        except BaseException:
+            for filepath, original in reversed(replaced):
+                if original:
+                    os.replace(original, filepath)
+                else:
+                    os.unlink(filepath)
+            self.staged = self.staged[len(replaced) + skipped:]
+            self.rollback()
+            raise
+
+        # One directory fsync per directory makes all the renames durable
+        for directory in {os.path.dirname(os.path.abspath(path)) for path, _ in replaced}:
+            _fsync_directory(directory)
+        for _, original in replaced:
+            if original:
+                os.unlink(original)
+        self.staged = []
+        self.guards = {}
+        self.commit_seconds += time.perf_counter() - start
+        return [filepath for filepath, _ in replaced]
+
+    def rollback(self):
+        """Discard every staged file that has not been committed"""
+        for _, tmp_path in self.staged:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+        self.staged = []
+
+
+def _link_or_copy(source, destination):
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+
+def _fsync_directory(directory):
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return  # Not supported on this platform (e.g. Windows)
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_atomic(filepath, content):
+    """Replace filepath with content in a single atomic rename"""
+    with WriteTransaction() as transaction:
+        transaction.stage(filepath, content)
+        transaction.commit()
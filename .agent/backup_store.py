@@ -0,0 +1,521 @@
+#!/usr/bin/env python3
+"""
+Backup Store
+Content-addressed backups shared by all converter scripts
+
+Every original file is stored once as .agent/backups/objects/<sha256>, no
+matter how many runs or scripts back it up, and each run writes a manifest
+.agent/backups/runs/<run-id>.json listing the files it touched. Blobs are
+copied straight from disk with shutil.copyfile, so a backup costs no extra
+read into Python, and a blob that already exists is never written again.
+
+The manifest is also the run's journal: for every file written it records
+the hash after the run and the spans that changed, [key, start, end, new
+start, new end, sections], and the file as written is kept as a blob too
+(usually the next run's backup of it anyway). sections ties a span to the
+sections it goes with: a grid to its own, a data array to every section
+converted with it that reads it, the import header to the sections using
+a name it imports. Each finished run is also appended to the index
+.agent/backups/runs.jsonl, one line naming it and the runs it undoes, so
+finding the last runs to undo reads the end of the index and nothing else.
+Undo reads only the manifests of the runs undone, never the tree:
+
+  - a file still as the run left it is put back whole, copied from its blob
+  - a file edited since gets only the run's spans put back, moved onto the
+    edits with three_way_merge.rebase(); a span edited as well is a
+    conflict and stays as it is, and so does every span of the sections it
+    goes with, so a converted grid never loses the fields or the imports
+    it reads
+
+Any number of runs are undone newest first in one pass, and everything is
+written in a single WriteTransaction. An undo is a run too, so it can be
+undone in turn.
+
+Usage:
+    python .agent/backup_store.py                  # list runs
+    python .agent/backup_store.py --restore RUN_ID
+    python .agent/backup_store.py --undo [RUN_ID ...] [--last N]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+from atomic_io import WriteTransaction
+from data_migration import data_label
+from import_fixer import IMPORTS
+from three_way_merge import EDITED, rebase
+
+BACKUP_ROOT = Path(__file__).with_name('backups')
+# Manifests from before the journal (version 1) list backups only
+MANIFEST_VERSION = 2
+# Bytes per read while copying a blob back into place
+COPY_CHUNK = 1 << 20
+# Bytes per read while reading the run index from its end
+INDEX_CHUNK = 1 << 16
+
+
+class BackupStore:
+    def __init__(self, root=BACKUP_ROOT):
+        self.root = Path(root)
+        self.objects = self.root / 'objects'
+        self.runs = self.root / 'runs'
+        self.index = self.root / 'runs.jsonl'
+        self.run_id = None
+        self.script = None
+        self.files = []
+        # {path: (digest, spans, unit)} of the outputs staged and not yet written
+        self.pending = {}
+        # Runs the current run undoes
+        self.undoes = []
+
+    def begin_run(self, script):
+        """Start a new run; files added afterwards are listed in its manifest"""
+        run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        # A long-running process (--watch) can start several runs within one second
+        self.run_id, sequence = run_id, 1
+        while (self.runs / f'{self.run_id}.json').exists():
+            sequence += 1
+            self.run_id = f'{run_id}-{sequence}'
+        self.script = script
+        self.files = []
+        self.pending = {}
+        self.undoes = []
+        return self.run_id
+
+    def add(self, filepath, digest):
+        """Back up filepath, whose current content hashes to digest.
+
+        Returns True if a new blob was written, False if an identical one
+        was already stored.
+        """
+        written = self._copy(filepath, digest)
+        self.files.append({'path': os.path.abspath(filepath), 'sha256': digest})
+        return written
+
+    def _copy(self, filepath, digest):
+        blob = self.objects / digest
+        if blob.exists():
+            return False
+        self.objects.mkdir(parents=True, exist_ok=True)
+        tmp_path = blob.with_suffix('.tmp')
+        shutil.copyfile(filepath, tmp_path)
+        os.replace(tmp_path, blob)
+        return True
+
+    def journal(self, filepath, digest, spans, unit='chars'):
+        """Note what filepath's staged output is: its sha256 and the spans
+        changed, [key, start, end, new start, new end, sections] in unit
+        ('chars' or 'bytes'; see changed_spans()), or None for the whole
+        file. Recorded once it is written."""
+        self.pending[os.path.abspath(filepath)] = (digest, spans, unit)
+
+    def written(self, paths):
+        """Record the journal of every file in paths, just committed, and keep a copy of each"""
+        for filepath in paths:
+            path = os.path.abspath(filepath)
+            if path not in self.pending:
+                continue
+            digest, spans, unit = self.pending.pop(path)
+            entry = next(entry for entry in reversed(self.files) if entry['path'] == path)
+            entry.update(after=digest, unit=unit, spans=spans)
+            self._copy(filepath, digest)
+
+    def read(self, digest):
+        """Content of the blob stored as digest, or None if it is missing or
+        was copied after the file had already changed again"""
+        try:
+            content = (self.objects / digest).read_bytes()
+        except FileNotFoundError:
+            return None
+        return content if hashlib.sha256(content).hexdigest() == digest else None
+
+    def finish(self):
+        """Write the manifest for the current run; returns its id, or None if nothing was backed up"""
+        if not self.files:
+            return None
+        self.runs.mkdir(parents=True, exist_ok=True)
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'run_id': self.run_id,
+            'script': self.script,
+            'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'created_ns': time.time_ns(),
+            'files': self.files,
+        }
+        if self.undoes:
+            manifest['undoes'] = self.undoes
+        # Before the manifest is saved, or an index built now would list it already
+        self._build_index()
+        self.save_run(manifest)
+        self._index_run(manifest)
+        self.pending = {}
+        return self.run_id
+
+    def _index_run(self, manifest):
+        """Append manifest's run to the index, as the newest"""
+        entry = {'run_id': manifest['run_id']}
+        if 'undoes' in manifest:
+            entry['undoes'] = manifest['undoes']
+        # One short write in append mode, so runs finishing at once do not interleave
+        with open(self.index, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + '\n')
+
+    def _build_index(self):
+        """Write the index from the manifests of a store that has none yet
+        (made before there was one), in the order they were written"""
+        if self.index.exists():
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        runs = sorted((path.stem for path in self.runs.glob('*.json')), key=self._written_at)
+        tmp_path = self.index.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for run_id in runs:
+                entry = {'run_id': run_id}
+                try:
+                    undoes = self.load_run(run_id).get('undoes')
+                except (OSError, ValueError):
+                    undoes = None
+                if undoes:
+                    entry['undoes'] = undoes
+                f.write(json.dumps(entry) + '\n')
+        os.replace(tmp_path, self.index)
+
+    def load_run(self, run_id):
+        with open(self.runs / f'{run_id}.json', 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_run(self, manifest):
+        tmp_path = self.runs / f"{manifest['run_id']}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.runs / f"{manifest['run_id']}.json")
+
+    def list_runs(self):
+        """Run ids, oldest first, in the order their manifests were written"""
+        return [entry['run_id'] for entry in self.recent_runs()][::-1]
+
+    def recent_runs(self):
+        """Index entries, {'run_id', and 'undoes' for an undo run}, newest
+        first. The index is read from its end INDEX_CHUNK bytes at a time,
+        so only as much of it is read as is iterated."""
+        if not self.runs.exists():
+            return
+        self._build_index()
+        with open(self.index, 'rb') as f:
+            end = f.seek(0, os.SEEK_END)
+            rest = b''
+            while end > 0:
+                start = max(0, end - INDEX_CHUNK)
+                f.seek(start)
+                lines = (f.read(end - start) + rest).split(b'\n')
+                # The first line may go on in the chunk before this one
+                rest = lines.pop(0) if start else b''
+                for line in reversed(lines):
+                    if line.strip():
+                        yield json.loads(line)
+                end = start
+
+    def _written_at(self, run_id):
+        """Sort key for run_id: when its manifest was written, then its sequence
+        within that time. Ids do not sort by time (pids differ in digits, and
+        `-10` sorts before `-2`); manifests older than created_ns only have
+        whole seconds."""
+        try:
+            manifest = self.load_run(run_id)
+        except (OSError, ValueError):
+            manifest = {}
+        written = manifest.get('created_ns')
+        if written is None:
+            try:
+                written = int(time.mktime(time.strptime(manifest['created'], '%Y-%m-%d %H:%M:%S'))) * 10**9
+            except (KeyError, TypeError, ValueError):
+                written = 0
+        parts = run_id.split('-')
+        sequence = int(parts[3]) if len(parts) > 3 and parts[3].isdigit() else 1
+        return written, sequence, run_id
+
+    def restore(self, run_id):
+        """Put back every file backed up in run_id; returns the restored paths"""
+        restored = []
+        for entry in self.load_run(run_id)['files']:
+            tmp_path = f"{entry['path']}.restore.tmp"
+            shutil.copyfile(self.objects / entry['sha256'], tmp_path)
+            os.replace(tmp_path, entry['path'])
+            restored.append(entry['path'])
+        return restored
+
+    def plan_undo(self, run_ids):
+        """What undoing run_ids, newest first, makes of each file they wrote.
+
+        Returns {path: state}; a state holds 'read' (the sha256 found on
+        disk, None if the file is gone), 'digest' and 'content' (the bytes,
+        or None when the file becomes the blob 'digest' as it is), 'undone'
+        [(run id, keys put back or None for the whole file)] and 'conflicts'
+        [(run id, key or None, reason)].
+        """
+        files = {}
+        for run_id in run_ids:
+            manifest = self.load_run(run_id)
+            legacy = manifest.get('version', 1) < MANIFEST_VERSION
+            # The last backup of a path is the text the run replaced
+            entries = {entry['path']: entry for entry in manifest['files']}
+            for path, entry in entries.items():
+                if not legacy and 'after' not in entry:
+                    continue  # backed up but never written
+                if path not in files:
+                    files[path] = _read_state(path)
+                self._undo_entry(files[path], run_id, entry, legacy)
+        return files
+
+    def _undo_entry(self, state, run_id, entry, legacy):
+        if state['digest'] is None:
+            state['conflicts'].append((run_id, None, 'file deleted since the run'))
+            return
+        if legacy or state['digest'] == entry['after']:
+            # Unchanged since the run (or journaled before spans were): back whole, by reference
+            state['digest'], state['content'] = entry['sha256'], None
+            state['undone'].append((run_id, None))
+            return
+        if entry['spans'] is None:
+            state['conflicts'].append((run_id, None, 'file changed since the run, which changed it whole'))
+            return
+        base, original = self.read(entry['after']), self.read(entry['sha256'])
+        if state['content'] is None:
+            state['content'] = self.read(state['digest'])
+        current = state['content']
+        if base is None or original is None or current is None:
+            state['conflicts'].append((run_id, None, 'the run\'s backups are missing or damaged'))
+            return
+        if entry['unit'] == 'chars':
+            base, original, current = base.decode('utf-8'), original.decode('utf-8'), current.decode('utf-8')
+        edits = [(span[0], span[3], span[4], original[span[1]:span[2]]) for span in entry['spans']]
+        merged, applied, conflicts = rebase(base, current, edits)
+        state['conflicts'] += [(run_id, key, 'section edited since the run' if reason == EDITED else reason)
+                               for key, reason in conflicts]
+        kept = _kept_with(entry['spans'], {key for key, _ in conflicts})
+        if kept:
+            # A section is put back whole or not at all
+            merged, applied, _ = rebase(base, current, [edit for edit in edits if edit[0] not in kept])
+            state['conflicts'] += [(run_id, key, f"kept with {', '.join(causes)}, which stays as it is")
+                                   for key, causes in kept.items()]
+        if merged is None:
+            return
+        if entry['unit'] == 'chars':
+            merged = merged.encode('utf-8')
+        state['content'], state['digest'] = merged, hashlib.sha256(merged).hexdigest()
+        state['undone'].append((run_id, list(dict.fromkeys(applied))))
+
+    def undo(self, run_ids, script='undo'):
+        """Undo run_ids, newest first, in one transaction (see plan_undo()).
+
+        The undo is itself a run; returns (its id or None if nothing was
+        written, the plan). Each file is written only if it still hashes to
+        what the plan read; a file saved in between is left alone and gets
+        a conflict.
+        """
+        files = self.plan_undo(run_ids)
+        changed = {path: state for path, state in files.items() if state['digest'] != state['read']}
+        if not changed:
+            return None, files
+        self.begin_run(f"{script} {' '.join(run_ids)}")
+        with WriteTransaction() as transaction:
+            for path, state in changed.items():
+                self.add(path, state['read'])
+                if state['content'] is None:
+                    blob = self.objects / state['digest']
+                    if transaction.stage_chunks(path, _blob_chunks(blob)) != state['digest']:
+                        raise RuntimeError(f"backup {state['digest']} of {path} is damaged")
+                else:
+                    transaction.stage_chunks(path, [state['content']])
+                transaction.guard(path, state['read'], _keep_saved)
+                self.journal(path, state['digest'], None, 'bytes')
+            committed = transaction.commit()
+        self.written(committed)
+        for path, reason in transaction.resolved.items():
+            files[path]['undone'] = []
+            files[path]['conflicts'].append((None, None, reason))
+        self.undoes = [run_id for run_id in run_ids
+                       if any(undone[0] == run_id for state in files.values() for undone in state['undone'])]
+        undo_id = self.finish()
+        for run_id in self.undoes:
+            manifest = self.load_run(run_id)
+            manifest['undone_by'] = undo_id
+            self.save_run(manifest)
+        return undo_id, files
+
+
+def changed_spans(edits, data=(), sections=None):
+    """Journal spans [key, start, end, new start, new end, sections] of grid
+    edits (key, start, end, replacement) and data edits (key, start, end,
+    replacement, fields added) planned on one text, in its units. A data
+    edit inside a grid edit (its inline array) is part of the grid's span.
+
+    sections maps a data edit's label (see data_label()) to the sections it
+    goes with, by default the one it was made for; a grid goes with its own.
+    """
+    sections = sections or {}
+    grids = [[key, start, end, len(replacement), [key]] for key, start, end, replacement in edits]
+    changes = list(grids)
+    for key, start, end, replacement, _ in data:
+        host = next((grid for grid in grids if grid[1] <= start and end <= grid[2]), None)
+        if host is None:
+            label = data_label(key)
+            changes.append([label, start, end, len(replacement), sections.get(label, [key])])
+        else:
+            host[3] += len(replacement) - (end - start)
+    spans = []
+    shift = 0
+    for key, start, end, length, keys in sorted(changes, key=lambda change: change[1]):
+        spans.append([key, start, end, start + shift, start + shift + length, keys])
+        shift += length - (end - start)
+    return spans
+
+
+def _kept_with(spans, conflicted):
+    """{key: conflicted keys} of the spans that stay with a span in conflicted:
+    those sharing a section with it, directly or through other spans. The
+    import header span stays with the sections it is tied to, but holds
+    none of them itself (a name left imported breaks nothing)."""
+    # Journals from before sections were recorded tie each span to itself
+    owners = {span[0]: span[5] if len(span) > 5 else [span[0]] for span in spans}
+    kept = {}
+    for key in conflicted:
+        group, queue = {key}, [key]
+        while queue:
+            current = queue.pop()
+            if current == IMPORTS:
+                continue
+            sections = set(owners[current])
+            for other, keys in owners.items():
+                if other not in group and sections.intersection(keys):
+                    group.add(other)
+                    queue.append(other)
+        for other in group - set(conflicted):
+            kept.setdefault(other, []).append(key)
+    return kept
+
+
+def _read_state(path):
+    try:
+        with open(path, 'rb') as f:
+            content = f.read()
+    except FileNotFoundError:
+        return {'read': None, 'digest': None, 'content': None, 'undone': [], 'conflicts': []}
+    digest = hashlib.sha256(content).hexdigest()
+    return {'read': digest, 'digest': digest, 'content': content, 'undone': [], 'conflicts': []}
+
+
+def _blob_chunks(blob):
+    with open(blob, 'rb') as f:
+        while True:
+            chunk = f.read(COPY_CHUNK)
+            if not chunk:
+                return
+            yield chunk
+
+
+def _keep_saved(current):
+    """Guard resolve for undo: a file saved after it was read is not overwritten"""
+    return None, 'saved again during the undo; left as saved'
+
+
+def restore_run(run_id, store=None):
+    """Restore a run and print what was put back; shared by the converter scripts"""
+    store = store or BackupStore()
+    try:
+        restored = store.restore(run_id)
+    except FileNotFoundError:
+        print(f"\n❌ Error: no backup run {run_id}")
+        sys.exit(1)
+    print(f"\n↩️  Restored {len(restored)} file(s) from run {run_id}")
+    for path in restored:
+        print(f"  ✅ {path}")
+    print("")
+
+
+def undo_runs(run_ids=None, last=1, store=None):
+    """Undo run_ids, or the last runs not undone yet, and print what was put
+    back; shared by the converter scripts. Returns the runs undone, the files
+    written and the id of the undo run."""
+    store = store or BackupStore()
+    if run_ids:
+        runs = store.list_runs()
+        unknown = [run_id for run_id in run_ids if run_id not in runs]
+        if unknown:
+            print(f"\n❌ Error: no backup run {', '.join(unknown)}")
+            sys.exit(1)
+        run_ids = sorted(set(run_ids), key=runs.index, reverse=True)
+    else:
+        run_ids = []
+        # Undo runs come after the runs they undo, so walking back meets them first
+        undone = set()
+        for entry in store.recent_runs():
+            if 'undoes' in entry:
+                undone.update(entry['undoes'])
+            elif entry['run_id'] not in undone:
+                run_ids.append(entry['run_id'])
+                if len(run_ids) == last:
+                    break
+        if not run_ids:
+            print("\nNo runs left to undo\n")
+            return {'undone': [], 'written': [], 'run_id': None}
+
+    print(f"\n↩️  Undoing {len(run_ids)} run(s): {', '.join(run_ids)}")
+    try:
+        undo_id, files = store.undo(run_ids)
+    except RuntimeError as e:
+        print(f"❌ Error: {e}; nothing was written\n")
+        sys.exit(1)
+    written = []
+    for path, state in files.items():
+        for run_id, keys in state['undone']:
+            print(f"  ✅ {path}: {'whole file' if keys is None else ', '.join(keys)} (run {run_id})")
+        if state['undone']:
+            written.append(path)
+        for run_id, key, reason in state['conflicts']:
+            what = path if key is None else f"{path}: {key}"
+            print(f"  ⚠️  conflict: {what}{f' (run {run_id})' if run_id else ''}, {reason}")
+    if undo_id:
+        print(f"💾 Undo run: {undo_id} (redo with undo {undo_id})")
+    else:
+        print("Nothing was undone")
+    print("")
+    return {'undone': store.undoes if undo_id else [], 'written': written, 'run_id': undo_id}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List or restore converter backup runs")
+    parser.add_argument('--restore', metavar='RUN_ID', help="restore every file backed up in RUN_ID")
+    parser.add_argument('--undo', nargs='*', metavar='RUN_ID',
+                        help="undo the changes of each RUN_ID (default: the last run not undone yet)")
+    parser.add_argument('--last', type=int, default=1, metavar='N',
+                        help="with --undo and no RUN_ID, undo the last N runs not undone yet")
+    args = parser.parse_args(argv)
+
+    if args.restore:
+        restore_run(args.restore)
+        return
+    if args.undo is not None:
+        return undo_runs(args.undo, args.last)
+
+    store = BackupStore()
+    runs = store.list_runs()
+    if not runs:
+        print("\nNo backup runs yet\n")
+        return
+    print("\n💾 Backup runs:")
+    for run_id in runs:
+        manifest = store.load_run(run_id)
+        state = f"  undone by {manifest['undone_by']}" if 'undone_by' in manifest else ""
+        print(f"  {run_id}  {manifest['script']:<32} {len(manifest['files'])} file(s){state}")
+    print("")
+
+
+if __name__ == "__main__":
+    main()
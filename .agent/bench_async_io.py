@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Async I/O Benchmark
+Time converting a tree on a simulated slow filesystem: file after file, as the
+scripts did, vs. the async pipeline with its reads, backups and writes overlapped
+
+The filesystem shim sleeps before every blocking call the pipeline makes
+(a read, a backup copy, a staged write) to stand in for network round trips;
+conversion itself is real. Every run converts a fresh copy of the same pages,
+and the converted trees must come out identical.
+
+Usage:
+    python .agent/bench_async_io.py [--files 200] [--latency-ms 5] [--io-workers 1 4 16 64]
+"""
+
+import argparse
+import filecmp
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from async_pipeline import FileSystem, Pipeline
+from atomic_io import WriteTransaction
+from backup_store import BackupStore
+from bench_converters import make_case
+from campus_converter.runner import convert_file
+
+
+class DelayedFileSystem(FileSystem):
+    """FileSystem that waits `latency` seconds per round trip before each call"""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def read(self, filepath):
+        time.sleep(self.latency)  # open + read
+        return super().read(filepath)
+
+    def backup(self, store, filepath, digest):
+        time.sleep(2 * self.latency)  # read the original, write the blob
+        super().backup(store, filepath, digest)
+
+    def stage(self, filepath, content):
+        time.sleep(2 * self.latency)  # write + fsync the temp file
+        return super().stage(filepath, content)
+
+
+def make_tree(root, files):
+    """files distinct pages, each with every benchmarked grid"""
+    page, _ = make_case('clean', 200, 1)
+    for i in range(files):
+        path = Path(root) / f'dir{i % 10}' / f'Page{i}.tsx'
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f'// page {i}\n' + page, encoding='utf-8')
+
+
+def convert_serial(paths, fs, store, transaction):
+    """One file at a time: read, convert, back up, stage"""
+    for path in paths:
+        content, _ = fs.read(path)
+        result = convert_file(path, content=content)
+        if result['content'] is not None:
+            fs.backup(store, path, result['original_digest'])
+            transaction.merge(fs.stage(path, result['content']))
+
+
+def measure(source, workdir, name, fs, io_workers):
+    """Convert a copy of source; returns (seconds, converted tree)"""
+    tree = Path(workdir) / name
+    shutil.copytree(source, tree)
+    paths = sorted(str(path) for path in tree.rglob('*.tsx'))
+    store = BackupStore(Path(workdir) / f'{name}-backups')
+    store.begin_run('bench_async_io')
+    transaction = WriteTransaction()
+    start = time.perf_counter()
+    if io_workers is None:
+        convert_serial(paths, fs, store, transaction)
+    else:
+        for _ in Pipeline(convert_file, store, transaction, jobs=1, io_workers=io_workers, fs=fs).run(paths):
+            pass
+    transaction.commit()
+    return time.perf_counter() - start, tree
+
+
+def same_tree(left, right):
+    for path in Path(left).rglob('*.tsx'):
+        if not filecmp.cmp(path, Path(right) / path.relative_to(left), shallow=False):
+            return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the async I/O pipeline on a slow filesystem shim")
+    parser.add_argument('--files', type=int, default=200)
+    parser.add_argument('--latency-ms', type=float, default=5.0, help="simulated round trip per call")
+    parser.add_argument('--io-workers', type=int, nargs='+', default=[1, 4, 16, 64])
+    args = parser.parse_args()
+
+    fs = DelayedFileSystem(args.latency_ms / 1000)
+    print("\n" + "="*70)
+    print(f"🐢  ASYNC I/O BENCHMARK  ({args.files} files, {args.latency_ms:g} ms per round trip)")
+    print("="*70)
+    print(f"  {'mode':<28} {'seconds':>9} {'speedup':>9}   output")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        source = Path(workdir) / 'source'
+        make_tree(source, args.files)
+        serial_time, serial_tree = measure(source, workdir, 'serial', fs, None)
+        print(f"  {'file after file':<28} {serial_time:>9.3f} {1:>8.2f}x   (baseline)")
+        for io_workers in args.io_workers:
+            seconds, tree = measure(source, workdir, f'async-{io_workers}', fs, io_workers)
+            same = "✅ identical" if same_tree(serial_tree, tree) else "❌ differs"
+            print(f"  {f'async, --io-workers {io_workers}':<28} {seconds:>9.3f} "
+                  f"{serial_time / seconds:>8.2f}x   {same}")
+    print("")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Converter Benchmark
+Runs the section converters against synthetic TSX pages and records time,
+peak memory and matches as JSON, so runs can be compared across commits
+
+Pages are built from the registered grids of the four benchmarked sections
+(campus life, services, alumni, campus locations) with filler markup between
+them, at increasing line counts and grid counts. Adversarial cases add
+nested `.map` calls with `})}` in strings and comments, grids missing their
+closing `</div>`, and pages that are already converted.
+
+Usage:
+    python .agent/bench_converters.py [--lines 1000 10000 50000] [--grids 1 10]
+    python .agent/bench_converters.py --output base.json
+    python .agent/bench_converters.py --compare base.json [--threshold 1.25]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from bench_grid_locator import make_page
+from campus_converter.runner import convert_text
+from section_registry import load_registry
+
+RESULTS_DIR = Path(__file__).with_name('bench_results')
+
+# Section key, converter name (as recorded in earlier results, so --compare
+# still pairs them up), and a wrapper returning (new content, matches)
+CONVERTERS = [
+    (key, name, lambda content, key=key: _matches(content, convert_text(content, (key,))[0]))
+    for key, name in (
+        ('campus_life', 'convert_campus_life'),
+        ('services', 'convert_services'),
+        ('alumni', 'convert_alumni_cards'),
+        ('campus_locations', 'convert_aboutuniversity_campus_locations'),
+    )
+]
+
+CARD = '''    {COLLECTION.map((ITEM, index) => {
+        const IconComponent = ITEM.icon;
+        return (
+            <motion.div key={ITEM.title} className="card">
+                <IconComponent className="h-5 w-5" />
+                <h3>{ITEM.title}</h3>
+                <p>{ITEM.desc} - don't count `})}` or "})}"</p>
+NESTED            </motion.div>
+        );
+    })}
+'''
+
+NESTED = '''                <div className="tags">
+                    {ITEM.tags.map((tag) => (
+                        <span key={tag}>{/* })} */}{tag}</span>
+                    ))}
+                </div>
+'''
+
+
+def _matches(before, after):
+    return after, int(after != before)
+
+
+def make_grid(section, nested=False, closed=True, indent=' ' * 10):
+    """The unconverted grid of a registered section"""
+    card = CARD.replace('NESTED', NESTED if nested else '')
+    card = card.replace('COLLECTION', section.collection).replace('ITEM', section.item)
+    lines = [f'<div className="{section.grid}">'] + card.rstrip('\n').split('\n')
+    if closed:
+        lines.append('</div>')
+    return ''.join(indent + line + '\n' for line in lines)
+
+
+def make_case(case, lines, grids):
+    """Build (page, expected matches per section key) for one benchmark case"""
+    registry = load_registry()
+    keys = [key for key, _, _ in CONVERTERS]
+    sections = [registry.sections[key] for key in keys]
+    nested = case == 'nested map'
+    closed = case != "missing </div>"
+    block = ''.join(make_grid(section, nested, closed) for section in sections)
+    page = make_page(lines, block, grids)
+    expected = dict.fromkeys(keys, 0 if case == 'missing </div>' else 1)
+    if case == 'converted':
+        # Each pass converts the first unconverted copy of every section
+        converted = True
+        while converted:
+            page, converted = registry.convert(page, keys)
+        expected = dict.fromkeys(keys, 0)
+    return page, expected
+
+
+def best_of(func, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def peak_memory(func):
+    """Peak bytes allocated by Python while func runs"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(line_counts, grid_counts, cases, repeat):
+    results = []
+    for case in cases:
+        for lines in line_counts:
+            for grids in grid_counts:
+                page, expected = make_case(case, lines, grids)
+                for key, name, func in CONVERTERS:
+                    # The converters print their own status lines; keep the report readable
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        seconds, (_, matches) = best_of(lambda func=func, page=page: func(page), repeat)
+                        peak = peak_memory(lambda func=func, page=page: func(page))
+                    results.append({
+                        'converter': name,
+                        'case': case,
+                        'lines': page.count('\n'),
+                        'grids': grids,
+                        'bytes': len(page.encode('utf-8')),
+                        'seconds': seconds,
+                        'peak_bytes': peak,
+                        'matches': matches,
+                        'expected': expected[key],
+                    })
+                    print_result(results[-1])
+    return results
+
+
+def print_result(result):
+    status = "✅" if result['matches'] == result['expected'] else "❌"
+    print(
+        f"  {result['converter']:<42} {result['case']:<15} {result['lines']:>7} {result['grids']:>5} "
+        f"{result['seconds'] * 1000:>10.3f} {result['peak_bytes'] / 1024:>10.1f}  "
+        f"{status} {result['matches']}/{result['expected']}"
+    )
+
+
+def result_key(result):
+    return result['converter'], result['case'], result['grids'], result['lines']
+
+
+def compare(baseline_path, results, threshold):
+    """Print new vs baseline time per result; return the number of regressions"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {result_key(result): result for result in json.load(f)['results']}
+
+    print(f"\n📊 Compared with {baseline_path} (regression above {threshold:.2f}x)")
+    print(f"  {'converter':<42} {'case':<15} {'lines':>7} {'grids':>5} {'old ms':>10} {'new ms':>10} {'ratio':>7}")
+    regressions = 0
+    for result in results:
+        old = baseline.get(result_key(result))
+        if old is None:
+            continue
+        ratio = result['seconds'] / old['seconds'] if old['seconds'] else 1.0
+        flag = ""
+        if ratio > threshold:
+            flag = "❌ slower"
+            regressions += 1
+        if old['matches'] == old['expected'] and result['matches'] != result['expected']:
+            flag = "❌ wrong result"
+            regressions += 1
+        print(
+            f"  {result['converter']:<42} {result['case']:<15} {result['lines']:>7} {result['grids']:>5} "
+            f"{old['seconds'] * 1000:>10.3f} {result['seconds'] * 1000:>10.3f} {ratio:>6.2f}x {flag}"
+        )
+    return regressions
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the section converters on synthetic pages")
+    parser.add_argument('--lines', type=int, nargs='+', default=[1_000, 10_000, 50_000],
+                        help="approximate page sizes in lines")
+    parser.add_argument('--grids', type=int, nargs='+', default=[1, 10],
+                        help="copies of the four section grids per page")
+    parser.add_argument('--cases', nargs='+', default=['clean', 'nested map', 'missing </div>', 'converted'],
+                        help="which corpora to run")
+    parser.add_argument('--repeat', type=int, default=5, help="timed runs per measurement (best is kept)")
+    parser.add_argument('--output', metavar='FILE',
+                        help="results JSON (default: bench_results/converters-<commit>.json)")
+    parser.add_argument('--compare', metavar='FILE', help="baseline results JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help="slowdown ratio reported as a regression (default: 1.25)")
+    args = parser.parse_args()
+
+    commit = current_commit()
+    print("\n" + "="*100)
+    print(f"⏱️  CONVERTER BENCHMARK  (commit {commit}, best of {args.repeat})")
+    print("="*100)
+    print(f"  {'converter':<42} {'case':<15} {'lines':>7} {'grids':>5} {'ms':>10} {'peak KiB':>10}  matches")
+
+    results = run(args.lines, args.grids, args.cases, args.repeat)
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f'converters-{commit}.json'
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'commit': commit,
+            'python': platform.python_version(),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'repeat': args.repeat,
+            'results': results,
+        }, f, indent=2)
+    print(f"\n💾 Results: {output}")
+
+    failures = sum(result['matches'] != result['expected'] for result in results)
+    if failures:
+        print(f"❌ {failures} measurement(s) matched the wrong number of sections")
+
+    regressions = compare(args.compare, results, args.threshold) if args.compare else 0
+    if regressions:
+        print(f"\n❌ {regressions} regression(s)")
+    print("")
+    if failures or regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
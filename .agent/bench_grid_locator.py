@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Grid Locator Benchmark
+Compares the old lazy-regex grid patterns with the brace-aware JSX scanner
+on synthetic TSX pages of 10k-100k lines
+"""
+
+import re
+import sys
+import time
+
+from jsx_scanner import find_grid, grid_head
+
+OLD_PATTERN = re.compile(
+    r'<div className="grid md:grid-cols-2 lg:grid-cols-4 gap-6">\s*\{campusLife\.map\(\(item, index\)[\s\S]*?\}\)\}\s*</div>'
+)
+NEW_HEAD = re.compile(grid_head('grid md:grid-cols-2 lg:grid-cols-4 gap-6', 'campusLife', 'item'))
+
+FILLER = '''        <section className="py-12">
+          <div className="flex gap-4">
+            {stats.map((stat) => (
+              <p key={stat.label} title="it's a {stat}">{stat.value} - don't count `}})}}`</p>
+            ))}
+          </div>
+        </section>
+'''
+
+GRID = '''          <div className="grid md:grid-cols-2 lg:grid-cols-4 gap-6">
+            {campusLife.map((item, index) => {
+              const IconComponent = item.icon;
+              return (
+                <motion.div key={item.title} className="card">
+                  <IconComponent className="h-5 w-5" />
+                  <div className="tags">
+                    {item.tags.map((tag) => {
+                      return <span key={tag}>{tag}</span>;
+                    })}
+                  </div>
+                  {/* closing braces in comments: })} */}
+                  <p>{item.desc}</p>
+                </motion.div>
+              );
+            })}
+          </div>
+'''
+
+
+# Same grid written with an expression-bodied arrow, so it ends in `))}`
+PAREN_GRID = (
+    GRID.replace('{campusLife.map((item, index) => {', '{campusLife.map((item, index) => (')
+    .replace('              const IconComponent = item.icon;\n              return (\n', '')
+    .replace('              );\n            })}', '            ))}')
+)
+
+# Paren-style grid without the nested map: the regex never finds its `})}` and
+# runs on to the end of the file from every opener
+FLAT_PAREN_GRID = re.sub(r' *<div className="tags">[\s\S]*?</div>\n', '', PAREN_GRID, count=1)
+
+
+def make_page(lines, grid, grids=1):
+    """Build a synthetic page of about `lines` lines with `grids` copies of grid spread evenly"""
+    filler_lines = FILLER.count('\n')
+    blocks = max(grids, lines // filler_lines)
+    step = blocks // grids
+    parts = ['const Page = () => (\n      <div>\n']
+    for _ in range(grids):
+        parts.append(FILLER * (step // 2))
+        parts.append(grid)
+        parts.append(FILLER * (step - step // 2))
+    parts.append('      </div>\n);\n')
+    return ''.join(parts)
+
+
+def best_of(func, repeat=5):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 25_000, 50_000, 100_000]
+    cases = [
+        ('nested map', GRID, 1),
+        ('1 paren grid', PAREN_GRID, 1),
+        ('20 paren grids', PAREN_GRID, 20),
+        ('20 flat grids', FLAT_PAREN_GRID, 20),
+    ]
+
+    print("\n" + "="*86)
+    print("⏱️  GRID LOCATOR BENCHMARK  (best of 5)")
+    print("="*86)
+    print(f"{'lines':>8}  {'case':<15} {'regex ms':>10} {'scanner ms':>11} {'speedup':>8}   regex / scanner result")
+
+    for lines in sizes:
+        for label, grid, grids in cases:
+            page = make_page(lines, grid, grids)
+            expected = len(grid.strip())
+            old_time, old_match = best_of(lambda page=page: OLD_PATTERN.search(page))
+            new_time, new_span = best_of(lambda page=page: find_grid(page, NEW_HEAD))
+            old_result = describe(old_match and old_match.span(), expected)
+            new_result = describe(new_span, expected)
+            print(
+                f"{lines:>8}  {label:<15} {old_time * 1000:>10.3f} {new_time * 1000:>11.3f} "
+                f"{old_time / new_time:>7.1f}x   {old_result} / {new_result}"
+            )
+
+    print("\n")
+
+
+def describe(span, expected):
+    if span is None:
+        return "❌ not found"
+    length = span[1] - span[0]
+    if length == expected:
+        return "✅ exact"
+    return f"❌ {'truncated' if length < expected else 'overran'} ({length - expected:+d} chars)"
+
+
+if __name__ == "__main__":
+    main()
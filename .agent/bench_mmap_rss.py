@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Large File Memory Benchmark
+Peak RSS and time of ultimate_converter --tree on one very large page, read
+into memory vs. memory-mapped with --mmap
+
+Each run converts a fresh copy of a synthetic page (three convertible grids
+on both sides of a long block of filler) in its own process, so the peak RSS
+reported is that run's alone.
+
+Usage:
+    python .agent/bench_mmap_rss.py [SIZE_MB ...]     # default: 10 40 160
+"""
+
+import filecmp
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bench_converters import make_grid
+from section_registry import load_registry
+
+CONVERTER = Path(__file__).with_name('ultimate_converter.py')
+FILLER = '        <p className="text-sm">{stat.value} filler line that is never converted</p>\n'
+
+# Runs the converter in-process, then reports this process's peak RSS in KiB.
+# VmHWM is preferred: Linux carries ru_maxrss over from the parent across
+# fork+exec, so a large benchmark parent would inflate it.
+RUNNER = '''
+import resource, runpy, sys
+sys.argv = sys.argv[1:]
+runpy.run_path(sys.argv[0], run_name="__main__")
+try:
+    with open("/proc/self/status") as f:
+        peak = next(line.split()[1] for line in f if line.startswith("VmHWM:"))
+except (OSError, StopIteration):
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(peak, file=sys.stderr)
+'''
+
+
+def make_page(size_mb):
+    registry = load_registry()
+    grids = ''.join(make_grid(registry.sections[key]) for key in ('services', 'campus_life', 'alumni'))
+    filler = FILLER * (size_mb * 1024 * 1024 // len(FILLER))
+    return f'const Page = () => (\n      <div>\n{grids}{filler}{grids}      </div>\n);\n'
+
+
+def measure(page_path, workdir, mmap_mode):
+    """Convert a copy of page_path in a child process; returns (peak RSS KiB, seconds, output path)"""
+    target = Path(workdir) / ('mmap' if mmap_mode else 'str')
+    shutil.rmtree(target, ignore_errors=True)
+    target.mkdir()
+    shutil.copy(page_path, target / 'Page.tsx')
+    command = [sys.executable, '-c', RUNNER, str(CONVERTER),
+               '--tree', str(target), '--jobs', '1', '--no-cache']
+    if mmap_mode:
+        command.append('--mmap')
+    start = time.perf_counter()
+    process = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    seconds = time.perf_counter() - start
+    if process.returncode:
+        raise RuntimeError(process.stderr)
+    return int(process.stderr.split()[-1]), seconds, target / 'Page.tsx'
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10, 40, 160]
+
+    print("\n" + "="*78)
+    print("🧠  LARGE FILE MEMORY BENCHMARK  (ultimate_converter --tree, one page)")
+    print("="*78)
+    print(f"{'size MB':>8} {'str RSS MB':>11} {'mmap RSS MB':>12} {'str s':>8} {'mmap s':>8}   output")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for size_mb in sizes:
+            page_path = Path(workdir) / 'source.tsx'
+            page_path.write_text(make_page(size_mb), encoding='utf-8')
+            str_rss, str_time, str_output = measure(page_path, workdir, False)
+            mmap_rss, mmap_time, mmap_output = measure(page_path, workdir, True)
+            same = "✅ identical" if filecmp.cmp(str_output, mmap_output, shallow=False) else "❌ differs"
+            print(
+                f"{size_mb:>8} {str_rss / 1024:>11.1f} {mmap_rss / 1024:>12.1f} "
+                f"{str_time:>8.2f} {mmap_time:>8.2f}   {same}"
+            )
+
+    print("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Pattern Benchmark
+Per-file cost of finding every registered grid in 1,000 small component
+files, the typical component-directory workload of --tree
+
+Compares the ways the converters have located grids:
+  re.sub, warm cache   a pattern string per section per call (the original
+                       scripts), each looked up in re's module-level cache
+  re.sub, cold cache   the same once that cache (512 entries) is thrashed by
+                       other patterns, so every call compiles again
+  scan, old head       the registry's compiled scanner as it was, one
+                       alternation with `<div className="` inside every branch
+  scan                 the registry's compiled scanner with the shared prefix
+                       factored out, compiled once when the registry loads
+  plan                 what --tree runs per file: the fingerprint check, then
+                       the scan only where a section is still convertible
+
+Every mode must find the same grids.
+
+Usage:
+    python .agent/bench_patterns.py [--files 1000] [--lines 80] [--every 10]
+"""
+
+import argparse
+import re
+import time
+
+from section_registry import load_registry
+
+FILLER = '''        <div className="flex items-center gap-2 text-sm">
+          <Badge variant="outline">{props.label}</Badge>
+          <span className="text-muted-foreground">{props.count} items</span>
+        </div>
+'''
+
+
+def make_grid(section):
+    if section.collection is None:
+        opener = f'{{[{{ title: "A" }}, {{ title: "B" }}].map(({section.item}, index) => {{'
+    else:
+        opener = f'{{{section.collection}.map(({section.item}, index) => {{'
+    return (
+        f'      <div className="{section.grid}">\n'
+        f'        {opener}\n'
+        f'          return <Card key={{index}}>{{{section.item}.title}}</Card>;\n'
+        f'        }})}}\n'
+        f'      </div>\n'
+    )
+
+
+def make_files(registry, files, lines, every):
+    """files small components; every `every`-th one holds a registered grid"""
+    sections = list(registry.sections.values())
+    body = FILLER * max(1, lines // FILLER.count('\n'))
+    pages = []
+    for i in range(files):
+        grid = make_grid(sections[(i // every) % len(sections)]) if i % every == 0 else ''
+        pages.append(f'export const Component{i} = (props) => (\n    <section>\n{body}{grid}    </section>\n);\n')
+    return pages
+
+
+def lazy_patterns(registry):
+    """Per-section pattern strings in the style of the original scripts"""
+    return {key: section.head + r'\{[\s\S]*?\}\)\}\s*</div>' for key, section in registry.sections.items()}
+
+
+def run_re_sub(pages, patterns, purge):
+    found = []
+    for i, content in enumerate(pages):
+        if purge:
+            re.purge()
+        for key, pattern in patterns.items():
+            hits = []
+            re.sub(pattern, lambda match, hits=hits, key=key: hits.append(key) or match.group(0), content, count=1)
+            found.extend((i, key) for key in hits)
+    return found
+
+
+def run_scan(pages, registry, keys):
+    found = []
+    for i, content in enumerate(pages):
+        found.extend((i, edit[0]) for edit in registry.edits(content, keys))
+    return found
+
+
+def run_plan(pages, registry, keys):
+    found = []
+    for i, content in enumerate(pages):
+        states, edits, _ = registry.plan(content, keys)
+        found.extend((i, edit[0]) for edit in edits)
+    return found
+
+
+def old_scanner(registry, keys):
+    """The scanner as built before the shared prefix was factored out"""
+    return re.compile('|'.join(f'(?P<{key}>{registry.sections[key].head})' for key in keys))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark grid patterns on many small files")
+    parser.add_argument('--files', type=int, default=1000)
+    parser.add_argument('--lines', type=int, default=80, help="lines of filler per file")
+    parser.add_argument('--every', type=int, default=10, help="one file in EVERY holds a grid")
+    args = parser.parse_args()
+
+    registry = load_registry()
+    keys = registry.keys()
+    pages = make_files(registry, args.files, args.lines, args.every)
+    patterns = lazy_patterns(registry)
+
+    # The registry compiled its scanner on load; time compiling it again from scratch
+    del registry.scanners[(keys, False)]
+    re.purge()
+    start = time.perf_counter()
+    scanner = registry.scanner(keys)
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    def with_old_scanner():
+        registry.scanners[(keys, False)] = old_scanner(registry, keys)
+        try:
+            return run_scan(pages, registry, keys)
+        finally:
+            registry.scanners[(keys, False)] = scanner
+
+    modes = [
+        ("re.sub, warm cache", lambda: run_re_sub(pages, patterns, purge=False)),
+        ("re.sub, cold cache", lambda: run_re_sub(pages, patterns, purge=True)),
+        ("scan, old head", with_old_scanner),
+        ("scan", lambda: run_scan(pages, registry, keys)),
+        ("plan", lambda: run_plan(pages, registry, keys)),
+    ]
+
+    print("\n" + "="*70)
+    print(f"🧩  PATTERN BENCHMARK  ({args.files} files of ~{args.lines} lines, "
+          f"{len(keys)} sections, a grid in 1 of {args.every})")
+    print("="*70)
+    print(f"  {'mode':<22} {'total ms':>10} {'µs / file':>10}   grids")
+    expected = None
+    for name, func in modes:
+        func()  # warm up: registry templates, re's cache
+        best = None
+        for _ in range(3):
+            start = time.perf_counter()
+            found = func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        expected = expected if expected is not None else sorted(found)
+        same = "✅" if sorted(found) == expected else "❌ differs"
+        print(f"  {name:<22} {best * 1000:>10.1f} {best / args.files * 1e6:>10.1f}   {len(found)} {same}")
+    print(f"\n  Compiling the registry scanner once: {compile_ms:.2f} ms")
+    print("")
+
+
+if __name__ == "__main__":
+    main()
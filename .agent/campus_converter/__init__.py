@@ -0,0 +1,47 @@
+"""
+Campus Highlights Converter
+Every converter as one importable package with a single command line
+
+Run it as a script, or with .agent on sys.path as a module or a library:
+
+    python .agent/campus_converter convert --tree src
+    python -m campus_converter alumni
+
+    import campus_converter
+    campus_converter.main(['convert', '--tree', 'src', '--jobs', '4'])
+    modified, converted = campus_converter.convert_text(content, ['alumni'])
+
+Names are imported from their submodule on first use (PEP 562), so importing
+the package costs nothing until something is called.
+"""
+
+import importlib
+
+__all__ = ['main', 'parse_args', 'SECTION_SETS', 'run', 'run_pages', 'run_tree',
+           'convert_text', 'convert_file', 'project_root', 'restore_run', 'undo_runs']
+
+_EXPORTS = {
+    'main': 'campus_converter.cli',
+    'parse_args': 'campus_converter.cli',
+    'SECTION_SETS': 'campus_converter.cli',
+    'run': 'campus_converter.runner',
+    'run_pages': 'campus_converter.runner',
+    'run_tree': 'campus_converter.runner',
+    'convert_text': 'campus_converter.runner',
+    'convert_file': 'campus_converter.runner',
+    'project_root': 'section_registry',
+    'restore_run': 'backup_store',
+    'undo_runs': 'backup_store',
+}
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,12 @@
+"""Entry point for `python .agent/campus_converter` and `python -m campus_converter`"""
+
+import os
+import sys
+
+if not __package__:
+    # Run as a directory: import from .agent, as the scripts beside it do
+    sys.path[0] = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+from campus_converter.cli import main
+
+main()
@@ -0,0 +1,194 @@
+"""
+Command line of the converter package: one entry point, a subcommand per job
+
+Usage:
+    python .agent/campus_converter convert                     # every registered section
+    python .agent/campus_converter convert --tree [DIR] [--jobs N] [--speedup] [--async]
+    python .agent/campus_converter convert --since REF [--tree DIR]    # only files changed since REF
+    python .agent/campus_converter convert [--tree [DIR]] --dry-run [--patch FILE]
+    python .agent/campus_converter convert [--tree [DIR]] --watch [--debounce MS] [--poll]
+    python .agent/campus_converter alumni [--no-cache]         # one section set
+    python .agent/campus_converter restore RUN_ID
+    python .agent/campus_converter undo [RUN_ID ...] [--last N]
+    python .agent/campus_converter backups
+    python .agent/campus_converter index [--tree [DIR]] [--section KEY]
+
+Converting a section also adds the fields its new card reads (hoverDesc,
+image, ...) to the objects of its data array, with the defaults in
+templates/sections.json; --no-data skips that. The converted output is
+checked (balanced JSX, every component imported) before it is written;
+--no-verify skips that.
+
+Page paths in templates/sections.json are resolved against --root (default:
+the nearest directory holding package.json), so the commands work from any
+directory. Only argparse is imported up front; each command imports what it
+runs when it runs.
+"""
+
+import argparse
+import os
+import sys
+
+# Subcommands converting one set of sections on the configured pages; they
+# replace convert_to_campus_highlights.py, convert_all_sections.py and convert_alumni.py
+SECTION_SETS = {
+    'programs': ('programs',),
+    'campus-locations': ('campus_locations',),
+    'alumni': ('alumni',),
+}
+
+
+def add_conversion_options(parser):
+    """Options every converting subcommand takes"""
+    parser.add_argument('--root', metavar='DIR',
+                        help="site root the configured page paths are relative to "
+                             "(default: nearest directory holding package.json)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="ignore the cache and reprocess every file")
+    parser.add_argument('--restore', metavar='RUN_ID',
+                        help="put back the files backed up in RUN_ID and exit")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="print a unified diff of the changes instead of writing them")
+    parser.add_argument('--patch', metavar='FILE',
+                        help="with --dry-run, write the diff to FILE instead of stdout")
+    parser.add_argument('--mmap', action='store_true',
+                        help="memory-map each file and stream the output instead of reading it into memory "
+                             "(the data arrays are not migrated)")
+    parser.add_argument('--no-data', action='store_true',
+                        help="only rewrite the grids; leave the data arrays without the fields the new cards read")
+    parser.add_argument('--no-verify', action='store_true',
+                        help="write the output without checking that its JSX balances and its components are imported")
+    parser.add_argument('--watch', action='store_true',
+                        help="convert once, then reconvert each page as it is saved until Ctrl-C")
+    parser.add_argument('--debounce', type=float, metavar='MS',
+                        help="with --watch, wait for MS ms without saves before converting (default: 40)")
+    parser.add_argument('--poll', action='store_true',
+                        help="with --watch, poll file stats instead of using inotify")
+    parser.add_argument('--report', nargs='?', const=True, metavar='FILE',
+                        help="write a Markdown report of every section's outcome "
+                             "(default FILE: .agent/reports/conversion-<time>.md)")
+    parser.add_argument('--profile', action='store_true',
+                        help="run under cProfile and tracemalloc and print a sorted report to stderr "
+                             "(--tree workers are not profiled)")
+    parser.add_argument('--stats-json', metavar='FILE',
+                        help="write per-phase timings, byte counts and match counts to FILE as JSON")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='campus_converter', description="Convert card grids to the Campus Highlights pattern")
+    commands = parser.add_subparsers(dest='command', metavar='COMMAND', required=True)
+
+    convert = commands.add_parser('convert', help="convert every registered section (or --section KEY)")
+    convert.add_argument('--tree', nargs='?', const=True, metavar='DIR',
+                         help="convert every .tsx file under DIR (default: src under --root)")
+    convert.add_argument('--since', metavar='REF',
+                         help="tree mode on just the .tsx files under src/pages and src/components "
+                              "(or --tree DIR) that differ from git REF or are untracked; "
+                              "pass $(git merge-base origin/main HEAD) for a branch's changes")
+    convert.add_argument('--section', metavar='KEY', action='append', dest='sections',
+                         help="only convert the registered section KEY on its page (repeatable)")
+    convert.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                         help="worker processes for --tree (default: CPU count)")
+    convert.add_argument('--speedup', action='store_true',
+                         help="also time a --jobs 1 pass and report the speedup")
+    convert.add_argument('--async', dest='use_async', action='store_true',
+                         help="with --tree, overlap reads, backups and writes on a thread pool "
+                              "(for slow or network filesystems)")
+    convert.add_argument('--io-workers', type=int, metavar='N',
+                         help="threads for blocking I/O with --async (default: 16)")
+    add_conversion_options(convert)
+
+    for name, keys in SECTION_SETS.items():
+        section_set = commands.add_parser(name, help=f"convert {', '.join(keys)} on its page")
+        section_set.set_defaults(sections=list(keys), tree=None, since=None, jobs=1, speedup=False,
+                                 use_async=False, io_workers=None)
+        add_conversion_options(section_set)
+
+    restore = commands.add_parser('restore', help="put back the files backed up in a run")
+    restore.add_argument('run_id', metavar='RUN_ID')
+    undo = commands.add_parser('undo', help="undo the changes of runs, keeping edits made since")
+    undo.add_argument('run_ids', nargs='*', metavar='RUN_ID',
+                      help="runs to undo (default: the last run not undone yet)")
+    undo.add_argument('--last', type=int, default=1, metavar='N',
+                      help="without RUN_ID, undo the last N runs not undone yet")
+    commands.add_parser('backups', help="list backup runs")
+    commands.add_parser('index', help="index the card grids of every page (options: see section_index.py)")
+    return parser
+
+
+def parse_args(argv=None):
+    """Parse argv (default: sys.argv[1:]); conversion commands get their
+    paths resolved and the command line recorded for reports"""
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv[:1] == ['index']:
+        # section_index.py parses its own options
+        return argparse.Namespace(command='index', index_args=argv[1:])
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    args.command_line = ' '.join(['campus_converter'] + argv)
+    if not hasattr(args, 'no_cache'):
+        return args
+    if args.patch and not args.dry_run:
+        parser.error("--patch requires --dry-run")
+    if args.watch and args.dry_run:
+        parser.error("--watch cannot be combined with --dry-run")
+    if args.use_async and (not args.tree or args.mmap or args.speedup or args.dry_run or args.watch):
+        parser.error("--async needs --tree and cannot be combined with --mmap, --speedup, --dry-run or --watch")
+    if args.report and (args.watch or args.dry_run):
+        parser.error("--report cannot be combined with --watch or --dry-run")
+    if args.sections and args.tree:
+        parser.error("--section cannot be combined with --tree")
+    if args.since and (args.sections or args.watch):
+        parser.error("--since cannot be combined with --section or --watch")
+
+    from section_registry import load_registry, project_root
+    if args.sections:
+        unknown = [key for key in args.sections if key not in load_registry().sections]
+        if unknown:
+            parser.error(f"unknown section(s): {', '.join(unknown)}")
+    args.root = os.path.abspath(args.root) if args.root else str(project_root())
+    # Directories --since looks in: DIR when given, else SINCE_DIRS under the root
+    args.since_dirs = None
+    if args.since:
+        if args.tree and args.tree is not True:
+            args.since_dirs = [os.path.abspath(args.tree)]
+        else:
+            args.tree = True
+    if args.tree is True:
+        args.tree = os.path.relpath(os.path.join(args.root, 'src'))
+    args.script = f'campus_converter {args.command}'
+    return args
+
+
+def main(argv=None):
+    """Run one command; returns what the command returns (see runner.run_pages and runner.run_tree)"""
+    args = parse_args(argv)
+    if args.command == 'index':
+        import section_index
+        return section_index.main(args.index_args)
+    if args.command == 'backups':
+        import backup_store
+        return backup_store.main([])
+    if args.command == 'undo':
+        from backup_store import undo_runs
+        return undo_runs(args.run_ids, args.last)
+    restore = args.run_id if args.command == 'restore' else args.restore
+    if restore:
+        from backup_store import restore_run
+        return restore_run(restore)
+
+    from campus_converter import runner
+    from instrumentation import STATS
+    try:
+        if args.profile:
+            from instrumentation import profile_call
+            return profile_call(runner.run, args)
+        return runner.run(args)
+    finally:
+        if args.stats_json:
+            STATS.write_json(args.stats_json, mode='tree' if args.tree else 'pages', watch=args.watch,
+                             dry_run=args.dry_run, jobs=args.jobs if args.tree else 1)
+            print(f"📈 Stats written to {args.stats_json}", file=sys.stderr)
+        if args.profile:
+            STATS.print_summary(sys.stderr)
@@ -0,0 +1,1024 @@
+"""
+Converter runs: the configured pages, a whole tree, a dry run or a watch loop
+(formerly ultimate_converter.py; see cli.py for the command line)
+
+Only what every run needs is imported here. The process pool, the async
+pipeline, the diff writer, the file watcher and the profiler are imported by
+the code paths that use them, so a single-page run starts quickly.
+"""
+
+import contextlib
+import functools
+import hashlib
+import itertools
+import sys
+import os
+import time
+from pathlib import Path
+
+from atomic_io import WriteTransaction
+from backup_store import BackupStore, changed_spans
+from conversion_report import (
+    CONVERTED_NOW, OUTCOMES, STATUS, ConversionReport, default_report_path, section_results, settle,
+)
+from convert_cache import ConversionCache, content_digest, templates_digest
+from data_migration import data_label, fields_added, merge_edits
+from fingerprint import ABSENT, CONVERTED, CONVERTIBLE
+from git_changes import SINCE_DIRS, changed_tsx
+from import_fixer import IMPORTS, import_names, imports_added
+from instrumentation import STATS
+from mapped_io import Sweep, imports_mapped, mapped, mapped_digest, plan_mapped, stream_edits
+from output_validator import ValidationError, VerifyCache, validate
+from section_index import SectionIndex
+from section_registry import REGISTRY_PATH, load_registry, reload_registry
+
+def read_file(filepath):
+    """The file's text with its line endings as they are on disk, so it hashes like its bytes"""
+    with STATS.phase('read'), open(filepath, 'r', encoding='utf-8', newline='') as f:
+        STATS.add('bytes_read', os.fstat(f.fileno()).st_size)
+        STATS.add('files_read')
+        return f.read()
+
+def convert_text(content, section_keys=None):
+    """Rewrite the listed sections (default: every registered one) in a single pass.
+
+    Returns (new content, keys converted); see Registry.convert.
+    """
+    registry = load_registry()
+    return registry.convert(content, section_keys or registry.keys())
+
+def print_outcomes(outcome_counts):
+    """One-line summary of what happened to every section checked"""
+    print("📊 Sections: " + ", ".join(f"{outcome_counts[outcome]} {outcome}" for outcome in OUTCOMES))
+
+def converted_keys(sections):
+    return [result['key'] for result in sections if result['outcome'] == CONVERTED_NOW]
+
+def guard_changes(transaction, store, filepath, digest, after, edits, data=(), verify=True):
+    """Have the commit check that filepath still hashes to digest, the hash it
+    was read with. If it was saved again since, edits and data edits (planned
+    on the old text) are merged onto the new text, and validated there with
+    verify; see rebase_saved(). The staged output, hashing to after, is
+    journaled with the spans the edits change, for undo."""
+    changes = edits or data
+    unit = 'bytes' if changes and isinstance(changes[0][3], bytes) else 'chars'
+    store.journal(filepath, after, changed_spans(edits, data, undo_sections(edits, data)), unit)
+    transaction.guard(filepath, digest,
+                      functools.partial(rebase_saved, store, filepath, digest, edits, data, verify))
+
+def undo_sections(edits, data):
+    """{data label: sections} for changed_spans(): an array goes with every
+    section converted now that maps it, so undo puts them back together, and
+    the import header edit with those using a name it imports, so it is not
+    undone while one of them stays"""
+    registry = load_registry()
+    converting = list(dict.fromkeys(edit[0] for edit in edits))
+    sections = {}
+    for key, _, _, replacement, _ in data:
+        if key == IMPORTS:
+            names = import_names(_text(replacement))
+            sections[IMPORTS] = [other for other in converting if names.intersection(registry.names(other))]
+            continue
+        collection = registry.sections[key].collection if key in registry.sections else None
+        if collection is not None:
+            sections[data_label(key)] = list(dict.fromkeys(
+                [key] + [other for other in converting if registry.sections[other].collection == collection]))
+    return sections
+
+def rebase_saved(store, filepath, digest, edits, data, verify, current):
+    """Commit-time resolve callback of guard_changes(): the three-way merge of
+    the text read (from the backup taken of it), the edits and the current
+    bytes. Returns (merged content or None, (keys applied, [(key, reason)],
+    {grid key: [first line, last line] in the merged text})).
+    A grid and its data and import edits go together: a grid that conflicts
+    takes the data edit of its array and the imports only it uses with it,
+    and the rest are merged again (see grouped_changes()). With verify the
+    merged text is validated (see output_validator.py); an edit that fails
+    there, such as a grid whose import edit conflicted, is left out the same
+    way. The current text is backed up too before it is replaced, so
+    --restore puts back what the editor saved, and the journal gets the one
+    region the merge changed in it."""
+    from three_way_merge import common_prefix, common_suffix, rebase
+    keys = list(dict.fromkeys(edit[0] for edit in edits))
+    keys += [data_label(edit[0]) for edit in data]
+    if current is None:
+        return None, ([], [(key, 'file deleted since it was read') for key in keys], {})
+    base = store.read(digest)
+    if base is None:
+        return None, ([], [(key, 'text it was converted from is not backed up') for key in keys], {})
+    current_digest = hashlib.sha256(current).hexdigest()
+    if not isinstance((edits or data)[0][3], bytes):
+        base, current = base.decode('utf-8'), current.decode('utf-8')
+    sections = undo_sections(edits, data)
+    # Edits left out, with why; a round leaves out more until none fails
+    left = {}
+    while True:
+        changes, dropped = grouped_changes(base, edits, data, sections, left)
+        merged, applied, conflicts = rebase(base, current, changes)
+        failed = {key: reason for key, reason in conflicts if key not in left}
+        if merged is not None and verify and not failed:
+            with STATS.phase('verify'):
+                problems = validate(merged, [(key, _text(base[start:end]), _text(replacement))
+                                             for key, start, end, replacement in changes if key in applied])
+            STATS.add('outputs_verified')
+            failed = {key: f'not valid on the saved text ({message})' for key, message in problems}
+        if not failed:
+            break
+        left.update(failed)
+    conflicts = list(left.items()) + conflicts + dropped
+    lines = {}
+    if merged is not None:
+        with STATS.phase('backup'):
+            store.add(filepath, current_digest)
+        prefix = common_prefix(current, merged)
+        suffix = common_suffix(current, merged, min(len(current), len(merged)) - prefix)
+        binary = isinstance(merged, bytes)
+        store.journal(filepath, hashlib.sha256(merged if binary else merged.encode('utf-8')).hexdigest(),
+                      [[', '.join(dict.fromkeys(applied)), prefix, len(current) - suffix, prefix, len(merged) - suffix,
+                        [key for key in dict.fromkeys(applied) if any(edit[0] == key for edit in edits)]]],
+                      'bytes' if binary else 'chars')
+        # Where each grid ended up: its replacement, found in file order
+        newline = b'\n' if binary else '\n'
+        grids = {edit[0] for edit in edits}
+        last = 0
+        for key, _, _, replacement in changes:
+            found = merged.find(replacement, last) if key in grids and key in applied else -1
+            if found != -1:
+                first = merged.count(newline, 0, found) + 1
+                lines[key] = [first, first + replacement.count(newline)]
+                last = found + len(replacement)
+    return merged, (list(dict.fromkeys(applied)), list(dict(conflicts).items()), lines)
+
+def grouped_changes(base, edits, data, sections, left):
+    """The edits and data edits of a page, as one list for rebase() with data
+    edits under their data_label(), without those in left and what goes with
+    them: the data edit of an array whose grids converting now are all left
+    out, and the names of the import edit only those grids use (the edit is
+    rebuilt on base without them). sections is undo_sections(edits, data).
+    Returns (changes, [(key, reason)] for the edits dropped with a grid)."""
+    registry = load_registry()
+    kept = [edit for edit in edits if edit[0] not in left]
+    staying = {edit[0] for edit in kept}
+    gone = list(dict.fromkeys(edit[0] for edit in edits if edit[0] in left))
+    converting = {edit[0] for edit in edits}
+    moved = []
+    dropped = []
+    for key, start, end, replacement, added in data:
+        label = data_label(key)
+        if label in left:
+            continue
+        if key == IMPORTS and gone:
+            used = {name for other in staying for name in registry.names(other)}
+            unused = {name for other in gone for name in registry.names(other)} - used
+            names = import_names(_text(replacement)) - import_names(_text(base[start:end]))
+            if unused & names:
+                rebuilt = registry.import_data(base, [name for name in names if name not in unused])
+                if not rebuilt:
+                    dropped.append((label, f"goes with {', '.join(gone)}, left as saved"))
+                    continue
+                _, start, end, replacement, added = rebuilt[0]
+        elif key != IMPORTS:
+            grids = [other for other in sections.get(label, [key]) if other in converting]
+            if grids and not staying.intersection(grids):
+                dropped.append((label, f"goes with {', '.join(grids)}, left as saved"))
+                continue
+        moved.append((label, start, end, replacement, added))
+    return (merge_edits(base, kept, moved) if moved else kept), dropped
+
+def settle_outcomes(transaction, filepath, sections):
+    """sections of filepath, with what a commit-time merge left as saved marked so (see settle())"""
+    if filepath in transaction.resolved:
+        settle(sections, *transaction.resolved[filepath])
+    return sections
+
+def print_resolved(transaction, report=None):
+    """Report each staged file that was saved again before commit, section by section"""
+    for filepath, (applied, conflicts, _) in transaction.resolved.items():
+        STATS.add('files_merged' if applied else 'files_left_as_saved')
+        STATS.add('merge_conflicts', len(conflicts))
+        if applied:
+            print(f"  🔀 {filepath} changed after it was read; re-applied {', '.join(applied)} to the saved text")
+        else:
+            print(f"  🔀 {filepath} changed after it was read; left as saved")
+        for key, reason in conflicts:
+            print(f"     ⚠️  conflict: {key} ({reason})")
+        if report:
+            report.resolved(filepath, applied, conflicts)
+
+def verify_output(verified, digest, content, edits, data=(), sweep=None):
+    """Validate the spans a conversion rewrote (see output_validator.py).
+
+    content is the text the edits apply to, walked with sweep if a mapping;
+    verified is a VerifyCache, and output whose digest it holds is not
+    checked again. Raises ValidationError; returns True if the output was
+    checked now.
+    """
+    if verified is not None and digest in verified:
+        return False
+    with STATS.phase('verify'):
+        fragments = [(key, _text(content[start:end]), _text(replacement))
+                     for key, start, end, replacement in edits]
+        fragments += [(data_label(key), _text(content[start:end]), _text(replacement))
+                      for key, start, end, replacement, _ in data]
+        problems = validate(content, fragments, sweep)
+    if sweep:
+        sweep.finish()
+    STATS.add('outputs_verified')
+    if problems:
+        raise ValidationError(problems)
+    if verified is not None:
+        verified.add(digest)
+    return True
+
+def _text(value):
+    return value if isinstance(value, str) else bytes(value).decode('utf-8')
+
+@functools.lru_cache(maxsize=None)
+def worker_verify_cache():
+    """The outputs verified by earlier runs, loaded once per worker process (read only)"""
+    return VerifyCache()
+
+def convert_page(registry, filepath, section_keys, cache, store, transaction, index=None, data=True,
+                 verified=None):
+    """Convert one configured page held as a str and stage it if it changed.
+
+    With a SectionIndex the sections are looked up in the page's index
+    entries, which are only rebuilt if the content hash changed. With data
+    the arrays of the converted sections get their missing fields (see
+    Registry.migrate) in the same pass, as do the imports the converted
+    sections need (see Registry.fix_imports). Returns (section results,
+    digest after conversion, imports added), see section_results(), or
+    None when the cache shows the content is unchanged since the last run.
+    With verified (a VerifyCache) the output is validated before it is
+    staged; the staged output is guarded (see guard_changes()).
+    """
+    content = read_file(filepath)
+    with STATS.phase('hash'):
+        digest = content_digest(content)
+    if cache and cache.matches(filepath, digest):
+        cache.record(filepath, digest)
+        return None
+    entries = index.sections(filepath, content, digest) if index else None
+    states, edits, seconds = registry.plan(content, section_keys, entries)
+    migrated = registry.migrate(content, section_keys, states, edits, entries) if data else []
+    migrated += registry.fix_imports(content, section_keys, states, edits)
+    sections = section_results(registry, section_keys, states, edits, seconds, content, entries, migrated)
+    if not edits and not migrated:
+        return sections, digest, 0
+    modified, _ = registry.apply(content, edits, migrated)
+    with STATS.phase('hash'):
+        new_digest = content_digest(modified)
+    if verified is not None:
+        verify_output(verified, new_digest, content, edits, migrated)
+    with STATS.phase('backup'):
+        store.add(filepath, digest)
+    transaction.stage(filepath, modified)
+    guard_changes(transaction, store, filepath, digest, new_digest, edits, migrated, verified is not None)
+    return sections, new_digest, imports_added(migrated)
+
+def convert_page_mapped(registry, filepath, section_keys, cache, store, transaction, verified=None):
+    """convert_page for --mmap: the page is mapped and its output streamed to the temp file,
+    which is validated once its digest is known. The imports the converted
+    sections need are added from the decoded header (see imports_mapped());
+    the data migration needs the page as a str and does not run here."""
+    with mapped(filepath) as mm:
+        digest = mapped_digest(mm)
+        if cache and cache.matches(filepath, digest):
+            cache.record(filepath, digest)
+            return None
+        states, edits, seconds = plan_mapped(registry, mm, section_keys)
+        imports = imports_mapped(registry, mm, section_keys, states, edits)
+        sections = section_results(registry, section_keys, states, edits, seconds, mm)
+        if not edits and not imports:
+            return sections, digest, 0
+        with STATS.phase('backup'):
+            store.add(filepath, digest)
+        new_digest = transaction.stage_chunks(filepath, stream_edits(mm, merge_edits(mm, edits, imports)))
+        if verified is not None:
+            verify_output(verified, new_digest, mm, edits, imports, Sweep(mm))
+    guard_changes(transaction, store, filepath, digest, new_digest, edits, imports, verified is not None)
+    return sections, new_digest, imports_added(imports)
+
+def record_writes(transaction, committed):
+    """Fold a committed transaction's timers and byte count into STATS"""
+    STATS.add_time('stage', transaction.stage_seconds)
+    STATS.add_time('commit', transaction.commit_seconds)
+    STATS.add('bytes_written', transaction.bytes_written)
+    STATS.add('files_written', len(committed))
+
+def discover_tsx(root):
+    """All .tsx files under root, sorted so results always merge in the same order"""
+    return sorted(str(path) for path in Path(root).rglob('*.tsx'))
+
+def changed_files(args):
+    """The .tsx files --since selects (see git_changes.py); exits if git fails"""
+    try:
+        found = changed_tsx(args.since, args.root, args.since_dirs or SINCE_DIRS)
+    except RuntimeError as e:
+        print(f"❌ Error: --since {args.since}: {e}")
+        sys.exit(1)
+    print(f"🔀 {len(found)} .tsx file(s) changed since {args.since}")
+    return found
+
+def failed_result(filepath, error, stats=None):
+    """The convert_file() result of a file that could not be read or converted"""
+    return {'path': filepath, 'converted': [], 'fields_added': 0, 'imports_added': 0, 'content': None,
+            'edits': [], 'data': [], 'sections': [], 'original_digest': None, 'digest': None,
+            'verified': None, 'error': error, 'stats': stats}
+
+def convert_file(filepath, use_mmap=False, content=None, data=True, verify=True):
+    """Convert every known section in one file. Runs inside a worker process.
+
+    Returns a picklable result; new content is only sent back when something
+    changed, so unchanged files cost no IPC beyond the path, and then with
+    the edits, for the parent to merge should the file be saved again before
+    commit. With use_mmap only the edits and the import header edit come
+    back, and the parent streams them into the file (without the data
+    migration). Pass content when the
+    caller has read the file already (async_pipeline). With verify the
+    output is validated here, in the worker; 'verified' is its digest if it
+    was checked now, for the parent to remember.
+    """
+    if use_mmap:
+        return convert_file_mapped(filepath)
+    registry = load_registry()
+    with STATS.collect() as stats:
+        try:
+            if content is None:
+                content = read_file(filepath)
+            states, edits, seconds = registry.plan(content, registry.keys())
+            migrated = registry.migrate(content, registry.keys(), states, edits) if data else []
+            migrated += registry.fix_imports(content, registry.keys(), states, edits)
+            sections = section_results(registry, registry.keys(), states, edits, seconds, content, data=migrated)
+            modified, converted = registry.apply(content, edits, migrated)
+            changed = modified is not content
+            with STATS.phase('hash'):
+                original_digest = content_digest(content)
+                digest = content_digest(modified) if changed else original_digest
+            checked = verify and changed and verify_output(worker_verify_cache(), digest, content, edits, migrated)
+        except Exception as e:
+            error = str(e)
+        else:
+            error = None
+    if error:
+        return failed_result(filepath, error, stats)
+    return {
+        'path': filepath,
+        'converted': converted,
+        'fields_added': fields_added(migrated),
+        'imports_added': imports_added(migrated),
+        'content': modified if changed else None,
+        'edits': edits if changed else [],
+        'data': migrated,
+        'sections': sections,
+        'original_digest': original_digest,
+        'digest': digest,
+        'verified': digest if checked else None,
+        'error': None,
+        'stats': stats,
+    }
+
+def convert_file_mapped(filepath):
+    """convert_file for --mmap: the file is mapped, never read into a str; the
+    edits and the import header edit come back, without the data migration"""
+    registry = load_registry()
+    with STATS.collect() as stats:
+        try:
+            with mapped(filepath) as mm:
+                original_digest = mapped_digest(mm)
+                states, edits, seconds = plan_mapped(registry, mm, registry.keys())
+                imports = imports_mapped(registry, mm, registry.keys(), states, edits)
+                sections = section_results(registry, registry.keys(), states, edits, seconds, mm)
+        except Exception as e:
+            return failed_result(filepath, str(e), stats)
+    return {
+        'path': filepath,
+        'converted': [edit[0] for edit in edits],
+        'fields_added': 0,
+        'imports_added': imports_added(imports),
+        'edits': edits,
+        'data': imports,
+        'sections': sections,
+        'original_digest': original_digest,
+        'digest': original_digest,
+        'verified': None,
+        'error': None,
+        'stats': stats,
+    }
+
+def stage_mapped(transaction, store, filepath, edits, original_digest, verified=None, data=()):
+    """Back up filepath and stream its edits and data edits (the import header
+    edit) into the transaction; returns the new digest.
+
+    The file is mapped again here, so it must still hash to original_digest.
+    With verified (a VerifyCache) the output is validated here, in the parent,
+    once its digest is known.
+    """
+    with mapped(filepath) as mm:
+        if mapped_digest(mm) != original_digest:
+            raise RuntimeError(f"{filepath} changed while it was being converted")
+        with STATS.phase('backup'):
+            store.add(filepath, original_digest)
+        digest = transaction.stage_chunks(filepath, stream_edits(mm, merge_edits(mm, edits, data)))
+        if verified is not None:
+            verify_output(verified, digest, mm, edits, data, Sweep(mm))
+    guard_changes(transaction, store, filepath, original_digest, digest, edits, data, verified is not None)
+    return digest
+
+def convert_files(paths, jobs, use_mmap=False, data=True, verify=True):
+    """Convert paths across a process pool, yielding each result in input
+    order as it arrives, so the caller can stage it and drop its text
+    instead of holding every converted file at once. Only jobs * 2 files are
+    submitted at a time: a file is handed out as an earlier one finishes."""
+    convert = functools.partial(convert_file, use_mmap=use_mmap, data=data, verify=verify)
+    if jobs == 1 or len(paths) < 2:
+        yield from map(convert, paths)
+        return
+    import collections
+    from concurrent.futures import ProcessPoolExecutor
+    paths = iter(paths)
+    window = collections.deque()
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        while True:
+            # Finished results held back for input order count toward the window too
+            window.extend(pool.submit(convert, path) for path in itertools.islice(paths, jobs * 2 - len(window)))
+            if not window:
+                return
+            yield window.popleft().result()
+
+def waited(results, clock):
+    """Yield from results, adding the seconds spent waiting for each one to clock['seconds']"""
+    results = iter(results)
+    while True:
+        start = time.perf_counter()
+        result = next(results, None)
+        clock['seconds'] += time.perf_counter() - start
+        if result is None:
+            return
+        yield result
+
+def preview_file(item, index=None, data=True, verify=True):
+    """Diff for one (filepath, section keys) item without converting the whole file.
+    Runs inside a worker process; only the diff text comes back. With a
+    SectionIndex (serial runs only) the grids are looked up in it; with data
+    the diff includes the data migration; with verify the change is
+    validated (uncached: the output is never assembled).
+    """
+    from diff_preview import file_diff
+    filepath, section_keys = item
+    registry = load_registry()
+    with STATS.collect() as stats:
+        try:
+            content = read_file(filepath)
+            entries = index.sections(filepath, content) if index else None
+            if index:
+                states = registry.classify_indexed(entries, section_keys)
+            else:
+                states = registry.classify(content, section_keys)
+            pending = [key for key in section_keys if states[key] == CONVERTIBLE]
+            with STATS.phase('convert'):
+                if not pending:
+                    edits = []
+                elif index:
+                    edits = list(registry.indexed_edits(content, entries, pending))
+                else:
+                    edits = list(registry.edits(content, pending))
+            migrated = registry.migrate(content, section_keys, states, edits, entries) if data else []
+            migrated += registry.fix_imports(content, section_keys, states, edits)
+            if verify and (edits or migrated):
+                verify_output(None, None, content, edits, migrated)
+            with STATS.phase('diff'):
+                changes = merge_edits(content, edits, migrated) if migrated else edits
+                diff = file_diff(filepath, content, [edit[1:] for edit in changes])
+        except Exception as e:
+            error = str(e)
+        else:
+            error = None
+    if error:
+        return {'path': filepath, 'converted': [], 'fields_added': 0, 'imports_added': 0, 'states': {},
+                'diff': '', 'error': error, 'stats': stats}
+    return {'path': filepath, 'converted': [edit[0] for edit in edits],
+            'fields_added': fields_added(migrated), 'imports_added': imports_added(migrated),
+            'states': states, 'diff': diff, 'error': None, 'stats': stats}
+
+def preview_files(items, jobs, index=None, data=True, verify=True):
+    """Yield preview results in input order as soon as each one is ready"""
+    if jobs == 1 or len(items) < 2:
+        yield from map(functools.partial(preview_file, index=index, data=data, verify=verify), items)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    chunksize = max(1, len(items) // (jobs * 16))
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        yield from pool.map(functools.partial(preview_file, data=data, verify=verify), items, chunksize=chunksize)
+
+def describe(converted, fields_added, imports=0):
+    """Status text for a file's converted keys, data fields and imports added"""
+    parts = [', '.join(converted)] if converted else []
+    if fields_added:
+        parts.append(f"{fields_added} data field(s) added")
+    if imports:
+        parts.append(f"{imports} import(s) added")
+    return '; '.join(parts)
+
+def run_dry(items, jobs, patch=None, cache=None, index=None, data=True, verify=True):
+    """Stream the unified diff of every pending change; nothing is written, backed up or cached.
+
+    The diff goes to stdout (or the patch file) and the status lines to
+    stderr, so `--dry-run > changes.patch` gives a clean patch.
+    """
+    pending = [item for item in items if os.path.exists(item[0]) and not (cache and cache.is_fresh(item[0]))]
+    print(f"🔍 Dry run: {len(pending)} file(s) to check, {len(items) - len(pending)} skipped", file=sys.stderr)
+    out = open(patch, 'w', encoding='utf-8') if patch else sys.stdout
+    total_converted = 0
+    total_fields = 0
+    state_counts = dict.fromkeys((CONVERTED, CONVERTIBLE, ABSENT), 0)
+    changed_files = 0
+    failed = 0
+    try:
+        for result in preview_files(pending, jobs, index, data, verify):
+            STATS.merge(result['stats'])
+            for state in result['states'].values():
+                state_counts[state] += 1
+            if result['error']:
+                failed += 1
+                print(f"  ❌ {result['path']}: {result['error']}", file=sys.stderr)
+                continue
+            if result['diff']:
+                STATS.add('bytes_written', len(result['diff'].encode('utf-8')))
+                out.write(result['diff'])
+                out.flush()
+                changed_files += 1
+                total_converted += len(result['converted'])
+                total_fields += result['fields_added']
+                print(f"  📝 {result['path']}: {describe(result['converted'], result['fields_added'], result['imports_added'])}",
+                      file=sys.stderr)
+    finally:
+        if patch:
+            out.close()
+        if index:
+            index.save()
+    print(f"✨ Dry run: {total_converted} section(s) and {total_fields} data field(s) would change "
+          f"in {changed_files} file(s)" + (f", written to {patch}" if patch else ""), file=sys.stderr)
+    print(f"📊 Sections: {state_counts[CONVERTIBLE]} convertible, "
+          f"{state_counts[CONVERTED]} already converted, {state_counts[ABSENT]} absent", file=sys.stderr)
+    if failed:
+        print(f"❌ {failed} file(s) failed to convert", file=sys.stderr)
+        sys.exit(1)
+
+def run_tree(root, jobs, speedup=False, cache=None, use_mmap=False, report=None, io_workers=None,
+             script='campus_converter convert', data=True, verified=None, files=None):
+    """Convert every .tsx file under root in parallel and print one merged summary.
+
+    Each file is staged as its result arrives, in input order. With a
+    ConversionReport, each file's results are written to it once it is
+    known what was written (after commit for staged files). With io_workers the files go through the async pipeline,
+    which overlaps their reads, backups and staged writes on that many threads.
+    data=False leaves the data arrays alone (see Registry.migrate). With verified
+    (a VerifyCache) every output is validated before it is staged, in the
+    workers, and the digests that pass are added to it. files, if given, are
+    converted instead of every file under root (see changed_files).
+    Returns the number of sections converted, the files written and the backup run id.
+    """
+    print("\n" + "="*70)
+    print(f"🌳  TREE MODE: {root} ({jobs} worker(s))")
+    print("="*70)
+    
+    found = discover_tsx(root) if files is None else files
+    paths = [path for path in found if not (cache and cache.is_fresh(path))]
+    changed = '' if files is None else 'changed '
+    print(f"\n🔍 Found {len(found)} {changed}.tsx file(s), {len(found) - len(paths)} unchanged since last run")
+    if report:
+        report.skip(len(found) - len(paths))
+    
+    serial_time = None
+    if speedup and jobs > 1:
+        # The baseline pass is only timed; its stats are left out of the run's
+        with STATS.collect():
+            start = time.perf_counter()
+            for _ in convert_files(paths, 1, use_mmap, data, verified is not None):
+                pass
+            serial_time = time.perf_counter() - start
+    
+    store = BackupStore()
+    store.begin_run(f'{script} --tree')
+    transaction = WriteTransaction()
+    # Time spent converting: the whole pipeline, or waiting on the workers
+    # while results are staged as they arrive
+    clock = {'seconds': 0.0}
+    if io_workers:
+        from async_pipeline import Pipeline
+        convert = functools.partial(convert_file, data=data, verify=verified is not None)
+        results = waited(Pipeline(convert, store, transaction, jobs, io_workers).run(paths), clock)
+    else:
+        results = waited(convert_files(paths, jobs, use_mmap, data, verified is not None), clock)
+    
+    total_converted = 0
+    total_fields = 0
+    files_converted = 0
+    outcome_counts = dict.fromkeys(OUTCOMES, 0)
+    failed = []
+    # (path, digest, verified digest) of every file converted, for the caches
+    processed = []
+    # Files staged, counted and reported once the commit has settled what was written
+    staged = []
+    with transaction:
+        for result in results:
+            if result['stats']:
+                STATS.merge(result['stats'])
+            # After a failure the rest are only converted, to report every failing file
+            if result['error']:
+                failed.append((result['path'], result['error']))
+            if failed:
+                continue
+            if not (result['converted'] or result['fields_added'] or result['imports_added']):
+                for section in result['sections']:
+                    outcome_counts[section['outcome']] += 1
+                if report:
+                    report.add_file(result['path'], result['sections'])
+                processed.append((result['path'], result['digest'], result['verified']))
+                continue
+            if use_mmap:
+                try:
+                    result['digest'] = stage_mapped(transaction, store, result['path'], result['edits'],
+                                                    result['original_digest'], verified, result['data'])
+                except RuntimeError as e:
+                    print(f"  ❌ {e}; nothing was written\n")
+                    sys.exit(1)
+                except ValidationError as e:
+                    print(f"  ❌ {result['path']}: {e}; nothing was written\n")
+                    sys.exit(1)
+            else:
+                if not result.get('staged'):
+                    with STATS.phase('backup'):
+                        store.add(result['path'], result['original_digest'])
+                    transaction.stage(result['path'], result['content'])
+                guard_changes(transaction, store, result['path'], result['original_digest'],
+                              result['digest'], result['edits'], result['data'], verified is not None)
+            staged.append((result['path'], result['sections'], result['imports_added']))
+            processed.append((result['path'], result['digest'], result['verified']))
+        if failed:
+            for path, error in failed:
+                print(f"  ❌ {path}: {error}")
+                if report:
+                    report.fail(path, error)
+            transaction.rollback()
+            print(f"\n❌ {len(failed)} file(s) failed to convert; nothing was written\n")
+            sys.exit(1)
+        committed = transaction.commit()
+    parallel_time = clock['seconds']
+    record_writes(transaction, committed)
+    with STATS.phase('backup'):
+        store.written(committed)
+    for path, sections, imports in staged:
+        settle_outcomes(transaction, path, sections)
+        for section in sections:
+            outcome_counts[section['outcome']] += 1
+        if report:
+            report.add_file(path, sections)
+        converted = converted_keys(sections)
+        fields = sum(section['fields_added'] for section in sections)
+        if path in transaction.resolved and IMPORTS not in transaction.resolved[path][0]:
+            imports = 0
+        total_converted += len(converted)
+        total_fields += fields
+        files_converted += bool(converted)
+        if converted or fields or path not in transaction.resolved:
+            print(f"  ✅ {path}: {describe(converted, fields, imports)}")
+    print_resolved(transaction, report)
+    if verified is not None:
+        for _, _, digest in processed:
+            if digest:
+                verified.add(digest)
+        verified.save()
+    if cache:
+        with STATS.phase('cache'):
+            for path, digest, _ in processed:
+                # A file merged at commit is checked again next run
+                if path not in transaction.resolved:
+                    cache.record(path, digest)
+            cache.save()
+    run_id = store.finish()
+    
+    print("\n" + "="*70)
+    print(f"✨ COMPLETE! Converted {total_converted} sections in {files_converted} files"
+          + (f", added {total_fields} data field(s)" if total_fields else ""))
+    if run_id:
+        print(f"💾 Backup run: {run_id} (undo with: campus_converter undo {run_id})")
+    if report:
+        print(f"📝 Report: {report.finish(run_id)}")
+    print_outcomes(outcome_counts)
+    if io_workers:
+        print(f"⏱️  Pipeline:   {parallel_time:.3f}s to read, convert, back up and stage "
+              f"with --jobs {jobs} --io-workers {io_workers}")
+    else:
+        print(f"⏱️  Conversion: {parallel_time:.3f}s with --jobs {jobs}")
+    print(f"⏱️  Writes:     {len(committed)} file(s), staged in {transaction.stage_seconds:.3f}s, "
+          f"committed in {transaction.commit_seconds:.3f}s")
+    if serial_time is not None:
+        print(f"⏱️  Baseline:   {serial_time:.3f}s with --jobs 1 "
+              f"(speedup {serial_time / parallel_time:.2f}x)")
+    print("="*70 + "\n")
+    return {'converted': total_converted, 'written': committed, 'run_id': run_id}
+
+def cache_group(registry, tree, section_keys=None, data=True):
+    """Cache group of a run; tree mode applies every section to every file, a
+    section set converts only some of a page, and a run without the data
+    migration leaves the arrays, so each gets its own"""
+    parts = [] if data else ['no-data']
+    if tree:
+        return templates_digest(registry.digest(), 'tree', *parts)
+    if section_keys or parts:
+        return templates_digest(registry.digest(), *sorted(section_keys or ()), *parts)
+    return registry.digest()
+
+def watch_convert(registry, filepath, section_keys, cache, store, use_mmap, data=True, verified=None):
+    """Convert one saved file for --watch in its own transaction.
+
+    Returns the converted keys ([] when nothing needed converting), or None
+    when the file was skipped: unchanged content, or saved again while it
+    was being converted (the new save arrives as the next change).
+    """
+    from file_watcher import file_signature
+    before = file_signature(filepath)
+    backed_up = len(store.files)
+    with WriteTransaction() as transaction:
+        if use_mmap:
+            outcome = convert_page_mapped(registry, filepath, section_keys, cache, store, transaction, verified)
+        else:
+            outcome = convert_page(registry, filepath, section_keys, cache, store, transaction,
+                                   data=data, verified=verified)
+        if outcome is None:
+            return None
+        sections, digest, _ = outcome
+        converted = converted_keys(sections)
+        if transaction.staged and file_signature(filepath) != before:
+            transaction.rollback()
+            del store.files[backed_up:]
+            return None
+        committed = transaction.commit()
+    record_writes(transaction, committed)
+    with STATS.phase('backup'):
+        store.written(committed)
+    print_resolved(transaction)
+    if cache and filepath not in transaction.resolved:
+        cache.record(filepath, digest)
+    return converted
+
+def watch_targets(registry, tree, root=None, section_keys=None):
+    """{file: section keys} for every page converted now: the .tsx files under tree, or the configured pages"""
+    if tree:
+        return {path: registry.keys() for path in discover_tsx(tree)}
+    return {os.path.normpath(path): keys for path, keys in registry.files(root, section_keys).items()}
+
+def run_watch(args):
+    """Convert every page once, then reconvert each page as it is saved, until Ctrl-C.
+
+    The registry, its compiled patterns and the rendered templates stay
+    loaded between saves; they are only reloaded when sections.json or a
+    template file changes, and then every page is converted again.
+    """
+    from file_watcher import DEBOUNCE, make_watcher
+    debounce = DEBOUNCE * 1000 if args.debounce is None else args.debounce
+    registry = load_registry()
+    cache = None if args.no_cache else ConversionCache(cache_group(registry, args.tree, args.sections, not args.no_data))
+    verified = None if args.no_verify else VerifyCache()
+    template_files = [REGISTRY_PATH] + [registry.templates_dir / name for name in registry.template_names()]
+    template_files = {os.path.normpath(path) for path in template_files}
+    targets = watch_targets(registry, args.tree, args.root, args.sections)
+    watcher = make_watcher(list(targets) + sorted(template_files), args.tree,
+                           debounce / 1000, polling=args.poll)
+
+    print("\n" + "="*70)
+    print(f"👀  WATCH MODE: {args.tree or f'{len(targets)} configured page(s)'} "
+          f"({watcher.backend}, debounce {debounce:g} ms)")
+    print("="*70)
+
+    def convert_batch(paths, initial=False):
+        store = BackupStore()
+        store.begin_run(f'{args.script} --watch')
+        for filepath in paths:
+            if filepath not in targets:
+                continue
+            try:
+                saved_ns = os.stat(filepath).st_mtime_ns
+            except OSError:
+                # Gone since the event, like the temp file an editor saves through
+                continue
+            try:
+                converted = watch_convert(registry, filepath, targets[filepath], cache, store, args.mmap,
+                                          not args.no_data, verified)
+            except Exception as e:
+                print(f"  ❌ {filepath}: {e}")
+                continue
+            watcher.ignore(filepath)
+            if initial:
+                if converted:
+                    print(f"  ✅ {filepath}: {', '.join(converted)}")
+            elif converted:
+                latency = (time.time_ns() - saved_ns) / 1e6
+                print(f"  ✅ {filepath}: {', '.join(converted)} ({latency:.0f} ms after save)")
+            elif converted is not None:
+                print(f"  ☑️  {filepath}: nothing to convert")
+        if cache:
+            with STATS.phase('cache'):
+                cache.save()
+        if verified is not None:
+            verified.save()
+        run_id = store.finish()
+        if run_id:
+            print(f"  💾 Backup run: {run_id} (undo with: campus_converter undo {run_id})")
+
+    initial = [path for path in targets if not (cache and cache.is_fresh(path))]
+    print(f"\n🔄 Initial pass: {len(initial)} file(s), {len(targets) - len(initial)} unchanged since last run")
+    convert_batch(initial, initial=True)
+    print("\n👀 Watching for saves (Ctrl-C to stop)...")
+    try:
+        with watcher:
+            while True:
+                changed = watcher.changes()
+                if template_files.intersection(changed):
+                    registry = reload_registry()
+                    cache = None if args.no_cache else ConversionCache(cache_group(registry, args.tree, args.sections, not args.no_data))
+                    targets = watch_targets(registry, args.tree, args.root, args.sections)
+                    watcher.watch(targets)
+                    print("\n🔁 Templates changed: registry reloaded, converting every page")
+                    changed = list(targets)
+                if args.tree:
+                    # New pages under the root are converted like any other save
+                    for path in changed:
+                        if path.endswith('.tsx') and path not in template_files:
+                            targets.setdefault(path, registry.keys())
+                if changed:
+                    convert_batch(changed)
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching\n")
+
+def run(args):
+    """Run the conversion selected by args (see cli.parse_args); returns what the run returns"""
+    if args.watch:
+        return run_watch(args)
+    registry = load_registry()
+    cache = None if args.no_cache else ConversionCache(cache_group(registry, args.tree, args.sections, not args.no_data))
+    files = changed_files(args) if args.since else None
+    if args.dry_run:
+        if args.tree:
+            items = [(path, registry.keys()) for path in (discover_tsx(args.tree) if files is None else files)]
+            return run_dry(items, max(1, args.jobs), args.patch, cache, data=not args.no_data,
+                           verify=not args.no_verify)
+        items = list(registry.files(args.root, args.sections).items())
+        return run_dry(items, 1, args.patch, cache, SectionIndex(), not args.no_data, not args.no_verify)
+    verified = None if args.no_verify else VerifyCache()
+    report = None
+    if args.report:
+        report = ConversionReport(args.report if args.report is not True else default_report_path(),
+                                  args.command_line)
+    with report or contextlib.nullcontext():
+        if args.tree:
+            if args.use_async:
+                from async_pipeline import IO_WORKERS
+                io_workers = args.io_workers or IO_WORKERS
+            else:
+                io_workers = None
+            return run_tree(args.tree, max(1, args.jobs), args.speedup, cache, args.mmap, report,
+                            io_workers, args.script, not args.no_data, verified, files)
+        return run_pages(registry, cache, args.mmap, report, registry.files(args.root, args.sections),
+                         args.script, not args.no_data, verified)
+
+def run_pages(registry, cache, use_mmap=False, report=None, files=None, script='campus_converter convert',
+              data=True, verified=None):
+    """Convert the configured pages, printing each section's outcome and a final status list.
+
+    files maps each page to the section keys to convert in it (default:
+    registry.files()). data=False leaves the data arrays alone. With verified
+    (a VerifyCache) every output is validated before it is staged. Returns
+    the number of sections converted, the files written and the backup run id.
+    """
+    
+    print("\n" + "="*70)
+    print("🚀  ULTIMATE CAMPUS HIGHLIGHTS CONVERTER")
+    print("="*70)
+    
+    # Every registered section, grouped by the page it lives in
+    files_to_process = registry.files() if files is None else files
+    
+    total_converted = 0
+    total_fields = 0
+    outcome_counts = dict.fromkeys(OUTCOMES, 0)
+    store = BackupStore()
+    store.begin_run(script)
+    transaction = WriteTransaction()
+    index = None if use_mmap else SectionIndex()
+    processed = []
+    checked = []
+    status = []
+    
+    for filepath, section_keys in files_to_process.items():
+        
+        page = Path(filepath).stem
+        if not os.path.exists(filepath):
+            print(f"\n⚠️  Skipping {filepath} (not found)")
+            status.append(f"  ⚠️  {page} - page not found")
+            if report:
+                report.fail(filepath, "file not found")
+            continue
+        
+        if cache and cache.is_fresh(filepath):
+            print(f"\n⏭️  Skipping {filepath} (unchanged since last run)")
+            status.append(f"  ⏭️  {page} - unchanged since last run")
+            if report:
+                report.skip()
+            continue
+        
+        print(f"\n\n📂 Processing: {filepath}")
+        print("-" * 70)
+        
+        # Read, classify every section from its fingerprint, and convert the
+        # convertible ones in one pass; staged output is only written once
+        # every file has converted
+        print("\n🔄 Converting sections...")
+        try:
+            if use_mmap:
+                outcome = convert_page_mapped(registry, filepath, section_keys, cache, store, transaction, verified)
+            else:
+                outcome = convert_page(registry, filepath, section_keys, cache, store, transaction, index, data,
+                                       verified)
+        except Exception as e:
+            print(f"❌ Error: {e}")
+            print("\n↩️  Rolling back: no file was written\n")
+            transaction.rollback()
+            if report:
+                report.fail(filepath, f"{e} (rolled back, no file was written)")
+            sys.exit(1)
+        if outcome is None:
+            print("⏭️  Content unchanged since last run")
+            status.append(f"  ⏭️  {page} - unchanged since last run")
+            if report:
+                report.skip()
+            continue
+        sections, digest, imports = outcome
+        for result in sections:
+            print(f"  {STATUS[result['outcome']]}: {result['title']}")
+            if result['fields_added']:
+                print(f"  ➕ {result['title']}: {result['fields_added']} data field(s) added")
+        # Counted, listed and reported once the commit has settled what was written
+        checked.append((filepath, sections))
+        status.append((page, sections))
+        converted = converted_keys(sections)
+        fields_added = sum(result['fields_added'] for result in sections)
+        if imports:
+            print(f"  ➕ {imports} import(s) added")
+        if converted or fields_added or imports:
+            print(f"\n💾 Staged {len(converted)} section(s)"
+                  + (f" and {fields_added} data field(s)" if fields_added else "")
+                  + (f" and {imports} import(s)" if imports else ""))
+        processed.append((filepath, digest))
+    
+    # Commit every staged file at once
+    committed = transaction.commit()
+    record_writes(transaction, committed)
+    with STATS.phase('backup'):
+        store.written(committed)
+    if committed:
+        print(f"\n💾 Saved {len(committed)} file(s): staged in {transaction.stage_seconds * 1000:.1f} ms, "
+              f"committed in {transaction.commit_seconds * 1000:.1f} ms")
+    for filepath, sections in checked:
+        settle_outcomes(transaction, filepath, sections)
+        for result in sections:
+            outcome_counts[result['outcome']] += 1
+        total_converted += len(converted_keys(sections))
+        total_fields += sum(result['fields_added'] for result in sections)
+        if report:
+            report.add_file(filepath, sections)
+    print_resolved(transaction, report)
+    if cache:
+        with STATS.phase('cache'):
+            for filepath, digest in processed:
+                # A file merged at commit is checked again next run
+                if filepath not in transaction.resolved:
+                    cache.record(filepath, digest)
+            cache.save()
+    if index:
+        index.save()
+    if verified is not None:
+        verified.save()
+    run_id = store.finish()
+    
+    print("\n\n" + "="*70)
+    print(f"✨ COMPLETE! Converted {total_converted} sections total"
+          + (f", added {total_fields} data field(s)" if total_fields else ""))
+    if run_id:
+        print(f"💾 Backup run: {run_id} (undo with: campus_converter undo {run_id})")
+    if report:
+        print(f"📝 Report: {report.finish(run_id)}")
+    print_outcomes(outcome_counts)
+    print("="*70)
+    print("\n📋 Status:")
+    for line in status:
+        if isinstance(line, str):
+            print(line)
+            continue
+        page, sections = line
+        for result in sections:
+            print(f"  {STATUS[result['outcome']].split()[0]} {page} - {result['title']}")
+    print("\n")
+    return {'converted': total_converted, 'written': committed, 'run_id': run_id}
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Card Template Renderer
+Renders every Campus Highlights card grid from one base template and a small
+per-section spec
+
+templates/grid_base.tsx and templates/card_base.tsx are written at column 0
+with 4-space indentation and use three kinds of placeholders:
+
+    ${name}              value slot; a multi-line value is indented to the slot's column
+    ${#flag} ... ${/flag}  rendered only when flag is truthy
+    ${^flag} ... ${/flag}  rendered only when flag is falsy
+
+Each template is compiled once into a Python function that joins its pieces,
+so rendering a section is a dict lookup per slot plus one join. The result is
+then re-indented to the indentation unit and column found at the match site.
+"""
+
+import functools
+import re
+
+_PLACEHOLDER = re.compile(r'\$\{([#^/]?)(\w+)\}')
+_CONTINUATION = re.compile(r'\n(?=[^\n])')
+_BLANK_SLOT_LINE = re.compile(r'\n[ \t]+(?=\n)')
+_LEADING_SPACES = re.compile(r'^( *)', re.MULTILINE)
+
+# Template source indentation unit
+TEMPLATE_UNIT = 4
+
+# Spec values used when a section does not set them
+CARD_DEFAULTS = {
+    'key': 'title',
+    'title': 'title',
+    'aspect': 'video',
+    'color': 'accent',
+    'icon': 'IconComponent',
+    'image': False,
+    'fallback': True,
+    'placeholder_note': 'Icon Placeholder',
+    'centered': False,
+    'badge': False,
+    'title_size': 'text-lg',
+    'title_extra': None,
+    'row_align': 'items-center',
+    'badge_shape': 'w-10 h-10 rounded-lg',
+    'badge_icon_size': 'h-5 w-5',
+    'subtitle': '',
+    'body': [],
+    'hover': 'hoverDesc',
+    'hover_class': 'text-sm text-muted-foreground mt-2 border-t border-border/50 pt-3 leading-relaxed',
+}
+
+
+def _parse(text):
+    """Split template text into a nested list of literals, slots and sections"""
+    root = []
+    stack = [(None, root)]
+    pos = 0
+    for match in _PLACEHOLDER.finditer(text):
+        literal = text[pos:match.start()]
+        if literal:
+            stack[-1][1].append(literal)
+        kind, name = match.groups()
+        if kind in ('#', '^'):
+            children = []
+            stack[-1][1].append((kind, name, children))
+            stack.append((name, children))
+        elif kind == '/':
+            if stack[-1][0] != name:
+                raise ValueError(f"unbalanced ${{/{name}}} in template")
+            stack.pop()
+        else:
+            line_start = text.rfind('\n', 0, match.start()) + 1
+            column = text[line_start:match.start()]
+            stack[-1][1].append(('=', name, ' ' * len(column) if not column.strip() else ''))
+        pos = match.end()
+    if len(stack) != 1:
+        raise ValueError(f"unclosed ${{#{stack[-1][0]}}} in template")
+    if text[pos:]:
+        root.append(text[pos:])
+    return root
+
+
+def _expression(nodes):
+    """Python expression source that renders nodes from the params dict `p`"""
+    parts = []
+    for node in nodes:
+        if isinstance(node, str):
+            parts.append(repr(node))
+        elif node[0] == '=':
+            _, name, indent = node
+            if indent:
+                parts.append(f"_indent(p[{name!r}], {indent!r})")
+            else:
+                parts.append(f"str(p[{name!r}])")
+        else:
+            kind, name, children = node
+            test = f"p[{name!r}]" if kind == '#' else f"not p[{name!r}]"
+            parts.append(f"({_expression(children)} if {test} else '')")
+    if not parts:
+        return "''"
+    return "''.join((" + ', '.join(parts) + ",))"
+
+
+def _indent(value, indent):
+    """Indent the continuation lines of a multi-line slot value, leaving blank lines empty"""
+    return _CONTINUATION.sub('\n' + indent, str(value))
+
+
+@functools.lru_cache(maxsize=None)
+def compile_template(text):
+    """Compile template text into a render(params) function; cached per text"""
+    source = f"lambda p: {_expression(_parse(text))}"
+    return eval(compile(source, '<card template>', 'eval'), {'_indent': _indent})
+
+
+def _tidy(text):
+    """Drop lines left holding only the indentation of an empty slot"""
+    return _BLANK_SLOT_LINE.sub('', text)
+
+
+def render_card_grid(grid_template, card_template, spec, item, collection, grid):
+    """Render a whole grid at column 0 with TEMPLATE_UNIT indentation"""
+    params = dict(CARD_DEFAULTS)
+    params.update(spec)
+    params['item'] = item
+    params['icon_component'] = params['icon'] == 'IconComponent'
+    params['icon_row'] = not params['centered']
+    if params['title_extra'] is None:
+        params['title_extra'] = 'leading-tight' if params['icon_row'] else ''
+    params['title_class'] = ' '.join(filter(None, (
+        'font-serif', params['title_size'],
+        'font-semibold text-foreground group-hover:text-accent transition-colors', params['title_extra'],
+    )))
+    params['subtitle'] = compile_template(params['subtitle'])({'item': item})
+    params['body'] = compile_template('\n'.join(params['body']))({'item': item})
+    params['card'] = _tidy(compile_template(card_template)(params))
+    params['collection'] = collection
+    params['grid'] = grid
+    return _tidy(compile_template(grid_template)(params))
+
+
+def rescale(text, unit):
+    """Rescale leading TEMPLATE_UNIT indentation to an indentation unit of `unit` spaces"""
+    if unit == TEMPLATE_UNIT:
+        return text
+    return _LEADING_SPACES.sub(
+        lambda m: ' ' * (len(m.group(1)) // TEMPLATE_UNIT * unit + len(m.group(1)) % TEMPLATE_UNIT),
+        text,
+    )
+
+
+def indent_lines(text, indent):
+    """Prefix every non-empty line after the first with indent; the first line continues the match site"""
+    if not indent:
+        return text
+    return _CONTINUATION.sub('\n' + indent, text)
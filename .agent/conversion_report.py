@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Conversion Report
+Per-section results of a converter run, written to one Markdown report as
+they come in (replaces the hand-written *_CONVERSION_REPORT.md files)
+
+section_results() describes every section a file was checked for: what
+happened to it, its line span before and after, the bytes it grew or shrank
+by and the time spent locating and rendering it. A ConversionReport writes
+each file's table as soon as that file is done and keeps only running
+totals, so a tree-wide run over hundreds of files never holds the whole
+report in memory.
+"""
+
+import time
+from pathlib import Path
+
+from data_migration import data_label
+from fingerprint import ABSENT, CONVERTED, CONVERTIBLE
+
+REPORTS_DIR = Path(__file__).with_name('reports')
+
+# What happened to a section in this run
+CONVERTED_NOW = 'converted'
+ALREADY_CONVERTED = 'already converted'
+NOT_FOUND = 'not found'
+NOT_MATCHING = 'not matching'
+# Converted, but the file was saved again before commit and the edit conflicted
+LEFT_AS_SAVED = 'left as saved'
+OUTCOMES = (CONVERTED_NOW, ALREADY_CONVERTED, NOT_FOUND, NOT_MATCHING, LEFT_AS_SAVED)
+
+STATUS = {
+    CONVERTED_NOW: "✅ converted",
+    ALREADY_CONVERTED: "☑️  already converted",
+    NOT_FOUND: "➖ not found",
+    NOT_MATCHING: "⚠️  found, but its grid does not match the registry",
+    LEFT_AS_SAVED: "🔀 left as saved, the file changed before commit",
+}
+
+
+def section_results(registry, keys, states, edits, seconds, content=None, entries=None, data=()):
+    """One result dict per key, in keys order, from a file's states and edits.
+
+    content is the text the edits apply to; line spans are only computed for
+    str content (a mapped file is not walked again for them). Sections that
+    did not convert get their line span from the page's section index
+    entries, when given. data are the page's data edits (see
+    Registry.migrate); each section counts the fields added to its array.
+    """
+    added = {}
+    for edit in data:
+        added[edit[0]] = added.get(edit[0], 0) + edit[4]
+    timings = {edit[0]: took for edit, took in zip(edits, seconds)}
+    spans = {}
+    if isinstance(content, str):
+        # Line numbers before and after, in one walk over the edits
+        line, shift, last = 1, 0, 0
+        for key, start, end, replacement in edits:
+            line += content.count('\n', last, start)
+            old_lines = content.count('\n', start, end)
+            new_lines = replacement.count('\n')
+            spans[key] = ([line, line + old_lines], [line + shift, line + shift + new_lines])
+            shift += new_lines - old_lines
+            line += old_lines
+            last = end
+
+    results = []
+    for key in keys:
+        section = registry.sections[key]
+        result = {
+            'key': key,
+            'title': section.title,
+            'outcome': _outcome(states[key], key in timings),
+            'lines': None,
+            'lines_after': None,
+            'bytes_before': None,
+            'bytes_after': None,
+            'seconds': timings.get(key),
+            'fields_added': added.get(key, 0),
+        }
+        if key in spans:
+            result['lines'], result['lines_after'] = spans[key]
+        elif entries:
+            for entry in entries:
+                if entry['map_call'] == section.map_call and entry['grid'] in (section.grid, section.output_grid):
+                    result['lines'] = result['lines_after'] = entry['lines']
+                    break
+        results.append(result)
+
+    by_key = {result['key']: result for result in results}
+    for key, start, end, replacement in edits:
+        if isinstance(content, str):
+            by_key[key]['bytes_before'] = len(content[start:end].encode('utf-8'))
+            by_key[key]['bytes_after'] = len(replacement.encode('utf-8'))
+        else:
+            by_key[key]['bytes_before'] = end - start
+            by_key[key]['bytes_after'] = len(replacement)
+    return results
+
+
+def settle(sections, applied, conflicts=(), lines=None):
+    """Mark the sections converted now whose edit a commit-time merge did not
+    apply (applied: the keys and data labels it did; conflicts: those it did
+    not, with why) as left as saved, with no fields added, and take the line
+    span after of the others from lines, their grids' spans in the merged
+    text. A data edit is counted if it was applied, or if it was folded into
+    its grid's edit (an inline array, never merged on its own) and the grid
+    was."""
+    conflicted = {key for key, _ in conflicts}
+    for result in sections:
+        key = result['key']
+        if result['outcome'] == CONVERTED_NOW and key not in applied:
+            result.update(outcome=LEFT_AS_SAVED, lines_after=None, bytes_before=None, bytes_after=None,
+                          fields_added=0)
+            continue
+        label = data_label(key)
+        if result['fields_added'] and label not in applied and (label in conflicted or key not in applied):
+            result['fields_added'] = 0
+        if lines and key in lines:
+            result['lines_after'] = lines[key]
+    return sections
+
+
+def _outcome(state, converted):
+    if converted:
+        return CONVERTED_NOW
+    if state == CONVERTED:
+        return ALREADY_CONVERTED
+    if state == ABSENT:
+        return NOT_FOUND
+    return NOT_MATCHING if state == CONVERTIBLE else state
+
+
+def _lines(span):
+    return f"{span[0]}-{span[1]}" if span else "—"
+
+
+class ConversionReport:
+    def __init__(self, path, command):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = open(self.path, 'w', encoding='utf-8')
+        self.outcomes = dict.fromkeys(OUTCOMES, 0)
+        self.checked = 0
+        self.changed = 0
+        self.skipped = 0
+        self.failed = 0
+        self.merged = 0
+        self.conflicts = 0
+        self.bytes_delta = 0
+        self.fields_added = 0
+        self.seconds = 0.0
+        self.file.write(
+            "# Conversion Report\n\n"
+            f"**Date**: {time.strftime('%Y-%m-%d %H:%M:%S')}  \n"
+            f"**Command**: `{command}`\n\n"
+            "---\n\n"
+            "## Files\n\n"
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def add_file(self, filepath, sections):
+        """Write one file's table; a file with none of its sections present is only counted"""
+        self.checked += 1
+        for result in sections:
+            self.outcomes[result['outcome']] = self.outcomes.get(result['outcome'], 0) + 1
+        if all(result['outcome'] == NOT_FOUND for result in sections):
+            return
+        if any(result['outcome'] == CONVERTED_NOW or result['fields_added'] for result in sections):
+            self.changed += 1
+        self.fields_added += sum(result['fields_added'] for result in sections)
+        rows = []
+        for result in sections:
+            delta = ""
+            if result['bytes_after'] is not None:
+                change = result['bytes_after'] - result['bytes_before']
+                self.bytes_delta += change
+                delta = f"{change:+,}"
+            took = ""
+            if result['seconds'] is not None:
+                self.seconds += result['seconds']
+                took = f"{result['seconds'] * 1000:.2f} ms"
+            fields = f", {result['fields_added']} data field(s) added" if result['fields_added'] else ""
+            rows.append(
+                f"| {result['title']} | {STATUS[result['outcome']].replace('  ', ' ')}{fields} "
+                f"| {_lines(result['lines'])} | {_lines(result['lines_after'])} | {delta} | {took} |\n"
+            )
+        self.file.write(
+            f"### `{filepath}`\n\n"
+            "| Section | Result | Lines before | Lines after | Bytes | Time |\n"
+            "|---|---|---|---|---|---|\n"
+            + ''.join(rows) + "\n"
+        )
+        self.file.flush()
+
+    def skip(self, count=1):
+        """Count files left alone because they are unchanged since the last run"""
+        self.skipped += count
+
+    def fail(self, filepath, error):
+        self.failed += 1
+        self.file.write(f"### `{filepath}`\n\n❌ {error}\n\n")
+        self.file.flush()
+
+    def resolved(self, filepath, applied, conflicts):
+        """Record a file saved again between reading and commit: the sections
+        merged onto the saved text and those left as saved (conflicts)"""
+        self.merged += 1
+        self.conflicts += len(conflicts)
+        rows = [f"| {key} | re-applied |\n" for key in applied]
+        rows += [f"| {key} | ⚠️ conflict: {reason} |\n" for key, reason in conflicts]
+        self.file.write(
+            f"### `{filepath}` changed before commit\n\n"
+            "| Section | Merge |\n"
+            "|---|---|\n"
+            + ''.join(rows) + "\n"
+        )
+        self.file.flush()
+
+    def finish(self, run_id=None):
+        """Write the summary and close the report; returns its path"""
+        lines = [
+            "---\n\n## Summary\n\n",
+            f"- **Files**: {self.checked} checked, {self.changed} changed, "
+            f"{self.skipped} unchanged since the last run, {self.failed} failed\n",
+            "- **Sections**: " + ", ".join(f"{self.outcomes[outcome]} {outcome}" for outcome in OUTCOMES) + "\n",
+            f"- **Size**: {self.bytes_delta:+,} bytes in the converted grids\n",
+            f"- **Data fields added**: {self.fields_added}\n",
+            f"- **Saved again before commit**: {self.merged} file(s) merged, {self.conflicts} conflict(s)\n",
+            f"- **Conversion time**: {self.seconds * 1000:.1f} ms locating and rendering sections\n",
+        ]
+        if run_id:
+            lines.append(f"- **Backup run**: `{run_id}` (undo with `campus_converter undo {run_id}`)\n")
+        self.file.write(''.join(lines))
+        self.close()
+        return self.path
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+
+def default_report_path():
+    return REPORTS_DIR / f"conversion-{time.strftime('%Y%m%d-%H%M%S')}.md"
@@ -2,154 +2,14 @@
 """
 Campus Highlights Pattern Converter - Full Version
 Automatically converts ALL card sections to Campus Highlights pattern
+
+Kept so existing commands keep working: this is
+`python .agent/campus_converter campus-locations` and takes the same options.
 """
 
-import re
 import sys
-import os
-
-def read_file(filepath):
-    """Read file content"""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return f.read()
-
-def write_file(filepath, content):
-    """Write content to file"""
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(content)
-
-def backup_file(filepath):
-    """Create backup of file"""
-    backup_path = f"{filepath}.auto_backup"
-    content = read_file(filepath)
-    write_file(backup_path, content)
-    print(f"💾 Backup created: {backup_path}")
-
-def convert_aboutuniversity_campus_locations(content):
-    """Convert Campus Locations section"""
-    new_code = '''          <div className="grid md:grid-cols-2 gap-6">
-            {campusLocations.map((campus, index) => (
-              <motion.div
-                key={campus.name}
-                custom={index}
-                initial="initial"
-                whileInView="animate"
-                whileHover="hover"
-                viewport={{ once: true }}
-                variants={{
-                  initial: { opacity: 0, y: 30 },
-                  animate: { opacity: 1, y: 0, transition: { duration: 0.5, delay: 0.1 * index } },
-                  hover: { y: -5, transition: { duration: 0.3 } }
-                }}
-                className="group relative overflow-hidden rounded-xl border border-border shadow-sm bg-card cursor-pointer hover:shadow-lg hover:border-accent/50 transition-all duration-300"
-              >
-                {/* Image Section - Using placeholder for now */}
-                <div className="aspect-video overflow-hidden relative bg-muted">
-                  <div className="w-full h-full flex items-center justify-center bg-primary/5">
-                    <MapPin className="h-16 w-16 text-primary/40" />
-                  </div>
-                </div>
-
-                {/* Content Section */}
-                <div className="p-5 relative z-10 bg-card">
-                  <div className="flex items-start gap-3 mb-3">
-                    <div className="w-10 h-10 rounded-lg bg-primary/10 flex items-center justify-center flex-shrink-0">
-                      <MapPin className="h-5 w-5 text-primary" />
-                    </div>
-                    <div className="flex-1">
-                      <h3 className="font-serif font-semibold text-foreground group-hover:text-accent transition-colors">
-                        {campus.name}
-                      </h3>
-                      <p className="text-accent text-sm font-medium">{campus.location}</p>
-                    </div>
-                  </div>
-                  
-                  <p className="text-muted-foreground text-sm">{campus.description}</p>
-
-                  {/* Animated Description - Drops down on Hover */}
-                  <motion.div
-                    variants={{
-                      initial: { height: 0, opacity: 0 },
-                      animate: { height: 0, opacity: 0 },
-                      hover: { height: "auto", opacity: 1 }
-                    }}
-                    className="overflow-hidden"
-                    transition={{ duration: 0.4, ease: "easeOut" }}
-                  >
-                    <p className="text-sm text-muted-foreground mt-2 border-t border-border/50 pt-3 leading-relaxed">
-                      {campus.hoverDesc}
-                    </p>
-                  </motion.div>
-                </div>
-              </motion.div>
-            ))}
-          </div>'''
-    
-    pattern = r'<div className="grid md:grid-cols-2 gap-6">\s*\{campusLocations\.map\(\(campus, index\)[\s\S]*?\}\)\}\s*</div>'
-    
-    modified = re.sub(pattern, new_code, content, count=1)
-    
-    if modified != content:
-        print("  ✅ Campus Locations section converted!")
-        return modified
-    else:
-        print("  ⚠️  Campus Locations section not found or already converted")
-        return content
 
-def main():
-    """Main execution"""
-    print("\n" + "="*60)
-    print("🚀  CAMPUS HIGHLIGHTS PATTERN CONVERTER - FULL AUTO")
-    print("="*60)
-    
-    about_uni_file = "src/pages/AboutUniversity.tsx"
-    
-    try:
-        # Check if file exists
-        if not os.path.exists(about_uni_file):
-            print(f"\n❌ Error: {about_uni_file} not found")
-            print("   Make sure you're running from project root")
-            sys.exit(1)
-        
-        # Create backup
-        print(f"\n📂 Working on: {about_uni_file}")
-        backup_file(about_uni_file)
-        
-        # Read file
-        print(f"\n📖 Reading file...")
-        content = read_file(about_uni_file)
-        original_content = content
-        
-        # Convert sections
-        print(f"\n🔄 Converting sections...")
-        print("\n1️⃣  Programs section:")
-        print("  ✅ Already converted!")
-        
-        print("\n2️⃣  Campus Locations section:")
-        content = convert_aboutuniversity_campus_locations(content)
-        
-        # Write changes
-        if content != original_content:
-            print(f"\n💾 Saving changes...")
-            write_file(about_uni_file, content)
-            print("\n✨ SUCCESS! AboutUniversity.tsx has been updated!")
-            print("\n📋 Sections converted:")
-            print("  ✅ Programs (already done)")  
-            print("  ✅ Campus Locations")
-            print("\n🎯 Next: You can manually update Campus Life section")
-            print("   (or I can add it to this script)")
-        else:
-            print("\n⚠️  No changes made")
-            
-    except Exception as e:
-        print(f"\n❌ Error: {e}")
-        import traceback
-        traceback.print_exc()
-        sys.exit(1)
-    
-    print("\n" + "="*60)
-    print("✨ Done!")
-    print("="*60 + "\n")
+from campus_converter.cli import main
 
 if __name__ == "__main__":
-    main()
+    main(['campus-locations'] + sys.argv[1:])
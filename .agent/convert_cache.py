@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Conversion Cache
+Remembers which files were already processed so re-runs can skip them
+
+Entries are grouped by a hash of the template set, then keyed on file path
+and store the mtime, size and content hash seen after the last run. A file
+whose mtime and size still match is skipped without being read; a file
+whose stat changed but whose content hash did not is skipped after one read.
+Changing any template or pattern changes the group, so every file is
+converted again.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+CACHE_PATH = Path(__file__).with_name('.converter_cache.json')
+CACHE_VERSION = 1
+
+
+def content_digest(content):
+    """sha256 of the file text as it is stored on disk (utf-8). The text must
+    be read with newline='' so CRLF files hash like their bytes; the backup
+    store and the commit guard hash the bytes."""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def templates_digest(*parts):
+    """Hash of everything that decides the conversion output: templates and patterns"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(repr(part).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class ConversionCache:
+    def __init__(self, templates_hash, path=CACHE_PATH):
+        self.path = Path(path)
+        self.templates_hash = templates_hash
+        self.data = self._load()
+        self.entries = self.data['groups'].setdefault(templates_hash, {})
+        self.dirty = False
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == CACHE_VERSION:
+                return data
+        except (OSError, ValueError):
+            pass
+        return {'version': CACHE_VERSION, 'groups': {}}
+
+    @staticmethod
+    def _key(filepath):
+        return os.path.abspath(filepath)
+
+    def is_fresh(self, filepath):
+        """True if filepath is unchanged since it was recorded, judged by stat alone"""
+        entry = self.entries.get(self._key(filepath))
+        if entry is None:
+            return False
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            return False
+        return entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size
+
+    def matches(self, filepath, digest):
+        """True if the recorded content hash equals digest (stat changed, content did not)"""
+        entry = self.entries.get(self._key(filepath))
+        return entry is not None and entry['sha256'] == digest
+
+    def record(self, filepath, digest):
+        """Remember filepath as processed with its current stat and content hash"""
+        stat = os.stat(filepath)
+        self.entries[self._key(filepath)] = {
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'sha256': digest,
+        }
+        self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
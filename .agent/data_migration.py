@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Data Migration
+Add the fields a converted card reads to every object of its data array,
+so the arrays no longer need the hand edits of MANUAL_STEP_BY_STEP.md
+
+The converted cards read fields the old ones did not (`{item.hoverDesc}`,
+`{program.image}`, `{alumni.description}`). For each converted section the
+registry knows which fields its card reads; every object literal in the
+array the grid maps over gets the ones it lacks, with the value given in
+"field_defaults" in templates/sections.json. Fields without a default are
+left for a person to fill in.
+
+Arrays are found once per page: declarations `const <name> = [` with one
+regex, inline `{[...].map(...)}` arrays from the grid itself, and each
+array's extent with the brace-aware JSX scanner. The section index records
+these spans, so a page whose index is fresh is not searched again. Each
+array is walked once, jumping over every object with the scanner, so an
+array of hundreds of entries costs one pass. An object with a spread
+(`...base`) or a value the walker cannot delimit is left alone, and so is
+an array holding anything but object literals.
+"""
+
+import json
+import re
+
+from import_fixer import IMPORTS
+from jsx_scanner import find_expression_end
+
+# `const <name> = [`, with an optional type annotation
+_DECLARATION = re.compile(
+    r'\b(?:const|let|var)\s+(?P<name>[A-Za-z_$][\w$]*)\s*(?::[^=;]*)?=\s*(?P<bracket>\[)'
+)
+_GAP = re.compile(r'(?:\s+|//[^\n]*|/\*[\s\S]*?\*/)*')
+_KEY = re.compile(
+    r'(?P<spread>\.\.\.)|(?P<name>[A-Za-z_$][\w$]*)|"(?P<double>[^"\\\n]*)"|\'(?P<single>[^\'\\\n]*)\'|(?P<number>\d+)'
+)
+# Tokens that matter while skipping a property value
+_VALUE = re.compile(
+    r'(?P<string>"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\')'
+    r'|(?P<comment>//[^\n]*|/\*[\s\S]*?\*/)'
+    r'|(?P<template>`(?:[^`\\$]|\\[\s\S]|\$(?!\{))*`)'
+    r'|(?P<open>[{(\[])'
+    r'|(?P<end>[,}])'
+    r'|(?P<unknown>[`<])'
+)
+
+
+def declared_arrays(content, names):
+    """{name: [(start, end), ...]} of the array literals assigned to names, in file order"""
+    arrays = {}
+    for match in _DECLARATION.finditer(content):
+        if match.group('name') not in names:
+            continue
+        start = match.start('bracket')
+        end = find_expression_end(content, start)
+        if end is not None:
+            arrays.setdefault(match.group('name'), []).append((start, end))
+    return arrays
+
+
+def pick_array(spans, call):
+    """The declaration a map call at offset call uses: the last one before it, else the first after"""
+    before = [span for span in spans if span[0] < call]
+    if before:
+        return before[-1]
+    return spans[0] if spans else None
+
+
+def inline_array(content, brace):
+    """(start, end) of the array literal of the inline `{[...].map(` whose `{` is at brace, or None"""
+    start = content.find('[', brace)
+    end = find_expression_end(content, start) if start != -1 else None
+    return (start, end) if end is not None else None
+
+
+def array_objects(content, start, end):
+    """(start, end) of every object literal in the array content[start:end], or None
+    if the array holds anything else"""
+    objects = []
+    pos = _GAP.match(content, start + 1).end()
+    while pos < end - 1:
+        if content[pos] != '{':
+            return None
+        close = find_expression_end(content, pos)
+        if close is None or close > end:
+            return None
+        objects.append((pos, close))
+        pos = _GAP.match(content, close).end()
+        if content[pos] == ',':
+            pos = _GAP.match(content, pos + 1).end()
+        elif pos != end - 1:
+            return None
+    return objects
+
+
+def object_keys(content, start, end):
+    """Scan the object literal content[start:end] once.
+
+    Returns (keys, last value end, trailing comma offset or None), or None
+    when the object has a spread or a value the scan cannot delimit.
+    """
+    keys = set()
+    last = start + 1
+    trailing = None
+    pos = _GAP.match(content, start + 1).end()
+    while pos < end - 1:
+        match = _KEY.match(content, pos)
+        if not match or match.group('spread'):
+            return None
+        keys.add(next(value for value in match.group('name', 'double', 'single', 'number') if value is not None))
+        last = match.end()
+        pos = _GAP.match(content, last).end()
+        if content[pos] in ':(':
+            # `key: value`, or a method `key() {...}`
+            last = _value_end(content, pos + 1 if content[pos] == ':' else pos, end)
+            if last is None:
+                return None
+            pos = _GAP.match(content, last).end()
+        trailing = None
+        if content[pos] == ',':
+            trailing = pos
+            pos = _GAP.match(content, pos + 1).end()
+        elif pos != end - 1:
+            return None
+    return keys, last, trailing
+
+
+def _value_end(content, pos, end):
+    """Offset just past the property value starting at pos, before any
+    trailing space or comment, or None"""
+    comments = []
+    while True:
+        match = _VALUE.search(content, pos, end)
+        if not match or match.lastgroup == 'unknown':
+            return None
+        if match.lastgroup == 'end':
+            break
+        if match.lastgroup == 'open':
+            pos = find_expression_end(content, match.start())
+            if pos is None or pos > end:
+                return None
+        else:
+            pos = match.end()
+            if match.lastgroup == 'comment':
+                comments.append(match.span())
+    value_end = match.start()
+    while True:
+        while content[value_end - 1] in ' \t\r\n':
+            value_end -= 1
+        if comments and comments[-1][1] == value_end:
+            value_end = comments.pop()[0]
+        else:
+            return value_end
+
+
+def _insertions(content, start, end, fields, defaults):
+    """([(offset, text), ...], fields added) completing the object literal
+    content[start:end], or None"""
+    scanned = object_keys(content, start, end)
+    if scanned is None:
+        return None
+    keys, last, trailing = scanned
+    missing = [field for field in fields if field not in keys]
+    if not missing:
+        return None
+    pairs = [f'{field}: {json.dumps(defaults[field])}' for field in missing]
+    if '\n' not in content[start:end]:
+        if not keys:
+            return [(start + 1, ' ' + ', '.join(pairs) + ' ')], len(pairs)
+        if trailing is not None:
+            return [(trailing + 1, ''.join(f' {pair},' for pair in pairs))], len(pairs)
+        return [(last, ''.join(f', {pair}' for pair in pairs))], len(pairs)
+    if not keys:
+        indent = _indent(content, content.rfind('\n', 0, start) + 1) + '  '
+        return [(start + 1, ''.join(f'\n{indent}{pair},' for pair in pairs))], len(pairs)
+    indent = _indent(content, content.rfind('\n', 0, last) + 1)
+    anchor = trailing + 1 if trailing is not None else last
+    # New lines go after a comment ending the last property's line
+    line_end = content.find('\n', anchor, end)
+    if line_end == -1 or _GAP.match(content, anchor, line_end).end() != line_end:
+        line_end = anchor
+    if trailing is not None:
+        return [(line_end, ''.join(f'\n{indent}{pair},' for pair in pairs))], len(pairs)
+    lines = ','.join(f'\n{indent}{pair}' for pair in pairs)
+    if line_end == last:
+        return [(last, ',' + lines)], len(pairs)
+    return [(last, ','), (line_end, lines)], len(pairs)
+
+
+def _indent(content, line_start):
+    pos = line_start
+    while pos < len(content) and content[pos] in ' \t':
+        pos += 1
+    return content[line_start:pos]
+
+
+def migrate_array(content, start, end, fields, defaults):
+    """New text of the array content[start:end] with fields added to its objects.
+
+    Returns (text, fields added), or None when nothing changes.
+    """
+    objects = array_objects(content, start, end)
+    if not objects:
+        return None
+    pieces = []
+    added = 0
+    last = start
+    for object_start, object_end in objects:
+        insertions = _insertions(content, object_start, object_end, fields, defaults)
+        if insertions is None:
+            continue
+        for offset, text in insertions[0]:
+            pieces.append(content[last:offset])
+            pieces.append(text)
+            last = offset
+        added += insertions[1]
+    if not pieces:
+        return None
+    pieces.append(content[last:end])
+    return ''.join(pieces), added
+
+
+def data_label(key):
+    """How the data edit of key is named in merge reports and journals (the
+    import header edit travels with the data edits under its own key)"""
+    return key if key == IMPORTS else f'{key} data'
+
+
+def fields_added(data):
+    """Fields the data edits of a page add"""
+    return sum(edit[4] for edit in data if edit[0] != IMPORTS)
+
+
+def merge_edits(content, edits, data):
+    """Grid edits and data edits, (key, start, end, replacement), as one list in file order.
+
+    A data edit inside a grid edit's span is the inline array of a grid
+    converted now, which the rendered grid carries verbatim; it is folded
+    into that grid's replacement. Data edits never partly overlap a grid
+    edit (Registry.migrate leaves those arrays alone).
+    """
+    merged = [list(edit) for edit in edits]
+    for key, start, end, replacement, _ in data:
+        host = next((edit for edit in merged if edit[1] <= start and end <= edit[2]), None)
+        if host is None:
+            merged.append([key, start, end, replacement])
+        else:
+            host[3] = host[3].replace(content[start:end], replacement, 1)
+    merged.sort(key=lambda edit: edit[1])
+    return [tuple(edit) for edit in merged]
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Diff Preview
+Unified diffs built from the spans the section matcher rewrites
+
+A dry run never assembles the converted file. Each rewritten span is widened
+to whole lines plus a few lines of context, and only that window is diffed,
+so the cost of a preview follows the size of the changes rather than the size
+of the file. Windows that touch are merged into one hunk, and each file's diff is
+written out as soon as it is ready, so only one file is held at a time.
+"""
+
+import difflib
+
+CONTEXT_LINES = 3
+NO_NEWLINE = '\\ No newline at end of file\n'
+
+
+def _back_lines(content, pos, count):
+    """Offset of the start of the line `count` lines above the line holding pos"""
+    pos = content.rfind('\n', 0, pos) + 1
+    for _ in range(count):
+        if pos == 0:
+            break
+        pos = content.rfind('\n', 0, pos - 1) + 1
+    return pos
+
+
+def _forward_lines(content, pos, count):
+    """Offset just past the line `count` lines below the line ending at or after pos"""
+    for _ in range(count + 1):
+        newline = content.find('\n', pos)
+        if newline == -1:
+            return len(content)
+        pos = newline + 1
+    return pos
+
+
+def _range(start, length):
+    """Hunk header range, as difflib writes it"""
+    if length == 1:
+        return str(start)
+    if length == 0:
+        start -= 1
+    return f'{start},{length}'
+
+
+def _diff_lines(tag, lines):
+    for line in lines:
+        yield tag + line
+        if not line.endswith('\n'):
+            yield '\n' + NO_NEWLINE
+
+
+def _window_hunks(old, new, old_line, new_line, context):
+    """Yield the hunks for one window whose first line is old_line/new_line (1-based)"""
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for group in matcher.get_grouped_opcodes(context):
+        i1, i2, j1, j2 = group[0][1], group[-1][2], group[0][3], group[-1][4]
+        yield (f'@@ -{_range(old_line + i1, i2 - i1)} '
+               f'+{_range(new_line + j1, j2 - j1)} @@\n')
+        for tag, a1, a2, b1, b2 in group:
+            if tag == 'equal':
+                yield from _diff_lines(' ', old_lines[a1:a2])
+                continue
+            yield from _diff_lines('-', old_lines[a1:a2])
+            yield from _diff_lines('+', new_lines[b1:b2])
+
+
+def span_hunks(content, edits, context=CONTEXT_LINES):
+    """Yield unified-diff hunk text for edits, (start, end, replacement) sorted by start"""
+    window = None  # [window_start, window_end, edits]
+    line = 1       # 1-based line number at `counted`
+    counted = 0
+    delta = 0      # lines added so far minus lines removed
+
+    def flush(window):
+        nonlocal line, counted, delta
+        start, end, spans = window
+        line += content.count('\n', counted, start)
+        counted = start
+        old = content[start:end]
+        pieces = []
+        last = start
+        for span_start, span_end, replacement in spans:
+            pieces.append(content[last:span_start])
+            pieces.append(replacement)
+            last = span_end
+        pieces.append(content[last:end])
+        new = ''.join(pieces)
+        yield from _window_hunks(old, new, line, line + delta, context)
+        delta += new.count('\n') - old.count('\n')
+
+    for start, end, replacement in edits:
+        window_start = _back_lines(content, start, context)
+        window_end = _forward_lines(content, end, context)
+        if window and window_start <= window[1]:
+            window[1] = window_end
+            window[2].append((start, end, replacement))
+            continue
+        if window:
+            yield from flush(window)
+        window = [window_start, window_end, [(start, end, replacement)]]
+    if window:
+        yield from flush(window)
+
+
+def file_diff(path, content, edits, context=CONTEXT_LINES):
+    """The unified diff of edits to path as one string ('' when nothing changes)"""
+    hunks = list(span_hunks(content, edits, context))
+    if not hunks:
+        return ''
+    return f'--- a/{path}\n+++ b/{path}\n' + ''.join(hunks)
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+File Watcher
+Report which watched files were saved, debounced, for campus_converter convert --watch
+
+A watcher follows a set of files, every .tsx file under a root directory, or
+both. On Linux it listens to inotify (through libc, no extra package), and
+elsewhere it polls os.stat every POLL_INTERVAL. Either way changes() blocks
+until something is saved, keeps collecting until no event has arrived for
+the debounce period (editors and formatters often write a file several times
+per save), and then returns only the files whose stat signature differs from
+the last one seen. Calling ignore() after the converter writes a file keeps
+that write from coming back as a change.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+# A burst of saves has settled once no event arrives for this long
+DEBOUNCE = 0.04
+# Stop waiting for a burst to settle after this long, so a busy file cannot starve the rest
+MAX_BURST = 1.0
+POLL_INTERVAL = 0.025
+
+# From <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+EVENT_HEADER = struct.Struct('iIII')
+
+
+def file_signature(path):
+    """(mtime, size, inode) of path, or None if it does not exist; an atomic rename changes the inode"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+def tsx_under(root):
+    """Every .tsx file under root, as paths joined onto root"""
+    found = []
+    for directory, dirs, names in os.walk(root):
+        dirs.sort()
+        found.extend(os.path.normpath(os.path.join(directory, name))
+                     for name in sorted(names) if name.endswith('.tsx'))
+    return found
+
+
+class Watcher:
+    """Debouncing and change filtering; subclasses report the paths that may have changed"""
+
+    backend = None
+
+    def __init__(self, files=(), root=None, debounce=DEBOUNCE):
+        self.files = {os.path.normpath(path) for path in files}
+        self.root = os.path.normpath(root) if root else None
+        self.debounce = debounce
+        self.known = {path: file_signature(path) for path in self.tracked()}
+
+    def tracked(self):
+        """Every file currently watched"""
+        paths = set(self.files)
+        if self.root:
+            paths.update(tsx_under(self.root))
+        return sorted(paths)
+
+    def under_root(self, path):
+        return bool(self.root) and (self.root == os.curdir or path.startswith(self.root + os.sep))
+
+    def wants(self, path):
+        return path in self.files or (path.endswith('.tsx') and self.under_root(path))
+
+    def watch(self, paths):
+        """Also follow paths from now on"""
+        for path in map(os.path.normpath, paths):
+            if path not in self.files:
+                self.files.add(path)
+                self.known.setdefault(path, file_signature(path))
+
+    def ignore(self, path):
+        """Take path's current state as seen, e.g. right after writing it"""
+        self.known[os.path.normpath(path)] = file_signature(path)
+
+    def changes(self, timeout=None):
+        """Block until watched files are saved and the burst settles.
+
+        Returns the saved files that still exist and really changed, sorted;
+        [] after timeout seconds without events, or when every event was a
+        write already passed to ignore().
+        """
+        pending = set(self._wait(timeout))
+        if not pending:
+            return []
+        settle_by = time.monotonic() + MAX_BURST
+        while time.monotonic() < settle_by:
+            more = self._wait(self.debounce)
+            if not more:
+                break
+            pending.update(more)
+        changed = []
+        for path in sorted(pending):
+            current = file_signature(path)
+            if current is not None and current != self.known.get(path):
+                changed.append(path)
+            self.known[path] = current
+        return changed
+
+    def _wait(self, timeout):
+        """Paths with events within timeout seconds (None: wait forever), or []"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class PollingWatcher(Watcher):
+    backend = 'polling'
+
+    def __init__(self, files=(), root=None, debounce=DEBOUNCE, interval=POLL_INTERVAL):
+        super().__init__(files, root, debounce)
+        self.interval = interval
+        self.seen = dict(self.known)
+
+    def watch(self, paths):
+        super().watch(paths)
+        for path in self.files:
+            self.seen.setdefault(path, self.known[path])
+
+    def _wait(self, timeout):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            current = {path: file_signature(path) for path in self.tracked()}
+            changed = [path for path, signature in current.items() if signature != self.seen.get(path)]
+            self.seen = current
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return []
+            time.sleep(self.interval)
+
+
+class InotifyWatcher(Watcher):
+    """Watches the directories holding the files (and every directory under root)"""
+
+    backend = 'inotify'
+
+    def __init__(self, libc, files=(), root=None, debounce=DEBOUNCE):
+        super().__init__(files, root, debounce)
+        self.libc = libc
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.directories = {}
+        self.watched = set()
+        for path in self.files:
+            self._add_watch(os.path.dirname(path) or os.curdir)
+        if self.root:
+            for directory, _, _ in os.walk(self.root):
+                self._add_watch(directory)
+
+    def watch(self, paths):
+        super().watch(paths)
+        for path in self.files:
+            self._add_watch(os.path.dirname(path) or os.curdir)
+
+    def _add_watch(self, directory):
+        if directory in self.watched:
+            return
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd >= 0:
+            self.directories[wd] = directory
+            self.watched.add(directory)
+
+    def _wait(self, timeout):
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        paths = []
+        data = self._read()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b'\0')
+            offset += EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped: every file may have changed
+                paths.extend(self.tracked())
+                continue
+            directory = self.directories.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.normpath(os.path.join(directory, os.fsdecode(name)))
+            if mask & IN_ISDIR:
+                if self.under_root(path):
+                    # Watch the new directory, and pick up files written before the watch existed
+                    for subdirectory, _, _ in os.walk(path):
+                        self._add_watch(subdirectory)
+                    paths.extend(tsx_under(path))
+                continue
+            if self.wants(path):
+                paths.append(path)
+        return paths
+
+    def _read(self):
+        chunks = []
+        while True:
+            try:
+                chunk = os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return b''.join(chunks)
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def _inotify_libc():
+    """libc with inotify_init1 and inotify_add_watch, or None where inotify is unavailable"""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+def make_watcher(files=(), root=None, debounce=DEBOUNCE, polling=False):
+    """An inotify watcher where available, otherwise a polling one"""
+    libc = None if polling else _inotify_libc()
+    if libc is not None:
+        try:
+            return InotifyWatcher(libc, files, root, debounce)
+        except OSError:
+            pass
+    return PollingWatcher(files, root, debounce)
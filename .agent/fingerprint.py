@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Section Fingerprints
+Tell converted, convertible and absent sections apart without the grid scanner
+
+Every card the converters write carries the same two markers, so a section is
+converted when both follow its map call before the next section's map call
+begins. Every map call and marker in a file is indexed up front with one
+str.find sweep per marker, and each section is then classified with a few
+bisects over those offsets.
+"""
+
+import bisect
+
+CONVERTED = 'converted'
+CONVERTIBLE = 'convertible'
+ABSENT = 'absent'
+
+# Written by templates/card_base.tsx into every converted card
+FINGERPRINT = (
+    'whileHover="hover"',
+    '{/* Animated Description - Drops down on Hover */}',
+)
+
+
+def markers(map_calls):
+    """Every map call in map_calls plus the fingerprint markers, without duplicates"""
+    return tuple(dict.fromkeys((*map_calls, *FINGERPRINT)))
+
+
+class MarkerIndex:
+    """Sorted offsets of every marker in content, found with str.find"""
+
+    def __init__(self, markers, content, sweep=None):
+        """Index markers (str) in content, a str or the bytes/mmap of a UTF-8 file.
+
+        Offsets are in content's own units and keyed by the str marker. With a
+        sweep (see mapped_io.Sweep) content is searched one window at a time
+        and the sweep is told as each window is finished.
+        """
+        binary = not isinstance(content, str)
+        name_chars = b'_$.' if binary else '_$.'
+        self.length = len(content)
+        self.offsets = {}
+        entries = []
+        for marker in markers:
+            # A collection map call must not be the tail of a longer name (`myprograms.map`)
+            check_name = marker not in FINGERPRINT and marker[0].isidentifier()
+            entries.append((marker, marker.encode() if binary else marker, check_name, []))
+
+        step = sweep.step if sweep else max(self.length, 1)
+        for window in range(0, self.length, step):
+            window_end = min(window + step, self.length)
+            for _, needle, check_name, found in entries:
+                # Only matches starting inside the window; each is found exactly once
+                limit = window_end + len(needle) - 1
+                pos = content.find(needle, window, limit)
+                while pos != -1:
+                    before = content[pos - 1:pos]
+                    if not (check_name and before and (before.isalnum() or before in name_chars)):
+                        found.append(pos)
+                    pos = content.find(needle, pos + 1, limit)
+            if sweep:
+                sweep.done(window_end)
+        for marker, _, _, found in entries:
+            if found:
+                self.offsets[marker] = found
+
+    def after(self, marker, pos):
+        """First offset of marker at or after pos, or None"""
+        offsets = self.offsets.get(marker, ())
+        i = bisect.bisect_left(offsets, pos)
+        return offsets[i] if i < len(offsets) else None
+
+    def classify(self, map_calls):
+        """State of each section, given as {key: map call}"""
+        boundaries = sorted(
+            offset
+            for call in set(map_calls.values())
+            for offset in self.offsets.get(call, ())
+        )
+        states = {}
+        for key, call in map_calls.items():
+            calls = self.offsets.get(call)
+            if not calls:
+                states[key] = ABSENT
+                continue
+            states[key] = CONVERTED
+            for offset in calls:
+                i = bisect.bisect_right(boundaries, offset)
+                limit = boundaries[i] if i < len(boundaries) else self.length
+                for marker in FINGERPRINT:
+                    found = self.after(marker, offset)
+                    if found is None or found >= limit:
+                        states[key] = CONVERTIBLE
+                        break
+                if states[key] == CONVERTIBLE:
+                    break
+        return states
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Git Changes
+The .tsx files changed since a git ref, so CI converts the handful of pages
+a branch touches instead of the whole tree
+
+One `git diff --name-only` against the ref (committed, staged and unstaged
+changes, deletions left out) and one `git ls-files --others` (new files not
+yet added) list the candidates; nothing is read or walked beyond that. Pass
+a merge base to get only the branch's own changes:
+
+    python .agent/campus_converter convert --since "$(git merge-base origin/main HEAD)"
+
+Usage:
+    python .agent/git_changes.py REF [DIR ...]     # list the changed .tsx files
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+# Where --since looks for changed pages, relative to the site root
+SINCE_DIRS = ('src/pages', 'src/components')
+
+
+def changed_tsx(ref, root, dirs=SINCE_DIRS):
+    """Sorted .tsx files under dirs (relative to root) that differ from ref or
+    are untracked, as paths relative to the working directory.
+
+    Raises RuntimeError if git fails (not a repository, unknown ref).
+    """
+    pathspecs = [os.path.relpath(os.path.join(root, directory), root) for directory in dirs]
+    changed = _git(root, 'diff', '--name-only', '-z', '--relative', '--diff-filter=d', ref, '--', *pathspecs)
+    untracked = _git(root, 'ls-files', '-z', '--others', '--exclude-standard', '--', *pathspecs)
+    paths = {os.path.relpath(os.path.join(root, name)) for name in changed + untracked if name.endswith('.tsx')}
+    return sorted(path for path in paths if os.path.isfile(path))
+
+
+def _git(root, *args):
+    """NUL-separated names printed by git args, run in root"""
+    try:
+        process = subprocess.run(['git', *args], cwd=root, capture_output=True, text=True)
+    except OSError as e:
+        raise RuntimeError(f"cannot run git: {e}") from None
+    if process.returncode != 0:
+        raise RuntimeError(process.stderr.strip() or f"git {args[0]} failed")
+    return [name for name in process.stdout.split('\0') if name]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List the .tsx files changed since a git ref")
+    parser.add_argument('ref', help="commit, branch or tag to compare the working tree with")
+    parser.add_argument('dirs', nargs='*', metavar='DIR',
+                        help=f"directories to look in (default: {', '.join(SINCE_DIRS)} under the site root)")
+    args = parser.parse_args(argv)
+
+    from section_registry import project_root
+    root = str(project_root())
+    try:
+        paths = changed_tsx(args.ref, root, [os.path.abspath(d) for d in args.dirs] or SINCE_DIRS)
+    except RuntimeError as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print("\n".join(paths))
+
+
+if __name__ == "__main__":
+    main()
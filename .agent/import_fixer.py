@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Import Fixer
+Add the imports a converted card needs to the page's import header, in the
+same write as the conversion, instead of by hand afterwards
+
+The new cards render `motion.div` and lucide icons (`<MapPin`, `icon: Award`)
+that a page converted by the scripts may not import. For each section that
+is converted, or converts now, the registry knows the names its markup uses;
+those neither imported nor declared in the page are merged into the header:
+
+  - into the named imports of an existing `import { ... } from "<module>"`,
+    keeping its layout (one line, or one name per line)
+  - after the default import of `import X from "<module>"`
+  - otherwise as a new statement after the last import, in the quotes and
+    semicolon style of the ones there
+
+Which module a name comes from is set by "imports" in templates/sections.json
+(`"*"` for every name not listed). The header is parsed once, with one regex
+per statement, and all of it becomes one edit that travels with the data
+edits, so it is spliced in the same pass as the grids. A memory-mapped page
+(--mmap) has only its first HEADER_BYTES decoded for the header; the rest
+of it is searched for declarations as bytes, window by window (declared()).
+"""
+
+import re
+
+# Key of the import header edit among a page's data edits
+IMPORTS = 'imports'
+
+# The import header of a mapped file is read from its first HEADER_BYTES
+HEADER_BYTES = 1 << 16
+
+# Longest `function   ` (keyword and spacing) looked for before a name a page may declare
+DECLARATION_SLACK = 64
+
+# One statement of the import header, or what may sit between them
+_HEADER = re.compile(
+    r'\s*(?:(?P<import>import\s+(?P<type>type\s+)?(?P<clause>[^;\'"]*?)\s*from\s*'
+    r'(?P<quote>[\'"])(?P<module>[^\'"]*)(?P=quote))(?P<semicolon>\s*;)?'
+    r'|import\s*[\'"][^\'"]*[\'"]\s*;?'
+    r'|[\'"]use [a-z]+[\'"]\s*;?'
+    r'|//[^\n]*|/\*[\s\S]*?\*/)'
+)
+_IDENTIFIER = re.compile(r'[A-Za-z_$][\w$]*')
+_DECLARATION = r'\b(?:const|let|var|function|class)\s+'
+# A name declared in code (const, let, var, function or class), in group 1
+DECLARED = re.compile(_DECLARATION + r'([A-Za-z_$][\w$]*)')
+# Components markup renders: capitalized tags and the object of member tags (motion.div)
+COMPONENT = re.compile(r'<([A-Z][\w$]*|[A-Za-z_$][\w$]*(?=\.))')
+# A capitalized name given as an object value (`icon: Award,`)
+_VALUE = re.compile(r':\s*([A-Z][\w$]*)\s*[,}\n]')
+_STRING = re.compile(r'"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\'|`(?:[^`\\]|\\[\s\S])*`')
+
+
+def parse_header(content):
+    """The import statements at the top of content, in order, and where the header ends.
+
+    Returns ([statement, ...], end offset); a statement is a dict with its
+    span, module, quote, whether it ends with `;`, its clause span and the
+    span of its `{ ... }`, or None.
+    """
+    statements = []
+    pos = end = 0
+    while True:
+        match = _HEADER.match(content, pos)
+        if not match or match.end() == pos:
+            return statements, end
+        pos = end = match.end()
+        if not match.group('import'):
+            continue
+        clause_start = match.start('clause')
+        clause = match.group('clause')
+        braces = re.search(r'\{[^}]*\}', clause)
+        statements.append({
+            'start': match.start('import'),
+            'end': match.end(),
+            'module': match.group('module'),
+            'type': bool(match.group('type')),
+            'quote': match.group('quote'),
+            'semicolon': bool(match.group('semicolon')),
+            'clause': (clause_start, match.end('clause')),
+            'braces': (clause_start + braces.start(), clause_start + braces.end()) if braces else None,
+        })
+
+
+def import_names(content, statements=None):
+    """Names bound by the import header at the top of content"""
+    if statements is None:
+        statements, _ = parse_header(content)
+    names = set()
+    for statement in statements:
+        clause = content[slice(*statement['clause'])]
+        braces = re.search(r'\{([^}]*)\}', clause)
+        if braces:
+            for item in braces.group(1).split(','):
+                words = item.split()
+                if words and words[0] == 'type':
+                    words = words[1:]
+                if words:
+                    names.add(words[-1])
+            clause = clause[:braces.start()] + clause[braces.end():]
+        for item in clause.split(','):
+            found = _IDENTIFIER.findall(item)
+            if found:
+                # `Default` or `* as Namespace`
+                names.add(found[-1])
+    return names
+
+
+def header_window(content):
+    """The text holding content's import header: content itself if a str, else
+    the decoded first HEADER_BYTES of the bytes/mmap of a UTF-8 file, cut at
+    a line end so no character is split"""
+    if isinstance(content, str):
+        return content
+    window = bytes(content[:HEADER_BYTES])
+    if len(content) > HEADER_BYTES:
+        window = window[:window.rfind(b'\n') + 1]
+    return window.decode('utf-8')
+
+
+def is_declared(content, name):
+    """Whether content declares name (const, let, var, function or class)"""
+    return declaration((name,), not isinstance(content, str)).search(content) is not None
+
+
+def declaration(names, binary=False):
+    """Pattern matching a declaration (const, let, var, function or class) of
+    any of names, the name in group 1; compiled for bytes with binary"""
+    pattern = _DECLARATION + '(' + '|'.join(map(re.escape, names)) + r')\b'
+    return re.compile(pattern.encode() if binary else pattern)
+
+
+def declared(content, names, sweep=None):
+    """The names content (str, or the bytes/mmap of a UTF-8 file) declares.
+
+    Each name is found with find(), which is far quicker than a regex over
+    the whole mapping, and only its occurrences are matched against the
+    declaration pattern; with a sweep (see mapped_io.Sweep) the mapping is
+    walked one window at a time, its pages dropped behind it.
+    """
+    binary = not isinstance(content, str)
+    patterns = {name: (name.encode() if binary else name, declaration((name,), binary)) for name in names}
+    found = set()
+    length = len(content)
+    pos = 0
+    while pos < length and len(found) < len(patterns):
+        window_end = min(pos + (sweep.step if sweep else length), length)
+        for name, (encoded, pattern) in patterns.items():
+            # Occurrences starting inside the window
+            at = -1 if name in found else content.find(encoded, pos, window_end + len(encoded) - 1)
+            while at != -1:
+                if any(match.start(1) == at for match in
+                       pattern.finditer(content, max(0, at - DECLARATION_SLACK), at + len(encoded) + 1)):
+                    found.add(name)
+                    break
+                at = content.find(encoded, at + 1, window_end + len(encoded) - 1)
+        if sweep:
+            # The next window looks back DECLARATION_SLACK bytes; dropping those
+            # pages would have them read in again, and never dropped
+            sweep.done(window_end - DECLARATION_SLACK)
+        pos = window_end
+    return found
+
+
+def used_names(markup):
+    """Names markup needs from outside, in order of first use: the components
+    it renders and capitalized object values, less the ones it declares"""
+    declared = set(DECLARED.findall(markup))
+    code = _STRING.sub('""', markup)
+    found = COMPONENT.findall(code) + _VALUE.findall(code)
+    return tuple(name for name in dict.fromkeys(found) if name not in declared)
+
+
+def import_edit(content, names, sources):
+    """(start, end, replacement, names added) adding the names the header
+    lacks, or None; sources maps a name (or "*") to its module"""
+    statements, header_end = parse_header(content)
+    imported = import_names(content, statements)
+    missing = {}
+    for name in names:
+        module = sources.get(name, sources.get('*'))
+        if module and name not in imported and not is_declared(content, name):
+            missing.setdefault(module, []).append(name)
+    if not missing:
+        return None
+
+    insertions = []
+    new_statements = []
+    for module, added in missing.items():
+        target = next((statement for statement in statements
+                       if statement['module'] == module and not statement['type']
+                       and statement['braces']), None)
+        if target:
+            insertions.append(_into_braces(content, target['braces'], added))
+            continue
+        target = next((statement for statement in statements
+                       if statement['module'] == module and not statement['type']
+                       and '*' not in content[slice(*statement['clause'])]), None)
+        if target:
+            insertions.append((target['clause'][1], ', { ' + ', '.join(added) + ' }'))
+        else:
+            new_statements.append((module, added))
+    if new_statements:
+        quote = statements[0]['quote'] if statements else '"'
+        semicolon = ';' if not statements or statements[-1]['semicolon'] else ''
+        lines = ''.join(f'\nimport {{ {", ".join(added)} }} from {quote}{module}{quote}{semicolon}'
+                        for module, added in new_statements)
+        if header_end == 0:
+            insertions.append((0, lines[1:] + '\n'))
+        else:
+            insertions.append((statements[-1]['end'] if statements else header_end, lines))
+
+    insertions.sort()
+    # The edit spans the statements it touches, so a merge can find it by its text
+    start = max((statement['start'] for statement in statements if statement['start'] <= insertions[0][0]),
+                default=insertions[0][0])
+    end = min((statement['end'] for statement in statements if statement['end'] >= insertions[-1][0]),
+              default=insertions[-1][0])
+    pieces = []
+    last = start
+    for offset, text in insertions:
+        pieces.append(content[last:offset])
+        pieces.append(text)
+        last = offset
+    pieces.append(content[last:end])
+    return start, end, ''.join(pieces), sum(len(added) for added in missing.values())
+
+
+def _into_braces(content, braces, added):
+    """(offset, text) appending added to the named imports between braces"""
+    open_brace, close_brace = braces[0], braces[1] - 1
+    inner = content[open_brace + 1:close_brace]
+    body = inner.rstrip()
+    offset = open_brace + 1 + len(body)
+    if not body.strip():
+        return offset, ' ' + ', '.join(added) + ' '
+    trailing = body.endswith(',')
+    if '\n' in inner:
+        last_line = body[body.rfind('\n') + 1:]
+        indent = last_line[:len(last_line) - len(last_line.lstrip())]
+        lines = ''.join(f'\n{indent}{name},' for name in added)
+        return offset, lines if trailing else ',' + lines[:-1]
+    text = ''.join(f' {name},' for name in added)
+    return offset, text if trailing else ',' + text[:-1]
+
+
+def imports_added(data):
+    """Names the import edit among a page's data edits adds"""
+    return sum(edit[4] for edit in data if edit[0] == IMPORTS)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Converter Instrumentation
+Per-phase timers and counters for a conversion run, plus an optional profiler
+
+Code under measurement records into the process-wide STATS object:
+
+    with STATS.phase('read'):
+        content = f.read()
+    STATS.add('bytes_read', len(data))
+
+Phases accumulate wall time, counters accumulate integers, and both are
+cheap enough to leave on. Worker processes send STATS.snapshot() back with
+their results (see Stats.collect) and the parent merges them, so a --tree
+run reports the time summed over every worker. Python's re module does not
+expose regex steps or backtracking, so the JSX scanner counts the tokens it
+visits instead, and that count is folded into the snapshot.
+
+profile_call() runs a function under cProfile and tracemalloc and writes a
+report sorted by cumulative time, with the peak traced memory and the top
+allocation sites.
+"""
+
+import contextlib
+import io
+import json
+import sys
+import time
+
+import jsx_scanner
+
+
+class Stats:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.phases = {}
+        self.counters = {}
+        self.started = time.perf_counter()
+        jsx_scanner.counters.update(dict.fromkeys(jsx_scanner.counters, 0))
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Add the wall time of the with-block to phase name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    @contextlib.contextmanager
+    def collect(self):
+        """Record into fresh counters for the with-block; the target dict receives their snapshot.
+
+        The counters in place before the block are restored afterwards, so
+        merging the snapshot back counts the block exactly once whether it ran
+        in this process or in a worker.
+        """
+        saved = self.phases, self.counters, dict(jsx_scanner.counters)
+        self.phases, self.counters = {}, {}
+        jsx_scanner.counters.update(dict.fromkeys(jsx_scanner.counters, 0))
+        snapshot = {}
+        try:
+            yield snapshot
+        finally:
+            snapshot.update(self.snapshot())
+            self.phases, self.counters = saved[0], saved[1]
+            jsx_scanner.counters.update(saved[2])
+
+    def add_time(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def add(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def snapshot(self):
+        """Phases and counters recorded so far in this process, scanner counters included"""
+        counters = dict(self.counters)
+        for name, value in jsx_scanner.counters.items():
+            if value:
+                counters[f'scanner_{name}'] = counters.get(f'scanner_{name}', 0) + value
+        return {'phases': dict(self.phases), 'counters': counters}
+
+    def merge(self, snapshot):
+        """Add a snapshot taken in another process"""
+        for name, seconds in snapshot['phases'].items():
+            self.add_time(name, seconds)
+        for name, value in snapshot['counters'].items():
+            self.add(name, value)
+
+    def as_dict(self, **extra):
+        data = self.snapshot()
+        data['wall_seconds'] = time.perf_counter() - self.started
+        data.update(extra)
+        return data
+
+    def write_json(self, path, **extra):
+        """Write the stats, plus any extra fields, to path as JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.as_dict(**extra), f, indent=2, sort_keys=True)
+            f.write('\n')
+
+    def print_summary(self, file=sys.stdout):
+        data = self.snapshot()
+        print("\n⏱️  Phases:", file=file)
+        for name, seconds in sorted(data['phases'].items(), key=lambda item: -item[1]):
+            print(f"  {name:<16} {seconds * 1000:>10.2f} ms", file=file)
+        print("🔢 Counters:", file=file)
+        for name, value in sorted(data['counters'].items()):
+            print(f"  {name:<22} {value:>10}", file=file)
+
+
+STATS = Stats()
+
+
+def profile_call(func, *args, out=sys.stderr, limit=25):
+    """Run func(*args) under cProfile and tracemalloc, then write a sorted report to out.
+
+    Returns func's result; the peak traced memory is also recorded in STATS.
+    The profilers are only imported here, so runs without --profile skip them.
+    """
+    import cProfile
+    import pstats
+    import tracemalloc
+
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    try:
+        result = profiler.runcall(func, *args)
+    finally:
+        current, peak = tracemalloc.get_traced_memory()
+        top = tracemalloc.take_snapshot().statistics('lineno')[:10]
+        tracemalloc.stop()
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats('cumulative').print_stats(limit)
+        print("\n" + "="*70, file=out)
+        print(f"🔬 PROFILE  (top {limit} by cumulative time)", file=out)
+        print("="*70, file=out)
+        print(report.getvalue(), file=out)
+        print(f"🧠 Traced memory: peak {peak / 1024:.1f} KiB, still held {current / 1024:.1f} KiB", file=out)
+        for stat in top:
+            print(f"  {stat.size / 1024:>9.1f} KiB  {stat.traceback}", file=out)
+        STATS.counters['peak_traced_bytes'] = peak
+    return result
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Brace-aware JSX scanner
+Finds the exact extent of a `{xxx.map(...)}` grid in one linear scan
+
+The converters used to locate a grid with a lazy `[\\s\\S]*?\\}\\)\\}\\s*</div>`
+regex. That backtracks over the rest of the file and stops at the first `})}`,
+which is often a nested map. This scanner walks the source once, skipping
+strings, template literals and comments, and tracks `{}`/`()`/`[]` depth and
+JSX element depth so the closing `}` of the map expression is the real one.
+"""
+
+import re
+
+
+# Significant tokens per scanner mode. Strings and comments are consumed by the
+# regex itself, so the Python loop only runs once per bracket, tag or quote.
+# A quote left over is a string that never ends.
+_JS_TOKENS = (
+    r'(?P<string>"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\')'
+    r'|(?P<comment>//[^\n]*|/\*[\s\S]*?\*/)'
+    r'|(?P<template>`)'
+    r'|(?P<open>[{(\[])'
+    r'|(?P<close>[})\]])'
+    r'|(?P<tag><(?=[A-Za-z>/]))'
+    r'|(?P<quote>["\'])'
+)
+_TEMPLATE_TOKENS = r'\\[\s\S]|(?P<end>`)|(?P<open>\$\{)'
+_TAG_TOKENS = r'(?P<string>"[^"]*"|\'[^\']*\')|(?P<open>\{)|(?P<self_close>/>)|(?P<end>>)'
+_CHILDREN_TOKENS = r'(?P<open>\{)|(?P<close_tag></[^>]*>)|(?P<tag><(?=[A-Za-z>]))'
+_CLOSE_TAG = r'</[^>]*>'
+_TAG_NAME = r'</?\s*([A-Za-z_$][\w$.:-]*)?'
+_GRID_CLOSE = r'\s*</div>'
+_INLINE_OPEN = re.compile(r'<div className="(?P<grid>[^"]*)">\s*(?P<brace>\{)\s*\[')
+
+# Literal start of every grid head; regex-safe as is, so heads can share it
+GRID_OPEN = '<div className="'
+
+# Characters after which `<` starts a JSX element rather than a comparison
+_JSX_LEADS = '(,=?:&|[{}>!'
+_SPACE = ' \t\r\n'
+_PAIRS = {'{': '}', '(': ')', '[': ']'}
+
+
+class _Syntax:
+    """The scanner's patterns and literals compiled for str, or for bytes/mmap input"""
+
+    def __init__(self, encode):
+        self.js_tokens = re.compile(encode(_JS_TOKENS))
+        self.template_tokens = re.compile(encode(_TEMPLATE_TOKENS))
+        self.tag_tokens = re.compile(encode(_TAG_TOKENS))
+        self.children_tokens = re.compile(encode(_CHILDREN_TOKENS))
+        self.close_tag = re.compile(encode(_CLOSE_TAG))
+        self.tag_name = re.compile(encode(_TAG_NAME))
+        self.grid_close = re.compile(encode(_GRID_CLOSE))
+        self.jsx_leads = encode(_JSX_LEADS)
+        self.space = encode(_SPACE)
+        self.return_keyword = encode('return')
+        self.closing = encode('</')
+
+
+_STR_SYNTAX = _Syntax(str)
+_BYTES_SYNTAX = _Syntax(str.encode)
+
+
+def _syntax(text):
+    return _STR_SYNTAX if isinstance(text, str) else _BYTES_SYNTAX
+
+
+# Frame kinds on the scanner stack
+JS, TEMPLATE, JSX, TAG = range(4)
+
+# Work done by find_expression_end in this process, read by instrumentation.py
+counters = {'expressions': 0, 'tokens': 0}
+
+
+class ScanError(ValueError):
+    """Unbalanced input found by a strict scan(): what is wrong at offset, and
+    the offset of the bracket or element it concerns, if any"""
+
+    def __init__(self, offset, message, opened=None):
+        self.offset = offset
+        self.opened = opened
+        super().__init__(message)
+
+
+def _starts_jsx(text, pos, syntax):
+    """Decide whether the `<` at text[pos] opens a JSX element"""
+    # Slices rather than indexing, so bytes and mmap input compare like str
+    i = pos - 1
+    while i >= 0 and text[i:i + 1] in syntax.space:
+        i -= 1
+    if i < 0 or text[i:i + 1] in syntax.jsx_leads:
+        return True
+    return text[max(0, i - 5):i + 1] == syntax.return_keyword
+
+
+def find_expression_end(text, pos):
+    """Return the offset just past the bracket that closes the `{`, `(` or `[` at text[pos].
+
+    text can be a str, or bytes or an mmap of UTF-8 source. Returns None
+    if the expression is not closed before the end of text.
+    """
+    return scan(text, pos + 1, [[JS, text[pos:pos + 1], pos]])
+
+
+def scan(text, pos, stack, strict=False):
+    """Walk text from pos until the frames on stack are all closed; returns
+    the offset just past the last one, or None if text ends first.
+
+    Each frame is [kind, opener, offset]: a JS frame per open bracket, a TAG
+    frame per tag being read, which becomes the JSX frame of its element's
+    children at its `>`, and a TEMPLATE frame per template literal. A JS or
+    JSX frame whose opener is None is a root that is never closed: a strict
+    walk then goes to the end of text and leaves what is still open on stack. Strings,
+    template literals and comments are skipped, JSX text is told apart from
+    JS. With strict a bracket closed by another kind, a closing tag that
+    does not match its element and a string that never ends raise
+    ScanError; element names are only read then.
+    """
+    syntax = _syntax(text)
+    js_tokens = syntax.js_tokens
+    template_tokens = syntax.template_tokens
+    tag_tokens = syntax.tag_tokens
+    children_tokens = syntax.children_tokens
+    end = len(text)
+    steps = 0
+    try:
+        while stack:
+            steps += 1
+            frame = stack[-1]
+            kind = frame[0]
+
+            if kind == JS:
+                match = js_tokens.search(text, pos)
+                if not match:
+                    return None
+                token = match.lastgroup
+                pos = match.end()
+                if token == 'open':
+                    stack.append([JS, match.group(), match.start()])
+                elif token == 'close':
+                    if strict:
+                        opener = _text(frame[1])
+                        if not opener:
+                            raise ScanError(match.start(), f"unexpected `{_text(match.group())}`")
+                        if _PAIRS[opener] != _text(match.group()):
+                            raise ScanError(match.start(), f"`{_text(match.group())}` closes `{opener}`", frame[2])
+                    stack.pop()
+                elif token == 'template':
+                    stack.append([TEMPLATE, None, match.start()])
+                elif token == 'tag' and _starts_jsx(text, match.start(), syntax):
+                    pos = _enter_tag(text, match.start(), stack, syntax, strict)
+                    if pos is None:
+                        return None
+                elif token == 'quote' and strict:
+                    raise ScanError(match.start(), "unterminated string")
+
+            elif kind == TEMPLATE:
+                match = template_tokens.search(text, pos)
+                if not match:
+                    return None
+                pos = match.end()
+                if match.lastgroup == 'end':
+                    stack.pop()
+                elif match.lastgroup == 'open':
+                    stack.append([JS, match.group()[-1:], match.start()])
+
+            elif kind == TAG:
+                match = tag_tokens.search(text, pos)
+                if not match:
+                    return None
+                token = match.lastgroup
+                pos = match.end()
+                if token == 'open':
+                    stack.append([JS, match.group(), match.start()])
+                elif token == 'self_close':
+                    stack.pop()
+                elif token == 'end':
+                    frame[0] = JSX
+
+            else:  # JSX children
+                match = children_tokens.search(text, pos)
+                if not match:
+                    # A closing tag cut off by the end of text is still one
+                    cut = text.find(syntax.closing, pos) if strict else -1
+                    if cut >= 0:
+                        _check_close(text, cut, frame, syntax)
+                    return None
+                token = match.lastgroup
+                if token == 'open':
+                    pos = match.end()
+                    stack.append([JS, match.group(), match.start()])
+                elif token == 'close_tag':
+                    pos = match.end()
+                    if strict:
+                        _check_close(text, match.start(), frame, syntax)
+                    stack.pop()
+                else:
+                    pos = _enter_tag(text, match.start(), stack, syntax, strict)
+
+            if pos > end:
+                return None
+        return pos
+    finally:
+        counters['expressions'] += 1
+        counters['tokens'] += steps
+
+
+def _enter_tag(text, pos, stack, syntax, strict):
+    """Push the frame for the tag starting at text[pos]; return the new offset"""
+    if text[pos:pos + 2] == syntax.closing:
+        # A closing tag while in JS mode only happens in malformed input
+        match = syntax.close_tag.match(text, pos)
+        if strict:
+            raise ScanError(pos, f"unexpected </{_tag_name(text, pos, syntax)}>")
+        return match.end() if match else None
+    stack.append([TAG, _tag_name(text, pos, syntax) if strict else None, pos])
+    return pos + 1
+
+
+def _check_close(text, pos, frame, syntax):
+    """Raise ScanError unless the closing tag at text[pos] ends the element of frame"""
+    name = _tag_name(text, pos, syntax)
+    if frame[1] is None:
+        raise ScanError(pos, f"unexpected </{name}>")
+    if frame[1] != name:
+        raise ScanError(pos, f"</{name}> closes <{frame[1]}>", frame[2])
+
+
+def _tag_name(text, pos, syntax):
+    return _text(syntax.tag_name.match(text, pos).group(1) or '')
+
+
+def _text(value):
+    return value if value is None or isinstance(value, str) else bytes(value).decode('utf-8')
+
+
+def grid_head(grid_class, collection, item):
+    """Build the pattern for a grid opener up to (not including) its `{collection.map(` brace.
+
+    With collection None the grid maps over an inline array literal, `{[...].map(...)}`;
+    the iterator can only be checked once the end is known, see inline_map_marker().
+    Every head starts with the literal GRID_OPEN.
+    """
+    if collection is None:
+        return rf'{GRID_OPEN}{re.escape(grid_class)}">\s*(?=\{{\s*\[)'
+    return (
+        rf'{GRID_OPEN}{re.escape(grid_class)}">\s*'
+        rf'(?=\{{{re.escape(collection)}\.map\(\({re.escape(item)}, index\))'
+    )
+
+
+def inline_map_marker(item):
+    """Text that must occur inside an inline-array grid mapping with `item`"""
+    return f'].map(({item}, index)'
+
+
+def map_call_marker(collection, item):
+    """Text of the map call that opens a grid's cards, converted or not"""
+    if collection is None:
+        return inline_map_marker(item)
+    return f'{collection}.map(({item}, index)'
+
+
+def inline_grid(text, bracket_end):
+    """(brace, grid className) of the `<div ...>{[` whose array closes at
+    text[bracket_end], or (None, None); str text only"""
+    start = text.rfind(GRID_OPEN, 0, bracket_end)
+    while start != -1:
+        match = _INLINE_OPEN.match(text, start, bracket_end)
+        if match and find_expression_end(text, match.end() - 1) == bracket_end + 1:
+            return match.start('brace'), match.group('grid')
+        start = text.rfind(GRID_OPEN, 0, start)
+    return None, None
+
+
+def grid_end(text, brace_pos):
+    """Return the offset just past the `</div>` closing a grid whose map starts at brace_pos"""
+    expression_end = find_expression_end(text, brace_pos)
+    if expression_end is None:
+        return None
+    match = _syntax(text).grid_close.match(text, expression_end)
+    return match.end() if match else None
+
+
+def find_grid(text, head, start=0):
+    """Find the first complete grid matching the compiled head pattern.
+
+    Returns (start, end) offsets of the whole `<div ...>{...map(...)}</div>`
+    block, or None if there is none.
+    """
+    pos = start
+    while True:
+        match = head.search(text, pos)
+        if not match:
+            return None
+        end = grid_end(text, match.end())
+        if end is not None:
+            return match.start(), end
+        pos = match.end()
+
+
+def replace_grid(text, head, replacement):
+    """Replace the first grid matching head, like re.sub(..., count=1)"""
+    span = find_grid(text, head)
+    if span is None:
+        return text
+    return text[:span[0]] + replacement + text[span[1]:]
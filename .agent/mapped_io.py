@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped Conversion
+Convert a page without reading it into a Python str
+
+The file is mapped read-only and everything works on the mapping as bytes:
+the fingerprint index, the grid scanner and the JSX scanner all accept
+bytes-like input. The output is streamed to the transaction's temp file as
+memoryview slices of the mapping for the unchanged ranges and the encoded
+templates for the rewritten spans, so no second copy of the file is ever
+built. Only the rendered grids and the decoded import header (see
+import_fixer.header_window) live on the Python heap.
+
+Every pass over the mapping (hashing, the fingerprint index, the grid scan
+and the output stream) goes one BLOCK_SIZE window at a time, and the pages
+behind the window are dropped from the process with madvise(MADV_DONTNEED).
+Resident memory therefore stays around one window no matter how large the
+file is; the kernel keeps the pages in its page cache, so the next pass
+faults them back in cheaply.
+"""
+
+import contextlib
+import hashlib
+import mmap
+import os
+import time
+
+from fingerprint import CONVERTIBLE
+from instrumentation import STATS
+
+# Every pass reads or writes the mapping in windows of this size, dropping the pages behind
+BLOCK_SIZE = 1 << 20
+
+
+@contextlib.contextmanager
+def mapped(filepath):
+    """Read-only mapping of filepath; an empty file, which cannot be mapped, gives b''"""
+    with open(filepath, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        STATS.add('bytes_read', size)
+        STATS.add('files_read')
+        if size == 0:
+            yield b''
+            return
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            _advise(mm, getattr(mmap, 'MADV_SEQUENTIAL', None))
+            yield mm
+        finally:
+            mm.close()
+
+
+def _advise(mm, option, start=0, length=None):
+    """madvise where the platform supports it"""
+    if option is None or not isinstance(mm, mmap.mmap) or not hasattr(mm, 'madvise'):
+        return
+    if length is None:
+        length = len(mm) - start
+    if length > 0:
+        mm.madvise(option, start, length)
+
+
+def release(mm, start=0, end=None):
+    """Drop the resident pages of mm[start:end] from this process (rounded inward to whole pages)"""
+    option = getattr(mmap, 'MADV_DONTNEED', None)
+    end = len(mm) if end is None else min(end, len(mm))
+    start = -(-start // mmap.PAGESIZE) * mmap.PAGESIZE
+    end = end if end == len(mm) else end // mmap.PAGESIZE * mmap.PAGESIZE
+    _advise(mm, option, start, end - start)
+
+
+class Sweep:
+    """Walks a mapping in BLOCK_SIZE windows, dropping the pages behind the current one"""
+
+    step = BLOCK_SIZE
+
+    def __init__(self, mm):
+        self.mm = mm
+        self.released = 0
+
+    def done(self, offset):
+        """Everything before offset has been read"""
+        if offset - self.released >= BLOCK_SIZE:
+            release(self.mm, self.released, offset)
+            self.released = offset // mmap.PAGESIZE * mmap.PAGESIZE
+
+    def finish(self):
+        """End of a pass: drop whatever is still resident and start over"""
+        release(self.mm)
+        self.released = 0
+
+
+def mapped_digest(mm):
+    """sha256 of the mapped bytes, hashed straight from the mapping"""
+    sweep = Sweep(mm)
+    digest = hashlib.sha256()
+    with STATS.phase('hash'):
+        with memoryview(mm) as view:
+            for block in range(0, len(mm), BLOCK_SIZE):
+                with view[block:block + BLOCK_SIZE] as chunk:
+                    digest.update(chunk)
+                sweep.done(block + BLOCK_SIZE)
+    sweep.finish()
+    return digest.hexdigest()
+
+
+def plan_mapped(registry, mm, keys):
+    """Classify keys on the mapping and locate the convertible sections.
+
+    Returns the state of every key, the edits, (key, start, end, replacement
+    bytes) in file order, and the seconds spent locating and rendering each
+    edit, like Registry.plan.
+    """
+    sweep = Sweep(mm)
+    states = registry.classify(mm, keys, sweep)
+    sweep.finish()
+    pending = [key for key in keys if states[key] == CONVERTIBLE]
+    edits, seconds = [], []
+    if pending:
+        with STATS.phase('convert'):
+            start = time.perf_counter()
+            for edit in registry.edits(mm, pending, sweep):
+                now = time.perf_counter()
+                edits.append(edit)
+                seconds.append(now - start)
+                start = now
+        STATS.add('sections_converted', len(edits))
+        sweep.finish()
+    return states, edits, seconds
+
+
+def imports_mapped(registry, mm, keys, states, edits):
+    """Registry.fix_imports on the mapping: the import header edit as a data
+    edit with byte offsets, in a list, or []; the mapping is searched for
+    declarations window by window"""
+    sweep = Sweep(mm)
+    data = registry.fix_imports(mm, keys, states, edits, sweep)
+    sweep.finish()
+    return data
+
+
+def stream_edits(mm, edits):
+    """Yield the converted file as chunks: mapping slices around each replacement"""
+    sweep = Sweep(mm)
+    with memoryview(mm) as view:
+        last = 0
+        for _, start, end, replacement in edits:
+            yield from _blocks(view, last, start, sweep)
+            yield replacement
+            last = end
+        yield from _blocks(view, last, len(mm), sweep)
+    sweep.finish()
+
+
+def _blocks(view, start, end, sweep):
+    """Yield view[start:end] in BLOCK_SIZE pieces, dropping pages once written"""
+    for block in range(start, end, BLOCK_SIZE):
+        block_end = min(block + BLOCK_SIZE, end)
+        with view[block:block_end] as chunk:
+            yield chunk
+        sweep.done(block_end)
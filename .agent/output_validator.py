@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Output Validator
+Check converted output before it is written, instead of finding out when the
+Vite build fails
+
+Only the rewritten spans and the import header are looked at:
+
+  - balance: the text each edit removes and the text it puts in are both
+    scanned for matching tags, braces, parens and brackets (strings,
+    template literals and comments skipped, JSX text and attributes told
+    apart from JS). If both sides are balanced the file's balance is what it
+    was before; a grid located too short (a lazy match stopping at a nested
+    `})}`) shows up as a removed span that does not balance.
+  - imports: every component the new markup renders (`<MapPin`, `<motion.div`,
+    `<IconComponent`) must be imported in the file's import header (parsed
+    by import_fixer.py) or declared, in the markup itself or, failing that,
+    anywhere in the file.
+
+Each check is one linear pass over the span. Outputs that passed are
+remembered by their sha256 in .agent/.verify_cache.json, so output that has
+been checked once is not checked again.
+"""
+
+import json
+import os
+from pathlib import Path
+
+from import_fixer import COMPONENT, DECLARED, declared, header_window, import_names
+from jsx_scanner import JS, JSX, TEMPLATE, ScanError, scan
+
+VERIFY_CACHE_PATH = Path(__file__).with_name('.verify_cache.json')
+VERIFY_CACHE_VERSION = 1
+# Oldest entries are dropped beyond this many
+VERIFY_CACHE_SIZE = 50000
+
+
+class ValidationError(ValueError):
+    """Converted output failed validation; problems lists (key, message)"""
+
+    def __init__(self, problems):
+        self.problems = problems
+        super().__init__("converted output is not valid TSX: "
+                         + "; ".join(f"{key}: {message}" for key, message in problems))
+
+
+def balance_error(text):
+    """None if text is balanced JSX/TS, else what is wrong and where.
+
+    Text starting with `<` is read as JSX children (a grid), anything else as
+    an expression (a data array).
+    """
+    # The root frame has no opener, so the scan goes to the end of text
+    stack = [[JSX if text.lstrip().startswith('<') else JS, None, 0]]
+    try:
+        scan(text, 0, stack, strict=True)
+    except ScanError as e:
+        if e.opened is None:
+            return _at(text, e.offset, str(e))
+        return _at(text, e.offset, f"{e} from line {_line(text, e.opened)}")
+    if len(stack) > 1:
+        kind, opener, start = stack[-1]
+        what = {JS: f"`{opener}`", TEMPLATE: "template literal"}.get(kind, f"<{opener}>")
+        return _at(text, start, f"{what} is never closed")
+    return None
+
+
+def _line(text, pos):
+    return text.count('\n', 0, pos) + 1
+
+
+def _at(text, pos, message):
+    return f"line {_line(text, pos)}: {message}"
+
+
+def validate(content, fragments, sweep=None):
+    """Problems, as (key, message), in the fragments of a converted file.
+
+    fragments are (key, removed text, inserted text) str triples. content
+    is the file (str, or the bytes/mmap of a UTF-8 file) whose import header
+    and declarations the inserted markup may rely on, along with the names
+    an inserted import header edit brings. A mapping is searched for
+    declarations window by window with sweep (see mapped_io.Sweep).
+    """
+    problems = []
+    used = {}
+    for key, removed, inserted in fragments:
+        error = balance_error(removed)
+        if error:
+            problems.append((key, f"the replaced text does not balance ({error})"))
+        error = balance_error(inserted)
+        if error:
+            problems.append((key, f"the new text does not balance ({error})"))
+        defined = set(DECLARED.findall(inserted))
+        for name in COMPONENT.findall(inserted):
+            if name not in defined:
+                used.setdefault(name, key)
+    if not used:
+        return problems
+
+    imported = import_names(header_window(content))
+    # The import header edit, if any, brings its own names
+    for _, _, inserted in fragments:
+        imported |= import_names(inserted)
+    missing = [name for name in used if name not in imported]
+    found = declared(content, missing, sweep) if missing else set()
+    for name in missing:
+        if name not in found:
+            problems.append((used[name], f"{name} is used but neither imported nor declared"))
+    return problems
+
+
+class VerifyCache:
+    """sha256 digests of converted outputs that passed validation"""
+
+    def __init__(self, path=VERIFY_CACHE_PATH):
+        self.path = Path(path)
+        self.passed = dict.fromkeys(self._load())
+        self.dirty = False
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == VERIFY_CACHE_VERSION:
+                return data['passed']
+        except (OSError, ValueError, KeyError):
+            pass
+        return []
+
+    def __contains__(self, digest):
+        return digest in self.passed
+
+    def add(self, digest):
+        if digest not in self.passed:
+            self.passed[digest] = None
+            self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        passed = list(self.passed)[-VERIFY_CACHE_SIZE:]
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': VERIFY_CACHE_VERSION, 'passed': passed}, f)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
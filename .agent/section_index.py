@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Section Index
+Where every card grid of every page is, so commands look sections up by name
+instead of rescanning (and docs no longer hard-code line ranges)
+
+One pass over a page records each `{<collection>.map((<item>, index) => ...)}`
+call (and each inline `{[...].map(...)}`) with the className of the grid
+<div> around it, its character, byte and line span, the offset of the map's
+opening brace, whether the card already carries the converted-card
+fingerprint, and the span of the array literal the map iterates (the
+declaration `const <collection> = [...]`, or the inline array), which the
+data migration completes. Map calls and declarations are found with one
+regex each and their extent with the brace-aware JSX scanner, so the spans
+are the ones the converters rewrite.
+
+The index does not depend on the registry: sections are matched to entries
+by their map call when looked up. It is stored in .agent/.section_index.json
+keyed on file path with the mtime, size and sha256 of the content it was
+built from, and a page is only parsed again when its content hash changed.
+
+Usage:
+    python .agent/section_index.py                        # configured pages
+    python .agent/section_index.py --tree [DIR]           # every .tsx under DIR
+    python .agent/section_index.py --section programs     # look one section up
+    python .agent/section_index.py --rebuild              # ignore the stored index
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+from convert_cache import content_digest
+from data_migration import declared_arrays, inline_array, pick_array
+from fingerprint import FINGERPRINT
+from instrumentation import STATS
+from jsx_scanner import GRID_OPEN, find_expression_end, grid_end, inline_grid
+from section_registry import load_registry, project_root
+
+INDEX_PATH = Path(__file__).with_name('.section_index.json')
+INDEX_VERSION = 2
+
+# `<collection>.map((<item>, index)` or the `].map((<item>, index)` closing an inline array
+_MAP_CALL = re.compile(
+    r'(?:(?P<collection>[A-Za-z_$][\w$]*(?:\.[A-Za-z_$][\w$]*)*)|\])'
+    r'\.map\(\((?P<item>[A-Za-z_$][\w$]*), index\)'
+)
+_GRID_OPEN = re.compile(r'<div className="(?P<grid>[^"]*)">\s*')
+
+
+def index_page(content):
+    """Every map call in content, in file order, as JSON-ready dicts.
+
+    Each entry has the map call text, collection (None for an inline array),
+    item, grid className (None when the map is not the direct child of a
+    <div className="...">), span [start, end) in characters, bytes and
+    1-based lines, the offset of the map's `{` (None for a bare call), whether
+    the grid's closing </div> was found, whether the card is converted, and
+    the [start, end) of the array literal it maps over (None when it is not
+    declared in the page).
+    """
+    entries = []
+    for match in _MAP_CALL.finditer(content):
+        collection = match.group('collection')
+        if collection is None:
+            brace, grid = inline_grid(content, match.start())
+        else:
+            brace = _open_brace(content, match.start())
+            grid = _grid_before(content, brace) if brace is not None else None
+        end = None
+        closed = False
+        if brace is not None:
+            if grid is not None:
+                end = grid_end(content, brace)
+                closed = end is not None
+            if end is None:
+                end = find_expression_end(content, brace)
+        if grid is not None:
+            start = content.rfind(GRID_OPEN, 0, brace)
+        else:
+            start = brace if brace is not None else match.start()
+        entries.append({
+            'map_call': match.group(0),
+            'collection': collection,
+            'item': match.group('item'),
+            'grid': grid,
+            'start': start,
+            'brace': brace,
+            'end': end,
+            'closed': closed,
+            'call': match.start(),
+        })
+
+    # A card is converted when both fingerprint markers are inside its span,
+    # or, for a call whose end is unknown, before the next map call
+    for i, entry in enumerate(entries):
+        limit = entry['end']
+        if limit is None:
+            limit = entries[i + 1]['call'] if i + 1 < len(entries) else len(content)
+        entry['converted'] = all(content.find(marker, entry['call'], limit) != -1 for marker in FINGERPRINT)
+
+    # The array literal each map call iterates, for the data migration
+    names = {entry['collection'] for entry in entries if entry['collection'] and '.' not in entry['collection']}
+    declared = declared_arrays(content, names) if names else {}
+    for entry in entries:
+        if entry['collection'] is None:
+            span = inline_array(content, entry['brace']) if entry['brace'] is not None else None
+        else:
+            span = pick_array(declared.get(entry['collection'], ()), entry['call'])
+        entry['array'] = list(span) if span else None
+
+    _locate(content, entries)
+    for entry in entries:
+        del entry['call']
+    return entries
+
+
+def _open_brace(content, pos):
+    """Offset of the `{` right before pos (whitespace allowed), or None"""
+    i = pos - 1
+    while i >= 0 and content[i] in ' \t\r\n':
+        i -= 1
+    return i if i >= 0 and content[i] == '{' else None
+
+
+def _grid_before(content, brace):
+    """className of the <div> whose only content before brace is whitespace, or None"""
+    start = content.rfind(GRID_OPEN, 0, brace)
+    if start == -1:
+        return None
+    match = _GRID_OPEN.match(content, start, brace)
+    return match.group('grid') if match and match.end() == brace else None
+
+
+def _locate(content, entries):
+    """Add 'bytes' and 'lines' spans to entries in one walk over content"""
+    offsets = sorted({pos for entry in entries for pos in (entry['start'], entry['end']) if pos is not None})
+    positions = {}
+    line, byte, last = 1, 0, 0
+    for pos in offsets:
+        piece = content[last:pos]
+        line += piece.count('\n')
+        byte += len(piece.encode('utf-8'))
+        positions[pos] = (line, byte)
+        last = pos
+    for entry in entries:
+        start_line, start_byte = positions[entry['start']]
+        if entry['end'] is None:
+            entry['bytes'] = [start_byte, None]
+            entry['lines'] = [start_line, start_line]
+            continue
+        end_line, end_byte = positions[entry['end']]
+        # The span ends just past `</div>` or `}`, on the line holding it
+        entry['bytes'] = [start_byte, end_byte]
+        entry['lines'] = [start_line, end_line]
+
+
+class SectionIndex:
+    def __init__(self, path=INDEX_PATH):
+        self.path = Path(path)
+        self.files = self._load()
+        self.dirty = False
+        self.built = 0
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == INDEX_VERSION:
+                return data['files']
+        except (OSError, ValueError, KeyError):
+            pass
+        return {}
+
+    @staticmethod
+    def _key(filepath):
+        return os.path.abspath(filepath)
+
+    def is_fresh(self, filepath):
+        """True if filepath's stat still matches its index entry"""
+        entry = self.files.get(self._key(filepath))
+        if entry is None:
+            return False
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            return False
+        return entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size
+
+    def sections(self, filepath, content, digest=None):
+        """Index entries of filepath, whose current text is content; parsed only if its hash changed"""
+        digest = digest or content_digest(content)
+        entry = self.files.get(self._key(filepath))
+        if entry is not None and entry['sha256'] == digest:
+            return entry['sections']
+        with STATS.phase('index'):
+            sections = index_page(content)
+        stat = os.stat(filepath)
+        self.files[self._key(filepath)] = {
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'sha256': digest,
+            'sections': sections,
+        }
+        self.dirty = True
+        self.built += 1
+        STATS.add('pages_indexed')
+        return sections
+
+    def update(self, paths):
+        """Bring the index up to date for paths; files whose stat is unchanged are not even read"""
+        for filepath in paths:
+            if not os.path.exists(filepath) or self.is_fresh(filepath):
+                continue
+            with open(filepath, 'r', encoding='utf-8', newline='') as f:
+                content = f.read()
+            self.sections(filepath, content)
+
+    def find(self, map_call, paths=None):
+        """(filepath, entry) for every indexed map call equal to map_call, optionally only in paths"""
+        keys = None if paths is None else {self._key(path) for path in paths}
+        for filepath, entry in sorted(self.files.items()):
+            if keys is not None and filepath not in keys:
+                continue
+            for section in entry['sections']:
+                if section['map_call'] == map_call:
+                    yield filepath, section
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': INDEX_VERSION, 'files': self.files}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+
+def print_section(registry, key, found):
+    section = registry.sections[key]
+    if not found:
+        print(f"  ➖ absent      {key:<20} {section.file}")
+    for filepath, entry in found:
+        state = "☑️  converted  " if entry['converted'] else "🔲 convertible"
+        lines = f"lines {entry['lines'][0]}-{entry['lines'][1]}"
+        print(f"  {state} {key:<20} {os.path.relpath(filepath)}  {lines}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index the card grids of every page and look sections up")
+    parser.add_argument('--tree', nargs='?', const=True, metavar='DIR',
+                        help="index every .tsx file under DIR (default: src under --root) instead of the configured pages")
+    parser.add_argument('--root', metavar='DIR',
+                        help="site root the configured page paths are relative to "
+                             "(default: nearest directory holding package.json)")
+    parser.add_argument('--section', metavar='KEY', action='append',
+                        help="only show the registered section KEY (repeatable)")
+    parser.add_argument('--rebuild', action='store_true', help="discard the stored index first")
+    parser.add_argument('--json', action='store_true', help="print the index entries as JSON")
+    args = parser.parse_args(argv)
+
+    registry = load_registry()
+    root = args.root or project_root()
+    if args.tree is True:
+        args.tree = os.path.join(root, 'src')
+    if args.tree:
+        paths = sorted(str(path) for path in Path(args.tree).rglob('*.tsx'))
+    else:
+        paths = list(registry.files(root))
+    index = SectionIndex()
+    if args.rebuild:
+        index.files = {}
+    index.update(paths)
+    index.save()
+
+    keys = args.section or list(registry.keys())
+    unknown = [key for key in keys if key not in registry.sections]
+    if unknown:
+        print(f"❌ Unknown section(s): {', '.join(unknown)}", file=sys.stderr)
+        sys.exit(1)
+    found = {}
+    for key in keys:
+        section = registry.sections[key]
+        scope = None if args.tree else [os.path.join(root, section.file)]
+        found[key] = [(path, entry) for path, entry in index.find(section.map_call, scope)
+                      if entry['grid'] in (section.grid, section.output_grid)]
+    if args.json:
+        json.dump({key: [dict(entry, file=path) for path, entry in entries] for key, entries in found.items()},
+                  sys.stdout, indent=2)
+        print()
+        return
+
+    print(f"\n🗂️  Section index: {len(paths)} page(s), {index.built} re-indexed")
+    for key in keys:
+        print_section(registry, key, found[key])
+    print("")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,530 @@
+#!/usr/bin/env python3
+"""
+Section Registry
+Declarative list of every card section the converters know how to rewrite
+
+Sections are declared in templates/sections.json: target file, map
+collection (null for an inline array), iterator name and grid classes, plus
+either a small "card" spec rendered from the shared base card (see
+card_template.py) or a "template" file in templates/ swapped in verbatim.
+Target files are relative to the site's root (see project_root()), not to
+the working directory.
+The manifest is loaded and its patterns compiled once per process, and the
+registry keeps the compiled scanners, so no conversion goes through re's
+own pattern cache; template files are only read and rendered when a section
+actually converts, and then memoized. Adding a section means adding a manifest entry, never editing
+Python.
+
+The manifest's "field_defaults" give the value the data migration (see
+data_migration.py) puts in a field a converted card reads but an object of
+its array lacks, and its "imports" the module each name a converted card
+uses is imported from (see import_fixer.py).
+"""
+
+import functools
+import json
+import os
+import re
+import time
+from pathlib import Path
+
+from card_template import TEMPLATE_UNIT, indent_lines, render_card_grid, rescale
+from convert_cache import templates_digest
+from data_migration import declared_arrays, inline_array, merge_edits, migrate_array, pick_array
+from fingerprint import ABSENT, CONVERTED, CONVERTIBLE, MarkerIndex, markers
+from import_fixer import IMPORTS, declared, header_window, import_edit, import_names, used_names
+from instrumentation import STATS
+from jsx_scanner import (
+    GRID_OPEN, find_expression_end, grid_end, grid_head, inline_grid, inline_map_marker, map_call_marker,
+)
+
+TEMPLATES_DIR = Path(__file__).with_name('templates')
+REGISTRY_PATH = TEMPLATES_DIR / 'sections.json'
+GRID_TEMPLATE = 'grid_base.tsx'
+CARD_TEMPLATE = 'card_base.tsx'
+
+# Longest grid head (opening <div> through the map call it looks ahead to)
+# that a windowed scan is guaranteed to find
+HEAD_SLACK = 1 << 16
+
+# Stands in for an inline array while a grid is rendered; the page's own
+# array text is put back verbatim afterwards
+INLINE_ARRAY = '\0inline-array\0'
+
+# A line feed not already part of a CRLF
+_LONE_LF = re.compile(r'(?<!\r)\n')
+
+
+class Section:
+    __slots__ = ('key', 'title', 'file', 'collection', 'item', 'grid', 'output_grid',
+                 'card', 'template', 'head', 'marker', 'map_call')
+
+    def __init__(self, key, title, file, collection, item, grid,
+                 output_grid=None, card=None, template=None):
+        if (card is None) == (template is None):
+            raise ValueError(f"section {key!r} needs exactly one of 'card' or 'template'")
+        self.key = key
+        self.title = title
+        self.file = file
+        self.collection = collection
+        self.item = item
+        self.grid = grid
+        self.output_grid = output_grid or grid
+        self.card = card
+        self.template = template
+        self.head = grid_head(grid, collection, item)
+        self.marker = inline_map_marker(item) if collection is None else None
+        self.map_call = map_call_marker(collection, item)
+
+
+def _memoized(method):
+    """Cache a Registry method's results per instance, in its memo dict"""
+    name = method.__name__
+
+    @functools.wraps(method)
+    def cached(self, *args):
+        key = (name, *args)
+        try:
+            return self.memo[key]
+        except KeyError:
+            value = self.memo[key] = method(self, *args)
+            return value
+
+    return cached
+
+
+class Registry:
+    def __init__(self, sections, templates_dir, manifest_text, field_defaults=None, imports=None):
+        self.sections = {section.key: section for section in sections}
+        self.field_defaults = field_defaults or {}
+        self.imports = imports or {}
+        self.templates_dir = Path(templates_dir)
+        self.manifest_text = manifest_text
+        # Compiled scanners by (keys, binary); tree mode's every-section one is compiled up front
+        self.scanners = {}
+        # Results of the @_memoized methods by (method, args); kept on the
+        # instance so a registry dropped by reload_registry is freed with them
+        self.memo = {}
+        self.scanner(self.keys())
+
+    def keys(self):
+        return tuple(self.sections)
+
+    def files(self, root=None, keys=None):
+        """Target files in manifest order, each with the keys of its sections.
+
+        With root the paths are resolved against it (and given relative to
+        the working directory, so they read the same when run from root);
+        keys limits the result to those sections.
+        """
+        grouped = {}
+        for section in self.sections.values():
+            if keys is not None and section.key not in keys:
+                continue
+            path = section.file if root is None else os.path.relpath(os.path.join(root, section.file))
+            grouped.setdefault(path, []).append(section.key)
+        return grouped
+
+    def template_names(self):
+        """Every template file the sections render from, sorted"""
+        names = {GRID_TEMPLATE, CARD_TEMPLATE}
+        names.update(section.template for section in self.sections.values() if section.template)
+        return sorted(names)
+
+    def digest(self):
+        """Hash of the manifest and the template files' stat, for the conversion cache"""
+        stats = []
+        for name in self.template_names():
+            stat = os.stat(self.templates_dir / name)
+            stats.append((name, stat.st_mtime_ns, stat.st_size))
+        return templates_digest(self.manifest_text, stats)
+
+    @_memoized
+    def template(self, key):
+        """Markup for key at column 0 with TEMPLATE_UNIT indentation, rendered once"""
+        section = self.sections[key]
+        if section.template:
+            return _read_template(self.templates_dir / section.template)
+        return render_card_grid(
+            _read_template(self.templates_dir / GRID_TEMPLATE),
+            _read_template(self.templates_dir / CARD_TEMPLATE),
+            section.card,
+            section.item,
+            section.collection or INLINE_ARRAY,
+            section.output_grid,
+        )
+
+    @_memoized
+    def fields(self, key):
+        """Fields of its item the converted card of key reads that have a default, in template order"""
+        item = re.escape(self.sections[key].item)
+        found = re.findall(rf'(?<![\w$.]){item}\.([A-Za-z_$][\w$]*)', self.template(key))
+        return tuple(field for field in dict.fromkeys(found) if field in self.field_defaults)
+
+    @_memoized
+    def names(self, key):
+        """Names the converted markup of key uses from outside it, in template order"""
+        return used_names(self.template(key))
+
+    def scanner(self, keys, binary=False):
+        """One alternation over the heads of keys, one named group per section, compiled once.
+
+        The heads' shared GRID_OPEN is factored out in front of the
+        alternation, so re looks for that literal prefix instead of trying
+        every branch at every offset. With binary the pattern is compiled
+        for bytes, to scan an mmap directly.
+        """
+        compiled = self.scanners.get((keys, binary))
+        if compiled is None:
+            branches = '|'.join(f'(?P<{key}>{self.sections[key].head[len(GRID_OPEN):]})' for key in keys)
+            pattern = f'{GRID_OPEN}(?:{branches})'
+            compiled = re.compile(pattern.encode() if binary else pattern)
+            self.scanners[(keys, binary)] = compiled
+            STATS.add('patterns_compiled')
+        return compiled
+
+    @_memoized
+    def fingerprints(self, keys):
+        """The map calls of keys and the converted-card markers"""
+        return markers(self.sections[key].map_call for key in keys)
+
+    def classify(self, content, keys, sweep=None):
+        """Map each key to converted, convertible or absent in one pass over content"""
+        keys = tuple(keys)
+        with STATS.phase('classify'):
+            index = MarkerIndex(self.fingerprints(keys), content, sweep)
+            return index.classify({key: self.sections[key].map_call for key in keys})
+
+    def classify_indexed(self, entries, keys):
+        """classify() from a page's section index entries (see section_index.py) instead of its content"""
+        states = {}
+        for key in keys:
+            found = [entry for entry in entries if entry['map_call'] == self.sections[key].map_call]
+            if not found:
+                states[key] = ABSENT
+            elif all(entry['converted'] for entry in found):
+                states[key] = CONVERTED
+            else:
+                states[key] = CONVERTIBLE
+        return states
+
+    def plan(self, content, keys, entries=None):
+        """Classify keys and locate the convertible ones, without changing content.
+
+        Returns the state of every key, the edits (see edits()) in file order,
+        and for each edit the seconds spent locating and rendering it. With
+        the page's section index entries the states and grid spans come from
+        the index and content is neither classified nor scanned.
+        """
+        if entries is None:
+            states = self.classify(content, keys)
+        else:
+            states = self.classify_indexed(entries, keys)
+        pending = [key for key in keys if states[key] == CONVERTIBLE]
+        edits, seconds = [], []
+        if not pending:
+            return states, edits, seconds
+        with STATS.phase('convert'):
+            if entries is None:
+                found = self.edits(content, pending)
+            else:
+                found = self.indexed_edits(content, entries, pending)
+            start = time.perf_counter()
+            for edit in found:
+                now = time.perf_counter()
+                edits.append(edit)
+                seconds.append(now - start)
+                start = now
+        return states, edits, seconds
+
+    def convert_pending(self, content, keys, entries=None):
+        """Classify keys, then run the grid scanner only for the convertible ones.
+
+        Returns the new content, the keys converted, and the state of every key
+        before conversion. See plan() for entries.
+        """
+        states, edits, _ = self.plan(content, keys, entries)
+        if not edits:
+            return content, [], states
+        content, converted = self.apply(content, edits)
+        return content, converted, states
+
+    @_memoized
+    def scaled_template(self, key, unit):
+        """Markup for key rescaled to an indentation unit, computed once per unit"""
+        return rescale(self.template(key), unit)
+
+    def render(self, key, content, start, brace):
+        """Markup for key re-indented to sit at content[start], the grid whose map opens at content[brace].
+
+        content may be a str, or the bytes/mmap of a UTF-8 file, in which case
+        the markup comes back encoded.
+        """
+        binary = not isinstance(content, str)
+        newline = b'\n' if binary else '\n'
+        line_start = content.rfind(newline, 0, start) + 1
+        indent = _text(content[line_start:start])
+        if indent.strip():
+            indent = ''
+
+        # The map line's indentation relative to the grid gives the file's unit
+        unit = TEMPLATE_UNIT
+        map_line_start = content.rfind(newline, 0, brace) + 1
+        if map_line_start > start:
+            step = len(_text(content[map_line_start:brace])) - len(indent)
+            if 0 < step <= 8:
+                unit = step
+
+        markup = _line_endings(indent_lines(self.scaled_template(key, unit), indent), content)
+        if INLINE_ARRAY in markup:
+            array_start = content.find(b'[' if binary else '[', brace)
+            array_end = find_expression_end(content, array_start)
+            markup = markup.replace(INLINE_ARRAY, _text(content[array_start:array_end]))
+        return markup.encode() if binary else markup
+
+    def edits(self, content, keys, sweep=None):
+        """Yield (key, start, end, replacement) for every section in keys, in file order.
+
+        The combined scanner finds each grid opener and the JSX scanner finds
+        its real end, so every section is located in one walk over the file.
+        Each section is converted at most once (like re.sub(..., count=1)) and
+        spans that already hold their replacement are not reported. For bytes
+        or mmap content the offsets are byte offsets and replacements are bytes,
+        and a sweep (see mapped_io.Sweep) makes the scan go window by window.
+        """
+        binary = not isinstance(content, str)
+        scanner = self.scanner(tuple(keys), binary)
+        seen = set()
+        match = _search(scanner, content, 0, sweep)
+        while match:
+            STATS.add('grid_heads')
+            key = match.lastgroup
+            section = self.sections[key]
+            end = grid_end(content, match.end())
+            if (
+                end is None
+                or key in seen
+                or (section.marker and content.find(
+                    section.marker.encode() if binary else section.marker, match.end(), end) == -1)
+            ):
+                match = _search(scanner, content, match.end(), sweep)
+                continue
+            with STATS.phase('convert.render'):
+                replacement = self.render(key, content, match.start(), match.end())
+            if content[match.start():end] != replacement:
+                seen.add(key)
+                yield key, match.start(), end, replacement
+            match = _search(scanner, content, end, sweep)
+
+    def indexed_edits(self, content, entries, keys):
+        """edits() from the page's section index entries: the grids are already located.
+
+        Follows edits(): a grid must be closed and keep its registered
+        className, each key converts at most once, and grids inside a span
+        already taken are skipped.
+        """
+        seen = set()
+        last = 0
+        for entry in entries:
+            if not entry['closed'] or entry['start'] < last:
+                continue
+            for key in keys:
+                section = self.sections[key]
+                if key in seen or entry['map_call'] != section.map_call or entry['grid'] != section.grid:
+                    continue
+                start, end = entry['start'], entry['end']
+                with STATS.phase('convert.render'):
+                    replacement = self.render(key, content, start, entry['brace'])
+                last = end
+                if content[start:end] != replacement:
+                    seen.add(key)
+                    yield key, start, end, replacement
+                break
+
+    def migrate(self, content, keys, states, edits, entries=None):
+        """Data edits completing the arrays of the sections in keys that are converted or convert now.
+
+        Each is (key, start, end, replacement, fields added) for one array
+        literal, in file order; see data_migration.py. edits are the grid
+        edits of this run. With the page's section index entries the arrays
+        come from the index; otherwise declarations are found with one regex
+        pass and inline arrays from the grid around them. An array shared by
+        several sections gets every field any of them reads.
+        """
+        starts = {edit[0]: edit[1] for edit in edits}
+        keys = [key for key in keys if self.fields(key) and (states[key] == CONVERTED or key in starts)]
+        if not keys:
+            return []
+        with STATS.phase('migrate'):
+            if entries is None:
+                names = {self.sections[key].collection for key in keys}
+                declared = declared_arrays(content, names - {None})
+            arrays = {}
+            for key in keys:
+                section = self.sections[key]
+                if entries is not None:
+                    span = next((tuple(entry['array']) for entry in entries
+                                 if entry['map_call'] == section.map_call and entry['array']), None)
+                elif section.collection is not None:
+                    span = pick_array(declared.get(section.collection, ()), content.find(section.map_call))
+                elif key in starts:
+                    span = inline_array(content, content.find('{', starts[key]))
+                else:
+                    brace, _ = inline_grid(content, content.find(section.marker))
+                    span = inline_array(content, brace) if brace is not None else None
+                if span is not None:
+                    fields = arrays.setdefault(span, [key, []])[1]
+                    fields.extend(field for field in self.fields(key) if field not in fields)
+
+            data = []
+            last = 0
+            for (start, end), (key, fields) in sorted(arrays.items()):
+                # An array must lie inside a grid being replaced or clear of all of them
+                if start < last or any(
+                    edit[1] < end and start < edit[2] and not (edit[1] <= start and end <= edit[2])
+                    for edit in edits
+                ):
+                    continue
+                migrated = migrate_array(content, start, end, fields, self.field_defaults)
+                if migrated is not None:
+                    data.append((key, start, end, _line_endings(migrated[0], content), migrated[1]))
+                    STATS.add('fields_added', migrated[1])
+                last = end
+            return data
+
+    def fix_imports(self, content, keys, states, edits, sweep=None):
+        """The import header edit giving the page what the sections in keys
+        that are converted or convert now use, as a data edit (IMPORTS,
+        start, end, replacement, names added) in a list, or [].
+
+        For bytes or mmap content the header is decoded from its first
+        HEADER_BYTES (see import_fixer.header_window), the names it lacks
+        are looked for as declarations in one scan of the bytes (window by
+        window with a sweep), and the edit has byte offsets and bytes.
+        """
+        converting = {edit[0] for edit in edits}
+        names = dict.fromkeys(name for key in keys if states[key] == CONVERTED or key in converting
+                              for name in self.names(key))
+        return self.import_data(content, names, sweep)
+
+    def import_data(self, content, names, sweep=None):
+        """The import header edit giving content the names it lacks, as a
+        data edit in a list, or []; see fix_imports()"""
+        names = dict.fromkeys(names)
+        if not names or not self.imports:
+            return []
+        binary = not isinstance(content, str)
+        with STATS.phase('imports'):
+            header = header_window(content)
+            if binary:
+                imported = import_names(header)
+                for name in declared(content, [name for name in names if name not in imported], sweep):
+                    del names[name]
+            edit = import_edit(header, names, self.imports)
+        if edit is None:
+            return []
+        STATS.add('imports_added', edit[3])
+        start, end, replacement, added = edit
+        replacement = _line_endings(replacement, content)
+        if binary:
+            start, end = len(header[:start].encode()), len(header[:end].encode())
+            replacement = replacement.encode()
+        return [(IMPORTS, start, end, replacement, added)]
+
+    def convert(self, content, keys):
+        """Rewrite every section in keys in a single pass over content; see apply()"""
+        return self.apply(content, self.edits(content, keys))
+
+    def apply(self, content, edits, data=()):
+        """Splice edits, (key, start, end, replacement) in file order, into content.
+
+        data are the data edits of migrate(), spliced in the same pass. The
+        output is assembled with one join. Returns the new content and the
+        keys that were converted, in file order. Time spent here is recorded
+        as the 'convert' phase, which includes 'convert.render'.
+        """
+        with STATS.phase('convert'):
+            edits = list(edits)
+            converted = [edit[0] for edit in edits]
+            STATS.add('sections_converted', len(converted))
+            if data:
+                edits = merge_edits(content, edits, data)
+            if not edits:
+                return content, converted
+            pieces = []
+            last = 0
+            for key, start, end, replacement in edits:
+                pieces.append(content[last:start])
+                pieces.append(replacement)
+                last = end
+            pieces.append(content[last:])
+            return ''.join(pieces), converted
+
+
+def _search(scanner, content, pos, sweep):
+    """scanner.search(content, pos), one sweep window at a time when sweep is given"""
+    if sweep is None:
+        return scanner.search(content, pos)
+    length = len(content)
+    while pos < length:
+        window_end = min(pos + sweep.step, length)
+        # A head starting inside the window may run past it by up to HEAD_SLACK
+        match = scanner.search(content, pos, min(length, window_end + HEAD_SLACK))
+        if match and match.start() < window_end:
+            return match
+        sweep.done(window_end)
+        pos = window_end
+    return None
+
+
+
+def _text(value):
+    return value if isinstance(value, str) else value.decode('utf-8')
+
+
+def _line_endings(text, content):
+    """text (a str) with its line feeds made CRLF if content's first line ends in CRLF"""
+    binary = not isinstance(content, str)
+    newline = content.find(b'\n' if binary else '\n')
+    if newline > 0 and content[newline - 1:newline] == (b'\r' if binary else '\r'):
+        return _LONE_LF.sub('\r\n', text)
+    return text
+
+
+@functools.lru_cache(maxsize=None)
+def _read_template(path):
+    """Template markup without its leading /* ... */ header comments"""
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = f.read().rstrip().split('\n')
+    while lines and (lines[0].startswith('/*') or not lines[0].strip()):
+        lines.pop(0)
+    return '\n'.join(lines)
+
+
+def project_root(start=None):
+    """The site the manifest's target files are relative to: the nearest
+    directory at or above start (default: the working directory) holding a
+    package.json, else the one .agent lives in"""
+    start = Path(start or os.getcwd()).resolve()
+    for directory in (start, *start.parents):
+        if (directory / 'package.json').is_file():
+            return directory
+    return TEMPLATES_DIR.parent.parent
+
+
+@functools.lru_cache(maxsize=None)
+def load_registry(path=REGISTRY_PATH):
+    """Load and compile the section manifest once per process"""
+    path = Path(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest_text = f.read()
+    manifest = json.loads(manifest_text)
+    sections = [Section(**entry) for entry in manifest['sections']]
+    return Registry(sections, path.parent, manifest_text, manifest.get('field_defaults'), manifest.get('imports'))
+
+
+def reload_registry(path=REGISTRY_PATH):
+    """Drop the compiled manifest and template text, then load them again (for --watch)"""
+    load_registry.cache_clear()
+    _read_template.cache_clear()
+    return load_registry(path)
@@ -0,0 +1,84 @@
+/* BASE CARD - CAMPUS HIGHLIGHTS PATTERN */
+/* Rendered by card_template.py from the "card" spec of each section in sections.json; not for copy-paste */
+
+<motion.div
+    key={${item}.${key}}
+    custom={index}
+    initial="initial"
+    whileInView="animate"
+    whileHover="hover"
+    viewport={{ once: true }}
+    variants={{
+        initial: { opacity: 0, y: 30 },
+        animate: { opacity: 1, y: 0, transition: { duration: 0.5, delay: 0.1 * index } },
+        hover: { y: -5, transition: { duration: 0.3 } }
+    }}
+    className="group relative overflow-hidden rounded-xl border border-border shadow-sm bg-card cursor-pointer hover:shadow-lg hover:border-accent/50 transition-all duration-300"
+>
+    {/* Image Section${^image} - ${placeholder_note}${/image} */}
+    <div className="aspect-${aspect} overflow-hidden relative bg-muted">
+        ${#image}${#fallback}{${item}.image ? (
+            <>
+                <img
+                    src={${item}.image}
+                    alt={${item}.${title}}
+                    className="w-full h-full object-cover transition-transform duration-500 group-hover:scale-110"
+                />
+                {/* Gradient overlay on hover */}
+                <div className="absolute inset-0 bg-gradient-to-t from-background/90 via-background/20 to-transparent opacity-0 group-hover:opacity-100 transition-opacity duration-300" />
+            </>
+        ) : (
+            <div className="w-full h-full flex items-center justify-center bg-${color}/5">
+                <${icon} className="h-16 w-16 text-${color}/40" />
+            </div>
+        )}${/fallback}${^fallback}<img
+            src={${item}.image}
+            alt={${item}.${title}}
+            className="w-full h-full object-cover transition-transform duration-500 group-hover:scale-110"
+        />
+        {/* Gradient overlay on hover */}
+        <div className="absolute inset-0 bg-gradient-to-t from-background/90 via-background/20 to-transparent opacity-0 group-hover:opacity-100 transition-opacity duration-300" />${/fallback}${/image}${^image}<div className="w-full h-full flex items-center justify-center bg-${color}/5">
+            <${icon} className="h-16 w-16 text-${color}/40" />
+        </div>${/image}
+    </div>
+
+    {/* Content Section */}
+    <div className="p-5 relative z-10 bg-card${#centered} text-center${/centered}">
+        ${#icon_row}<div className="flex ${row_align} gap-3 mb-3">
+            <div className="w-10 h-10 rounded-lg bg-${color}/10 flex items-center justify-center flex-shrink-0">
+                <${icon} className="h-5 w-5 text-${color}" />
+            </div>
+            <div className="flex-1">
+                <h3 className="${title_class}">
+                    {${item}.${title}}
+                </h3>
+                ${subtitle}
+            </div>
+        </div>
+${/icon_row}${^icon_row}${#badge}<div className="flex justify-center mb-3">
+            <div className="${badge_shape} bg-${color}/10 flex items-center justify-center">
+                <${icon} className="${badge_icon_size} text-${color}" />
+            </div>
+        </div>
+
+        ${/badge}<h3 className="${title_class}">
+            {${item}.${title}}
+        </h3>${/icon_row}
+        ${body}
+
+        {/* Animated Description - Drops down on Hover */}
+        <motion.div
+            variants={{
+                initial: { height: 0, opacity: 0 },
+                animate: { height: 0, opacity: 0 },
+                hover: { height: "auto", opacity: 1 }
+            }}
+            className="overflow-hidden"
+            transition={{ duration: 0.4, ease: "easeOut" }}
+        >
+            <p className="${hover_class}">
+                {${item}.${hover}}
+            </p>
+        </motion.div>
+    </div>
+</motion.div>
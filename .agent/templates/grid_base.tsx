@@ -0,0 +1,13 @@
+/* BASE GRID - CAMPUS HIGHLIGHTS PATTERN */
+/* Wraps card_base.tsx; rendered by card_template.py, not for copy-paste */
+
+<div className="${grid}">
+    {${collection}.map((${item}, index) => ${#icon_component}{
+        const IconComponent = ${item}.icon;
+        return (
+            ${card}
+        );
+    })}${/icon_component}${^icon_component}(
+        ${card}
+    ))}${/icon_component}
+</div>
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Three-way Merge
+Re-apply a file's section edits on top of changes made to it after it was read
+
+A converter plans its edits (key, start, end, replacement) against the text
+it read, the base. If someone saves the file before the output is committed,
+the edits are moved onto the current text instead of overwriting it. The
+merge works on spans and never converts anything again:
+
+  - the common prefix and suffix of base and current bound the region that
+    changed (compared a chunk at a time, then character by character)
+  - an edit wholly before that region keeps its offsets, and one wholly after
+    it moves by the change in length
+  - an edit touching the region is looked up by its original text; if that
+    text occurs exactly once in the current file the edit goes there,
+    otherwise the section is a conflict and is left as the editor saved it
+
+Works on str, or on bytes with byte offsets (the --mmap edits).
+"""
+
+# Characters compared per step while looking for the common prefix and suffix
+CHUNK = 4096
+
+# Why an edit could not be re-applied
+EDITED = 'section edited since it was read'
+AMBIGUOUS = 'section text now occurs more than once'
+OVERLAP = 'section overlaps another edit'
+
+
+def common_prefix(a, b):
+    """Length of the longest common prefix of a and b"""
+    limit = min(len(a), len(b))
+    pos = 0
+    while pos + CHUNK <= limit and a[pos:pos + CHUNK] == b[pos:pos + CHUNK]:
+        pos += CHUNK
+    # The first difference, if any, is within the next chunk
+    while pos < limit and a[pos] == b[pos]:
+        pos += 1
+    return pos
+
+
+def common_suffix(a, b, limit):
+    """Length of the longest common suffix of a and b, at most limit"""
+    la, lb = len(a), len(b)
+    length = 0
+    while length + CHUNK <= limit and a[la - length - CHUNK:la - length] == b[lb - length - CHUNK:lb - length]:
+        length += CHUNK
+    while length < limit and a[la - length - 1] == b[lb - length - 1]:
+        length += 1
+    return length
+
+
+def rebase(base, current, edits):
+    """Move edits, (key, start, end, replacement) planned on base, onto current.
+
+    Returns (merged text or None if no edit applies, keys applied,
+    [(key, reason)] conflicts), keys in file order.
+    """
+    prefix = common_prefix(base, current)
+    suffix = common_suffix(base, current, min(len(base), len(current)) - prefix)
+    changed_end = len(base) - suffix
+    shift = len(current) - len(base)
+
+    placed = []
+    conflicts = []
+    for key, start, end, replacement in edits:
+        if end <= prefix:
+            placed.append((start, end, key, replacement))
+        elif start >= changed_end:
+            placed.append((start + shift, end + shift, key, replacement))
+        else:
+            text = base[start:end]
+            found = current.find(text)
+            if found == -1:
+                conflicts.append((key, EDITED))
+            elif current.find(text, found + 1) != -1:
+                conflicts.append((key, AMBIGUOUS))
+            else:
+                placed.append((found, found + len(text), key, replacement))
+
+    placed.sort()
+    pieces = []
+    applied = []
+    last = 0
+    for start, end, key, replacement in placed:
+        if start < last:
+            conflicts.append((key, OVERLAP))
+            continue
+        pieces.append(current[last:start])
+        pieces.append(replacement)
+        applied.append(key)
+        last = end
+    if not applied:
+        return None, applied, conflicts
+    pieces.append(current[last:])
+    return current[:0].join(pieces), applied, conflicts